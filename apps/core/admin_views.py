@@ -1,17 +1,21 @@
 """
 MC Castellazzo - Bulk Upload Admin Views
 =========================================
-Viste admin per il caricamento massivo di immagini e API per metadati immagini.
+Viste admin per il caricamento massivo di immagini, stato delle rendition
+pre-generate, stato dei provider di traduzione automatica e API per
+metadati immagini.
 """
 
-import io
 import json
 import logging
+import os
 from typing import Optional
 
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required, permission_required
 from django.core.files.base import ContentFile
+from django.db.models import Count
 from django.http import JsonResponse
 from django.shortcuts import redirect, render
 from django.utils.decorators import method_decorator
@@ -24,32 +28,149 @@ from wagtail.permission_policies.collections import CollectionOwnershipPermissio
 
 logger = logging.getLogger(__name__)
 
-from apps.core.forms import BulkUploadForm
+from apps.core.chunked_upload import (
+    ChunkedUploadError,
+    batch_status,
+    create_batch,
+    finish_file,
+    get_batch,
+    parse_content_range,
+    part_path,
+    receive_chunk,
+)
+from apps.core.forms import BulkUploadBatchForm, BulkUploadForm
+from apps.core.image_dedup import (
+    MODE_UPLOAD,
+    find_duplicates,
+    get_duplicate_mode,
+    get_max_distance,
+    hamming,
+    link_duplicate,
+)
 from apps.core.image_optimizer import (
+    WEBP_METHOD,
+    available_cpus,
     generate_filename,
-    optimize_image,
+    optimize_image_source,
+    optimize_images,
+    perceptual_hash,
+    perceptual_hashes,
+)
+from apps.core.renditions import (
+    enqueue_gallery_renditions,
+    enqueue_renditions,
+    get_gallery_filter_specs,
+    get_pending_count,
+    get_rendition_registry,
+    get_statuses,
 )
 
 
 Image = get_image_model()
 
 
+def _upload_source(uploaded_file):
+    """Path del file temporaneo se su disco, altrimenti il contenuto in memoria."""
+    if hasattr(uploaded_file, "temporary_file_path"):
+        return uploaded_file.temporary_file_path()
+    # Letto due volte (hash, poi ottimizzazione)
+    uploaded_file.seek(0)
+    return uploaded_file.read()
+
+
+def save_bulk_image(
+    optimized: bytes,
+    title_prefix: str,
+    idx: int,
+    tags: list,
+    collection: Collection,
+    user=None,
+    phash: Optional[int] = None,
+):
+    """
+    Salva un'immagine ottimizzata del caricamento massivo.
+    
+    Args:
+        optimized: Bytes WebP già ottimizzati
+        title_prefix: Prefisso per il titolo
+        idx: Posizione (0-based) del file nel caricamento
+        tags: Lista di tag da applicare
+        collection: Collezione Wagtail
+        user: Utente che esegue l'upload
+        phash: Hash percettivo già calcolato (indice dei duplicati)
+        
+    Returns:
+        Oggetto Image creato
+    """
+    # Numero sequenziale 1-based per titolo, 0-based per filename
+    sequence_num = idx + 1
+    
+    # Genera titolo con numero
+    title = f"{title_prefix} - {sequence_num:03d}"
+    
+    # Genera nome file
+    filename = generate_filename(title_prefix, idx)
+    
+    # Crea il file Django
+    django_file = ContentFile(optimized, name=filename)
+    
+    # Crea l'oggetto Image di Wagtail
+    wagtail_image = Image(
+        title=title,
+        file=django_file,
+        collection=collection,
+    )
+    
+    # Imposta l'utente che ha caricato se disponibile
+    if user and hasattr(wagtail_image, "uploaded_by_user"):
+        wagtail_image.uploaded_by_user = user
+    
+    # Salvato dal post_save di apps.core.image_dedup senza rileggere il file
+    wagtail_image._phash = phash
+    wagtail_image.save()
+    
+    # Aggiungi i tag
+    if tags:
+        for tag in tags:
+            wagtail_image.tags.add(tag)
+    
+    return wagtail_image
+
+
 def process_bulk_upload(
     images: list,
     title_prefix: str,
     tags: list,
     collection: Optional[Collection] = None,
     user=None,
+    duplicates: Optional[list] = None,
 ) -> list:
     """
     Processa un batch di immagini per l'upload.
     
+    Prima dell'ottimizzazione viene calcolato l'hash percettivo di ogni file
+    (economico) e cercato fra le immagini esistenti e i file precedenti
+    dello stesso caricamento: i quasi-duplicati non vengono ottimizzati né
+    salvati (``BULK_UPLOAD_DUPLICATES``, apps.core.image_dedup). Titoli e
+    filename restano quelli della posizione nel caricamento.
+    
+    L'ottimizzazione (resize + WebP) gira su un pool di processi
+    (``BULK_UPLOAD_WORKERS``, default: core disponibili) con al massimo
+    ``BULK_UPLOAD_MAX_IN_FLIGHT`` immagini in lavorazione; salvataggi e tag
+    restano sequenziali e nell'ordine di upload, quindi titoli e filename
+    (-000, -001...) sono deterministici.
+
+    Le rendition della galleria vengono poi generate in background
+    (apps.core.renditions).
+    
     Args:
         images: Lista di file immagine caricati
         title_prefix: Prefisso per i titoli
         tags: Lista di tag da applicare
         collection: Collezione Wagtail opzionale
         user: Utente che esegue l'upload
+        duplicates: Se passata, riceve (nome file, immagine esistente) per
+            ogni duplicato non caricato
         
     Returns:
         Lista di oggetti Image creati
@@ -60,46 +181,53 @@ def process_bulk_upload(
     if collection is None:
         collection = Collection.get_first_root_node()
     
-    for idx, uploaded_file in enumerate(images):
-        # Numero sequenziale 1-based per titolo, 0-based per filename
-        sequence_num = idx + 1
-        
-        # Genera titolo con numero
-        title = f"{title_prefix} - {sequence_num:03d}"
-        
-        # Genera nome file
-        filename = generate_filename(title_prefix, idx)
-        
-        # Leggi e ottimizza l'immagine
-        image_buffer = io.BytesIO(uploaded_file.read())
-        optimized_buffer = optimize_image(image_buffer)
-        
-        # Crea il file Django
-        django_file = ContentFile(
-            optimized_buffer.read(),
-            name=filename
-        )
-        
-        # Crea l'oggetto Image di Wagtail
-        wagtail_image = Image(
-            title=title,
-            file=django_file,
-            collection=collection,
+    workers = getattr(settings, "BULK_UPLOAD_WORKERS", None)
+    if workers is None:
+        workers = available_cpus()
+    workers = min(workers, len(images))
+    max_in_flight = getattr(settings, "BULK_UPLOAD_MAX_IN_FLIGHT", None)
+    
+    # Duplicati: immagine esistente o indice di un file precedente del batch
+    hashes = [None] * len(images)
+    duplicate_of = {}
+    if get_duplicate_mode() != MODE_UPLOAD:
+        hashes = list(perceptual_hashes(
+            (_upload_source(uploaded_file) for uploaded_file in images),
+            workers=workers,
+            max_in_flight=max_in_flight,
+        ))
+        matches = find_duplicates(hashes)
+        for idx, phash in enumerate(hashes):
+            if phash in matches:
+                duplicate_of[idx] = matches[phash][0]
+                continue
+            for earlier in range(idx):
+                if earlier not in duplicate_of and hamming(hashes[earlier], phash) <= get_max_distance():
+                    duplicate_of[idx] = earlier
+                    break
+    
+    to_process = [idx for idx in range(len(images)) if idx not in duplicate_of]
+    optimized_images = optimize_images(
+        (_upload_source(images[idx]) for idx in to_process),
+        workers=min(workers, len(to_process)),
+        max_in_flight=max_in_flight,
+        webp_method=getattr(settings, "BULK_UPLOAD_WEBP_METHOD", WEBP_METHOD),
+    )
+    
+    saved = {}
+    for idx, optimized in zip(to_process, optimized_images, strict=True):
+        saved[idx] = save_bulk_image(
+            optimized, title_prefix, idx, tags, collection, user, phash=hashes[idx]
         )
-        
-        # Imposta l'utente che ha caricato se disponibile
-        if user and hasattr(wagtail_image, "uploaded_by_user"):
-            wagtail_image.uploaded_by_user = user
-        
-        wagtail_image.save()
-        
-        # Aggiungi i tag
-        if tags:
-            for tag in tags:
-                wagtail_image.tags.add(tag)
-        
-        created_images.append(wagtail_image)
+        created_images.append(saved[idx])
     
+    for idx, match in duplicate_of.items():
+        existing = saved[match] if isinstance(match, int) else match
+        link_duplicate(existing, tags)
+        if duplicates is not None:
+            duplicates.append((images[idx].name, existing))
+    
+    enqueue_gallery_renditions(image.pk for image in created_images)
     return created_images
 
 
@@ -134,12 +262,14 @@ class BulkUploadView(View):
             
             # Processa le immagini
             try:
+                duplicates = []
                 created = process_bulk_upload(
                     images=images,
                     title_prefix=title_prefix,
                     tags=tags,
                     collection=collection,
                     user=request.user,
+                    duplicates=duplicates,
                 )
                 
                 # Messaggio di successo
@@ -150,6 +280,18 @@ class BulkUploadView(View):
                     }
                 )
                 
+                # Duplicati non caricati: quale immagine esistente corrisponde
+                if duplicates:
+                    messages.warning(
+                        request,
+                        _("%(count)d immagini già presenti non sono state caricate: %(list)s") % {
+                            "count": len(duplicates),
+                            "list": "; ".join(
+                                f"{name} → {image.title} (#{image.pk})" for name, image in duplicates
+                            ),
+                        }
+                    )
+                
                 # Redirect alla lista immagini
                 return redirect("wagtailimages:index")
                 
@@ -166,6 +308,201 @@ class BulkUploadView(View):
         })
 
 
+def _chunked_error(exc: ChunkedUploadError) -> JsonResponse:
+    return JsonResponse({"success": False, "error": str(exc), **exc.extra}, status=exc.status)
+
+
+@method_decorator(login_required, name="dispatch")
+@method_decorator(
+    permission_required("wagtailimages.add_image", raise_exception=True),
+    name="dispatch"
+)
+class BulkUploadBatchView(View):
+    """
+    API upload a pezzi: crea un batch (apps.core.chunked_upload).
+    
+    Body JSON: ``title_prefix``, ``tags``, ``collection`` come il form e
+    ``files`` = [{"name", "size", "type"}, ...] nell'ordine di selezione.
+    """
+    
+    def post(self, request):
+        try:
+            payload = json.loads(request.body)
+        except ValueError:
+            return JsonResponse({"success": False, "error": "Invalid JSON"}, status=400)
+        
+        form = BulkUploadBatchForm(payload)
+        if not form.is_valid():
+            return JsonResponse({"success": False, "error": form.errors}, status=400)
+        
+        collection = form.cleaned_data.get("collection")
+        try:
+            batch = create_batch(
+                request.user,
+                title_prefix=form.cleaned_data["title_prefix"],
+                tags=form.cleaned_data.get("tags", []),
+                collection_id=collection.pk if collection else None,
+                files=payload.get("files") or [],
+            )
+        except ChunkedUploadError as exc:
+            return _chunked_error(exc)
+        return JsonResponse({"success": True, "data": batch_status(batch)}, status=201)
+
+
+@method_decorator(login_required, name="dispatch")
+@method_decorator(
+    permission_required("wagtailimages.add_image", raise_exception=True),
+    name="dispatch"
+)
+class BulkUploadBatchStatusView(View):
+    """API upload a pezzi: avanzamento del batch, usato anche per riprendere."""
+    
+    def get(self, request, batch_id):
+        try:
+            batch = get_batch(batch_id, request.user)
+        except ChunkedUploadError as exc:
+            return _chunked_error(exc)
+        return JsonResponse({"success": True, "data": batch_status(batch)})
+
+
+@method_decorator(login_required, name="dispatch")
+@method_decorator(
+    permission_required("wagtailimages.add_image", raise_exception=True),
+    name="dispatch"
+)
+class BulkUploadChunkView(View):
+    """
+    API upload a pezzi: riceve un chunk di un file (body grezzo con header
+    ``Content-Range: bytes start-end/total``). L'ultimo chunk ottimizza e
+    salva il file nella stessa richiesta: una sola immagine per volta.
+    """
+    
+    def post(self, request, batch_id, index):
+        try:
+            batch = get_batch(batch_id, request.user)
+            data = request.body
+            start, total = parse_content_range(request.headers.get("Content-Range"), len(data))
+            complete = receive_chunk(batch, index, start, total, data)
+        except ChunkedUploadError as exc:
+            return _chunked_error(exc)
+        
+        if complete:
+            self._save(batch, index, request.user)
+        return JsonResponse({"success": True, "data": batch_status(batch)})
+    
+    def _save(self, batch, index, user):
+        collection = None
+        if batch["collection_id"]:
+            collection = Collection.objects.filter(pk=batch["collection_id"]).first()
+        if collection is None:
+            collection = Collection.get_first_root_node()
+        
+        source = str(part_path(batch, index))
+        try:
+            # Duplicato (anche di un file precedente dello stesso batch, già
+            # salvato e indicizzato): niente ottimizzazione né salvataggio
+            phash = None
+            if get_duplicate_mode() != MODE_UPLOAD:
+                phash = perceptual_hash(source)
+                match = find_duplicates([phash]).get(phash)
+                if match:
+                    link_duplicate(match[0], batch["tags"])
+                    finish_file(batch, index, duplicate_of=match[0])
+                    return
+            optimized = optimize_image_source(
+                source,
+                webp_method=getattr(settings, "BULK_UPLOAD_WEBP_METHOD", WEBP_METHOD),
+            )
+            image = save_bulk_image(
+                optimized, batch["title_prefix"], index, batch["tags"], collection, user, phash=phash
+            )
+        except Exception as e:
+            logger.exception("Errore BulkUpload batch %s file %s: %s", batch["id"], index, e)
+            finish_file(batch, index, error=_("Immagine non valida o non elaborabile."))
+        else:
+            enqueue_gallery_renditions([image.pk])
+            finish_file(batch, index, image_id=image.pk)
+
+
+@method_decorator(login_required, name="dispatch")
+class TranslatorStatusView(View):
+    """
+    Stato dei provider di traduzione automatica (JSON, per monitoraggio):
+    circuit breaker, latenza media e tasso di successo del processo che
+    risponde e di ogni worker che ha pubblicato il proprio stato; lavori
+    della coda di traduzione per stato.
+    """
+    
+    def get(self, request):
+        from apps.core import provider_health, translation_queue
+        
+        return JsonResponse({
+            "success": True,
+            "data": {
+                "pid": os.getpid(),
+                "providers": provider_health.snapshot(),
+                "workers": provider_health.get_published(),
+                "queue": translation_queue.get_counts(),
+            },
+        })
+
+
+@method_decorator(login_required, name="dispatch")
+@method_decorator(
+    permission_required("wagtailimages.change_image", raise_exception=True),
+    name="dispatch"
+)
+class RenditionStatusView(View):
+    """Stato della pre-generazione rendition per le immagini più recenti."""
+    
+    template_name = "wagtailadmin/rendition_status.html"
+    recent_limit = 50
+    
+    def _recent_images(self):
+        specs = get_gallery_filter_specs()
+        images = list(Image.objects.order_by("-created_at")[:self.recent_limit])
+        # Rendition presenti a DB per immagine (una query per tutte)
+        present = dict(
+            Image.get_rendition_model().objects
+            .filter(image__in=images, filter_spec__in=specs)
+            .values("image_id")
+            .annotate(count=Count("filter_spec", distinct=True))
+            .values_list("image_id", "count")
+        )
+        statuses = get_statuses(image.id for image in images)
+        return [
+            {
+                "image": image,
+                "present": present.get(image.id, 0),
+                "missing": len(specs) - present.get(image.id, 0),
+                "status": statuses.get(image.id),
+            }
+            for image in images
+        ], specs
+    
+    def get(self, request):
+        rows, specs = self._recent_images()
+        return render(request, self.template_name, {
+            "rows": rows,
+            "specs": specs,
+            "registry": get_rendition_registry(),
+            "pending": get_pending_count(),
+            "page_title": _("Rendition immagini"),
+        })
+    
+    def post(self, request):
+        """Rimette in coda le immagini recenti con rendition mancanti."""
+        rows, specs = self._recent_images()
+        queued = enqueue_renditions([row["image"].id for row in rows if row["missing"]], specs)
+        messages.success(
+            request,
+            _("%(count)d immagini messe in coda per la generazione delle rendition.") % {
+                "count": queued
+            }
+        )
+        return redirect("rendition_status")
+
+
 @login_required
 @require_GET
 def get_image_metadata(request, image_id):
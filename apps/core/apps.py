@@ -12,6 +12,18 @@ class CoreConfig(AppConfig):
     def ready(self):
         # Registra i receiver del security audit log (V2-019)
         from apps.core import audit  # noqa: F401
+        # Invalidazione dello snapshot di navigazione su publish/snippet save
+        from apps.core import navigation_cache  # noqa: F401
+        # Invalidazione dell'indice traduzioni per il language switcher
+        from apps.core import translation_index  # noqa: F401
+        # Invalidazione del JSON-LD in cache su publish/settings save
+        from apps.core import json_ld_cache  # noqa: F401
+        # Invalidazione dello snapshot Organization su settings/immagini
+        from apps.core import organization_cache  # noqa: F401
+        # Purge della full-page cache su publish/snippet/settings save
+        from apps.core import page_cache  # noqa: F401
+        # Indice degli hash percettivi per le immagini caricate dall'admin
+        from apps.core import image_dedup  # noqa: F401
         # Aggiunge il flag "Forza traduzione di TUTTI i contenuti" al form di
         # update di wagtail-localize.
         from apps.core import localize_patches
@@ -0,0 +1,264 @@
+"""
+MC Castellazzo - Chunked Upload
+===============================
+Caricamento massivo a pezzi e riprendibile: il browser crea un batch con i
+metadati comuni e l'elenco dei file, poi invia ogni file in chunk separati
+(``Content-Range``). Ogni file viene ottimizzato e salvato appena completo,
+quindi nessuna richiesta tiene occupato un worker per tutto il batch e una
+connessione caduta costa al massimo un chunk.
+
+- stato del batch e dei file in cache (condivisa fra i worker), TTL
+  ``BULK_UPLOAD_BATCH_TTL``;
+- byte ricevuti = dimensione del file parziale su disco
+  (``BULK_UPLOAD_CHUNK_DIR``): è la fonte di verità per la ripresa, un
+  chunk con offset diverso viene rifiutato con l'offset corrente;
+- indice del file fissato alla creazione del batch: titoli e filename
+  (-000, -001...) non dipendono dall'ordine di arrivo.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import re
+import shutil
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+
+from apps.core.forms import ALLOWED_IMAGE_TYPES, MAX_IMAGE_FILE_SIZE
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+DEFAULT_BATCH_TTL = 24 * 3600
+MAX_BATCH_FILES = 999  # filename a 3 cifre
+
+STATE_UPLOADING = "uploading"
+STATE_PROCESSING = "processing"
+STATE_DONE = "done"
+STATE_FAILED = "failed"
+STATE_DUPLICATE = "duplicate"  # già presente (apps.core.image_dedup)
+
+_CONTENT_RANGE_RE = re.compile(r"^bytes (\d+)-(\d+)/(\d+)$")
+
+
+class ChunkedUploadError(Exception):
+    """Errore dell'API di upload, con lo status HTTP da restituire."""
+
+    def __init__(self, message: str, status: int = 400, **extra):
+        super().__init__(message)
+        self.status = status
+        self.extra = extra
+
+
+def get_chunk_size() -> int:
+    return getattr(settings, "BULK_UPLOAD_CHUNK_SIZE", DEFAULT_CHUNK_SIZE)
+
+
+def _batch_ttl() -> int:
+    return getattr(settings, "BULK_UPLOAD_BATCH_TTL", DEFAULT_BATCH_TTL)
+
+
+def _upload_root() -> Path:
+    default = Path(tempfile.gettempdir()) / "mccastellazzob-bulk-upload"
+    return Path(getattr(settings, "BULK_UPLOAD_CHUNK_DIR", default))
+
+
+def _batch_key(batch_id: str) -> str:
+    return f"bulk_upload:{batch_id}"
+
+
+def _file_key(batch_id: str, index: int) -> str:
+    return f"bulk_upload:{batch_id}:file:{index}"
+
+
+def part_path(batch: dict, index: int) -> Path:
+    """File parziale (poi completo) del file ``index`` del batch."""
+    return _upload_root() / batch["id"] / f"{index:03d}.part"
+
+
+def _received(batch: dict, index: int) -> int:
+    try:
+        return part_path(batch, index).stat().st_size
+    except FileNotFoundError:
+        return 0
+
+
+def _cleanup_stale_batches() -> None:
+    """Rimuove le cartelle di batch più vecchie del TTL (upload abbandonati)."""
+    root = _upload_root()
+    if not root.is_dir():
+        return
+    cutoff = time.time() - _batch_ttl()
+    for entry in root.iterdir():
+        if entry.is_dir() and entry.stat().st_mtime < cutoff:
+            shutil.rmtree(entry, ignore_errors=True)
+
+
+def create_batch(user, title_prefix: str, tags: list, collection_id, files: list) -> dict:
+    """
+    Crea un batch di upload.
+
+    Args:
+        user: Utente che carica (il batch è visibile solo a lui)
+        title_prefix: Prefisso dei titoli
+        tags: Tag comuni
+        collection_id: Collezione di destinazione (None = root)
+        files: [{"name", "size", "type"}, ...] nell'ordine di selezione
+
+    Returns:
+        Il batch (dict serializzabile)
+    """
+    if not files:
+        raise ChunkedUploadError("Nessun file")
+    if len(files) > MAX_BATCH_FILES:
+        raise ChunkedUploadError(f"Massimo {MAX_BATCH_FILES} file per batch")
+    cleaned = []
+    for item in files:
+        name, size, content_type = str(item.get("name", "")), item.get("size"), item.get("type")
+        if content_type not in ALLOWED_IMAGE_TYPES:
+            raise ChunkedUploadError(f"Formato non supportato: {name}")
+        if not isinstance(size, int) or size <= 0:
+            raise ChunkedUploadError(f"Dimensione non valida: {name}")
+        if size > MAX_IMAGE_FILE_SIZE:
+            raise ChunkedUploadError(f"File troppo grande: {name}", status=413)
+        cleaned.append({"name": name[:255], "size": size, "type": content_type})
+
+    _cleanup_stale_batches()
+    batch = {
+        "id": uuid.uuid4().hex,
+        "user_id": user.pk,
+        "title_prefix": title_prefix,
+        "tags": list(tags),
+        "collection_id": collection_id,
+        "files": cleaned,
+    }
+    (_upload_root() / batch["id"]).mkdir(parents=True, exist_ok=True)
+    cache.set(_batch_key(batch["id"]), batch, _batch_ttl())
+    return batch
+
+
+def get_batch(batch_id: str, user) -> dict:
+    """
+    Batch dell'utente; 410 se scaduto, inesistente o di un altro utente
+    (non 404: LocaleMiddleware lo trasformerebbe in un redirect a /it/...).
+    """
+    batch = cache.get(_batch_key(batch_id))
+    if batch is None or batch["user_id"] != user.pk:
+        raise ChunkedUploadError("Batch non trovato o scaduto", status=410)
+    return batch
+
+
+def get_file_states(batch: dict) -> dict[int, dict]:
+    keys = {_file_key(batch["id"], index): index for index in range(len(batch["files"]))}
+    found = cache.get_many(keys.keys())
+    return {keys[key]: value for key, value in found.items()}
+
+
+def set_file_state(batch: dict, index: int, state: str, **extra) -> None:
+    cache.set(_file_key(batch["id"], index), {"state": state, **extra}, _batch_ttl())
+
+
+def batch_status(batch: dict) -> dict:
+    """Avanzamento del batch: byte ricevuti e stato per file, più i totali."""
+    states = get_file_states(batch)
+    files = []
+    for index, item in enumerate(batch["files"]):
+        state = states.get(index, {"state": STATE_UPLOADING})
+        received = item["size"] if state["state"] != STATE_UPLOADING else _received(batch, index)
+        files.append({"index": index, "name": item["name"], "size": item["size"], "received": received, **state})
+    return {
+        "batch": batch["id"],
+        "chunk_size": get_chunk_size(),
+        "total_bytes": sum(item["size"] for item in files),
+        "received_bytes": sum(item["received"] for item in files),
+        "done": sum(item["state"] == STATE_DONE for item in files),
+        "failed": sum(item["state"] == STATE_FAILED for item in files),
+        "duplicates": sum(item["state"] == STATE_DUPLICATE for item in files),
+        "files": files,
+    }
+
+
+def parse_content_range(header: str | None, length: int) -> tuple[int, int]:
+    """``bytes start-end/total`` → (start, total), coerente con il body."""
+    match = _CONTENT_RANGE_RE.match(header or "")
+    if not match:
+        raise ChunkedUploadError("Content-Range mancante o non valido")
+    start, end, total = (int(value) for value in match.groups())
+    if end - start + 1 != length:
+        raise ChunkedUploadError("Content-Range non coerente con il chunk")
+    return start, total
+
+
+def receive_chunk(batch: dict, index: int, start: int, total: int, data: bytes) -> bool:
+    """
+    Accoda un chunk al file ``index``.
+
+    Il chunk viene accettato solo se ``start`` coincide con i byte già
+    ricevuti (altrimenti 409 con ``received`` per riallinearsi). Quando il
+    file è completo passa in ``processing`` e viene restituito True: il
+    chiamante lo ottimizza e salva (``finish_file``).
+
+    Returns:
+        True se questo chunk ha completato il file
+    """
+    if not 0 <= index < len(batch["files"]):
+        raise ChunkedUploadError("Indice file non valido")
+    size = batch["files"][index]["size"]
+    if total != size:
+        raise ChunkedUploadError("Dimensione diversa da quella dichiarata")
+
+    lock_key = f"{_file_key(batch['id'], index)}:lock"
+    if not cache.add(lock_key, 1, 60):
+        raise ChunkedUploadError("Chunk già in ricezione", status=409, received=_received(batch, index))
+    try:
+        state = get_file_states(batch).get(index, {}).get("state", STATE_UPLOADING)
+        if state != STATE_UPLOADING:
+            # Ritrasmissione dell'ultimo chunk (risposta persa): idempotente
+            return False
+        received = _received(batch, index)
+        if start != received:
+            raise ChunkedUploadError("Offset non valido", status=409, received=received)
+        if start + len(data) > size:
+            raise ChunkedUploadError("Chunk oltre la dimensione del file")
+        path = part_path(batch, index)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "ab") as f:
+            f.write(data)
+        if start + len(data) < size:
+            return False
+        set_file_state(batch, index, STATE_PROCESSING)
+        return True
+    finally:
+        cache.delete(lock_key)
+
+
+def finish_file(
+    batch: dict,
+    index: int,
+    image_id: int | None = None,
+    error: str | None = None,
+    duplicate_of=None,
+) -> None:
+    """Registra l'esito del file completo e ne elimina i byte temporanei."""
+    if error is not None:
+        set_file_state(batch, index, STATE_FAILED, error=str(error))
+    elif duplicate_of is not None:
+        set_file_state(
+            batch, index, STATE_DUPLICATE,
+            image_id=duplicate_of.pk, duplicate_title=duplicate_of.title,
+        )
+    else:
+        set_file_state(batch, index, STATE_DONE, image_id=image_id)
+    try:
+        os.remove(part_path(batch, index))
+    except FileNotFoundError:
+        pass
+    states = get_file_states(batch)
+    finished = (STATE_DONE, STATE_FAILED, STATE_DUPLICATE)
+    if all(states.get(i, {}).get("state") in finished for i in range(len(batch["files"]))):
+        shutil.rmtree(_upload_root() / batch["id"], ignore_errors=True)
@@ -37,9 +37,11 @@ def _run_archive_in_background():
         # Esecuzione reale: il default del servizio è dry_run=True (safe-by-default).
         result = archive_past_events(dry_run=False)
         logger.info(
-            "DailyTasks[%s] done: moved=%s candidates=%s already_archived=%s no_archive=%s",
+            "DailyTasks[%s] done: moved=%s candidates=%s already_archived=%s no_archive=%s "
+            "batches=%s select=%.3fs move=%.3fs",
             _TASK_NAME, result.moved, result.candidates,
             result.skipped_already_archived, result.skipped_no_archive,
+            result.batches, result.select_seconds, result.move_seconds,
         )
     except Exception:  # noqa: BLE001
         logger.exception("DailyTasks[%s] failed", _TASK_NAME)
@@ -9,6 +9,15 @@ from django.utils.translation import gettext_lazy as _
 from taggit.forms import TagField
 from wagtail.models import Collection
 
+ALLOWED_IMAGE_TYPES = (
+    "image/jpeg",
+    "image/png",
+    "image/gif",
+    "image/webp",
+)
+
+MAX_IMAGE_FILE_SIZE = 10 * 1024 * 1024  # 10 MB per file
+
 
 class MultipleFileInput(forms.ClearableFileInput):
     """Widget per upload multiplo di file."""
@@ -29,15 +38,15 @@ class MultipleFileField(forms.FileField):
         return [single_file_clean(data, initial)]
 
 
-class BulkUploadForm(forms.Form):
+class BulkUploadBatchForm(forms.Form):
     """
-    Form per il caricamento massivo di immagini.
+    Metadati comuni di un caricamento massivo (usato anche dall'upload a
+    pezzi, dove i file arrivano in richieste separate).
     
     Campi:
     - title_prefix: Prefisso comune per i titoli (es. "Raduno 2026")
     - tags: Tag comuni da applicare a tutte le immagini
     - collection: Collezione Wagtail dove salvare
-    - images: File immagini da caricare
     """
     
     title_prefix = forms.CharField(
@@ -78,6 +87,15 @@ class BulkUploadForm(forms.Form):
             "class": "w-field__input"
         })
     )
+
+
+class BulkUploadForm(BulkUploadBatchForm):
+    """
+    Form per il caricamento massivo di immagini.
+    
+    Campi: quelli di ``BulkUploadBatchForm`` più
+    - images: File immagini da caricare
+    """
     
     images = MultipleFileField(
         label=_("Immagini"),
@@ -99,24 +117,15 @@ class BulkUploadForm(forms.Form):
         """Valida i file immagine."""
         images = self.cleaned_data.get("images", [])
         
-        allowed_types = [
-            "image/jpeg",
-            "image/png",
-            "image/gif",
-            "image/webp",
-        ]
-        
-        MAX_FILE_SIZE = 10 * 1024 * 1024  # 10 MB per file
-
         for image in images:
             if hasattr(image, "content_type"):
-                if image.content_type not in allowed_types:
+                if image.content_type not in ALLOWED_IMAGE_TYPES:
                     raise forms.ValidationError(
                         _("Formato non supportato: %(name)s. "
                           "Usa JPG, PNG, GIF o WebP."),
                         params={"name": image.name}
                     )
-            if hasattr(image, "size") and image.size > MAX_FILE_SIZE:
+            if hasattr(image, "size") and image.size > MAX_IMAGE_FILE_SIZE:
                 raise forms.ValidationError(
                     _("File troppo grande: %(name)s (max 10 MB)."),
                     params={"name": image.name},
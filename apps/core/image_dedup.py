@@ -0,0 +1,170 @@
+"""
+MC Castellazzo - Image Dedup
+============================
+Rilevamento dei quasi-duplicati tramite hash percettivo (pHash a 64 bit,
+``apps.core.image_optimizer.perceptual_hash``) salvato in ``ImageHash``.
+
+- ricerca: le 8 bande da 8 bit sono indicizzate; per il principio dei
+  cassetti due hash a distanza di Hamming <= 7 hanno almeno una banda
+  uguale, quindi una query con ``bandN__in`` (solo id e hash) trova tutti i
+  candidati e la distanza esatta si verifica in Python, per ogni candidato
+  solo con gli hash che hanno una sua banda. Su foto reali il WebP ottimizzato
+  dista 0-2 dall'originale, una copia ridotta e ricompressa fino a 4, foto
+  diverse 20 o più: soglia di default ``IMAGE_DUPLICATE_MAX_DISTANCE = 6``;
+- ``BULK_UPLOAD_DUPLICATES``: ``"link"`` (default) non ricarica il duplicato
+  e aggiunge i tag del caricamento all'immagine esistente, ``"skip"`` lo
+  salta e basta, ``"upload"`` disattiva il controllo;
+- il bulk upload passa all'immagine l'hash già calcolato (``_phash``),
+  salvato dal post_save; le immagini caricate altrove vengono indicizzate
+  dopo il commit; per quelle già presenti: ``manage.py index_image_hashes``.
+"""
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from wagtail.images import get_image_model
+
+from apps.core.image_optimizer import perceptual_hash
+from apps.core.models import ImageHash
+
+logger = logging.getLogger(__name__)
+
+BANDS = 8
+BAND_BITS = 8
+# Massima distanza garantita dall'indice a bande (BANDS - 1)
+MAX_DISTANCE = BANDS - 1
+DEFAULT_DISTANCE = 6
+
+MODE_LINK = "link"
+MODE_SKIP = "skip"
+MODE_UPLOAD = "upload"
+
+_SIGN_BIT = 1 << 63
+
+
+def get_duplicate_mode() -> str:
+    return getattr(settings, "BULK_UPLOAD_DUPLICATES", MODE_LINK)
+
+
+def get_max_distance() -> int:
+    return min(getattr(settings, "IMAGE_DUPLICATE_MAX_DISTANCE", DEFAULT_DISTANCE), MAX_DISTANCE)
+
+
+def bands(phash: int) -> list[int]:
+    """Le bande da ``BAND_BITS`` bit di un hash senza segno."""
+    mask = (1 << BAND_BITS) - 1
+    return [(phash >> (BAND_BITS * n)) & mask for n in range(BANDS)]
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def _to_signed(phash: int) -> int:
+    """BigIntegerField è con segno: stessi 64 bit, complemento a due."""
+    return phash - (1 << 64) if phash & _SIGN_BIT else phash
+
+
+def _to_unsigned(value: int) -> int:
+    return value & ((1 << 64) - 1)
+
+
+def store_hash(image, phash: int) -> ImageHash:
+    values = dict(zip((f"band{n}" for n in range(BANDS)), bands(phash), strict=True))
+    record, _created = ImageHash.objects.update_or_create(
+        image=image, defaults={"phash": _to_signed(phash), **values}
+    )
+    return record
+
+
+def find_duplicates(hashes, max_distance: int | None = None) -> dict[int, tuple]:
+    """
+    Immagini esistenti simili agli hash dati: una query sull'indice (solo id
+    e hash) e una per le immagini trovate.
+
+    Returns:
+        {hash: (Image, distanza)} con l'immagine più vicina per ogni hash
+        che ne ha una entro ``max_distance``.
+    """
+    hashes = {h for h in hashes if h is not None}
+    if not hashes:
+        return {}
+    max_distance = get_max_distance() if max_distance is None else min(max_distance, MAX_DISTANCE)
+
+    # Per banda: valore → hash cercati con quel valore
+    by_band = [defaultdict(list) for _ in range(BANDS)]
+    for phash in hashes:
+        for n, value in enumerate(bands(phash)):
+            by_band[n][value].append(phash)
+    query = Q()
+    for n, by_value in enumerate(by_band):
+        query |= Q(**{f"band{n}__in": list(by_value)})
+    candidates = ImageHash.objects.filter(query).order_by("image_id").values_list("image_id", "phash")
+
+    closest = {}
+    for image_id, stored in candidates:
+        existing = _to_unsigned(stored)
+        # Gli hash senza bande in comune distano più di MAX_DISTANCE
+        sharing = {
+            phash for n, value in enumerate(bands(existing)) for phash in by_band[n].get(value, ())
+        }
+        for phash in sharing:
+            distance = hamming(phash, existing)
+            if distance <= max_distance and (phash not in closest or distance < closest[phash][1]):
+                closest[phash] = (image_id, distance)
+
+    images = get_image_model().objects.in_bulk({image_id for image_id, _distance in closest.values()})
+    return {
+        phash: (images[image_id], distance)
+        for phash, (image_id, distance) in closest.items()
+        if image_id in images
+    }
+
+
+def find_duplicate(phash: int, max_distance: int | None = None):
+    """Immagine esistente più simile a ``phash`` (o None)."""
+    match = find_duplicates([phash], max_distance).get(phash)
+    return match[0] if match else None
+
+
+def link_duplicate(image, tags) -> None:
+    """Modalità ``link``: i tag del caricamento vanno sull'immagine esistente."""
+    if get_duplicate_mode() == MODE_LINK and tags:
+        image.tags.add(*tags)
+
+
+def index_image(image_id: int) -> None:
+    """Calcola e salva l'hash di un'immagine già salvata (se manca)."""
+    if ImageHash.objects.filter(image_id=image_id).exists():
+        return
+    image = get_image_model().objects.filter(pk=image_id).first()
+    if image is None:
+        return
+    try:
+        with image.open_file() as f:
+            phash = perceptual_hash(f.read())
+    except Exception:  # noqa: BLE001 - file mancante o non leggibile
+        logger.warning("ImageHash: impossibile calcolare l'hash dell'immagine %s", image_id, exc_info=True)
+        return
+    store_hash(image, phash)
+
+
+# Bulk upload: l'hash già calcolato arriva in ``instance._phash`` e viene
+# salvato subito; le immagini caricate dall'admin Wagtail vengono
+# indicizzate dopo il commit
+@receiver(post_save, sender=get_image_model())
+def index_new_image(sender, instance, created, raw=False, **kwargs):
+    if not created or raw:
+        return
+    phash = getattr(instance, "_phash", None)
+    if phash is not None:
+        store_hash(instance, phash)
+    else:
+        transaction.on_commit(partial(index_image, instance.pk))
@@ -5,12 +5,23 @@ Ottimizzazione automatica immagini per bulk upload.
 
 Funzionalità:
 - Ridimensionamento a max 1280px (lato lungo)
-- Conversione in WebP con qualità 85%
+- Conversione in WebP con qualità 85% (effort encoder configurabile)
+- Decodifica JPEG a risoluzione ridotta (``draft()``) quando basta
 - Generazione nomi file puliti con numeri sequenziali
+- Ottimizzazione in parallelo su un pool di processi (``optimize_images``)
+- Hash percettivo per i duplicati (``perceptual_hash``, apps.core.image_dedup)
 """
 
 import io
+import logging
+import math
+import multiprocessing
+import os
 import re
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from unicodedata import normalize
 
 from PIL import Image
@@ -19,26 +30,86 @@ from PIL import Image
 # Configurazioni
 MAX_DIMENSION = 1280
 WEBP_QUALITY = 85
+# Effort dell'encoder WebP (0-6): 6 = file più piccoli, più CPU
+WEBP_METHOD = 6
+# Decodifica/riduzione rapida mai sotto 1.5x la dimensione finale: il LANCZOS
+# finale ha ancora margine per l'antialiasing (PSNR > 40 dB rispetto alla
+# decodifica completa, vedi benchmark_image_optimizer)
+REDUCING_GAP = 1.5
 MAX_FILENAME_LENGTH = 100
+# Hash percettivo: HASH_SIZE² = 64 bit dalle basse frequenze di una DCT 32x32
+HASH_SIZE = 8
+_DCT_SIZE = 32
+_DCT_COS = [
+    [math.cos(math.pi * (2 * x + 1) * u / (2 * _DCT_SIZE)) for x in range(_DCT_SIZE)]
+    for u in range(HASH_SIZE)
+]
 
 # V2-008: Protezione decompression bomb — Pillow alzerà DecompressionBombError
 # per immagini che si espandono oltre questa soglia (~50 megapixel)
 Image.MAX_IMAGE_PIXELS = 50_000_000
 
+logger = logging.getLogger(__name__)
 
-def optimize_image(image_buffer: io.BytesIO) -> io.BytesIO:
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _target_size(width: int, height: int) -> tuple[int, int]:
+    """Dimensioni finali con il lato lungo a ``MAX_DIMENSION``."""
+    if width >= height:
+        # Landscape: larghezza è il lato più lungo
+        return MAX_DIMENSION, int(height * (MAX_DIMENSION / width))
+    # Portrait: altezza è il lato più lungo
+    return int(width * (MAX_DIMENSION / height)), MAX_DIMENSION
+
+
+def open_for_resize(image_buffer: io.BytesIO, fast_decode: bool = True):
+    """
+    Apre l'immagine e calcola la dimensione finale dall'header.
+    
+    Con ``fast_decode`` i JPEG da ridurre vengono impostati per la
+    decodifica a scala ridotta (``draft()``), mai sotto ``REDUCING_GAP``
+    volte il target; ``img.size`` riflette già la risoluzione decodificata.
+    
+    Returns:
+        Tuple con (immagine non ancora decodificata, dimensioni finali)
+    """
+    image_buffer.seek(0)
+    img = Image.open(image_buffer)
+    
+    original_width, original_height = img.size
+    if original_width <= MAX_DIMENSION and original_height <= MAX_DIMENSION:
+        return img, img.size
+    
+    target_size = _target_size(original_width, original_height)
+    if fast_decode and img.format == "JPEG":
+        img.draft(None, (int(target_size[0] * REDUCING_GAP), int(target_size[1] * REDUCING_GAP)))
+    return img, target_size
+
+
+def optimize_image(
+    image_buffer: io.BytesIO,
+    webp_method: int = WEBP_METHOD,
+    fast_decode: bool = True,
+) -> io.BytesIO:
     """
     Ottimizza un'immagine ridimensionando e convertendo in WebP.
     
+    Con ``fast_decode`` i JPEG vengono decodificati già ridotti (scala DCT
+    1/2, 1/4, 1/8) e gli altri formati passano da ``reduce()`` prima del
+    LANCZOS: una foto da 24 MP non viene decodificata a piena risoluzione.
+    
     Args:
         image_buffer: Buffer contenente l'immagine originale
+        webp_method: Effort dell'encoder WebP (0 = veloce, 6 = file più piccoli)
+        fast_decode: False per il percorso a piena risoluzione (confronti)
         
     Returns:
         Buffer contenente l'immagine ottimizzata in formato WebP
     """
-    # Apri l'immagine
-    image_buffer.seek(0)
-    img = Image.open(image_buffer)
+    img, target_size = open_for_resize(image_buffer, fast_decode)
     
     # Converti in RGB se necessario (per PNG con trasparenza, RGBA)
     if img.mode in ("RGBA", "P"):
@@ -52,31 +123,164 @@ def optimize_image(image_buffer: io.BytesIO) -> io.BytesIO:
     elif img.mode != "RGB":
         img = img.convert("RGB")
     
-    # Calcola nuove dimensioni mantenendo l'aspect ratio
-    original_width, original_height = img.size
-    
-    if original_width > MAX_DIMENSION or original_height > MAX_DIMENSION:
-        # Trova il lato più lungo
-        if original_width >= original_height:
-            # Landscape: larghezza è il lato più lungo
-            new_width = MAX_DIMENSION
-            new_height = int(original_height * (MAX_DIMENSION / original_width))
-        else:
-            # Portrait: altezza è il lato più lungo
-            new_height = MAX_DIMENSION
-            new_width = int(original_width * (MAX_DIMENSION / original_height))
-        
-        # Ridimensiona con antialiasing di alta qualità
-        img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+    if target_size != img.size:
+        # Ridimensiona con antialiasing di alta qualità; reducing_gap fa
+        # prima un reduce() intero (box) dove l'immagine è molto più grande
+        img = img.resize(
+            target_size,
+            Image.Resampling.LANCZOS,
+            reducing_gap=REDUCING_GAP if fast_decode else None,
+        )
     
     # Salva in WebP
     output_buffer = io.BytesIO()
-    img.save(output_buffer, format="WEBP", quality=WEBP_QUALITY, method=6)
+    img.save(output_buffer, format="WEBP", quality=WEBP_QUALITY, method=webp_method)
     output_buffer.seek(0)
     
     return output_buffer
 
 
+def optimize_image_source(source, webp_method: int = WEBP_METHOD) -> bytes:
+    """
+    Job del pool: ottimizza un'immagine da path su disco o da bytes.
+
+    Con un path il file viene letto dal processo worker, così i byte
+    originali non passano dalla pipe (upload grandi = TemporaryUploadedFile).
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            return optimize_image(io.BytesIO(f.read()), webp_method).getvalue()
+    return optimize_image(io.BytesIO(source), webp_method).getvalue()
+
+
+def available_cpus() -> int:
+    """Core utilizzabili dal processo (rispetta affinity/cgroup cpuset)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            # spawn: il processo Django ha già thread (rendition, DB), il
+            # fork non è sicuro; i worker importano solo Pillow
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            _pool_workers = workers
+        return _pool
+
+
+def _reset_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def perceptual_hash(source) -> int:
+    """
+    pHash a 64 bit (senza segno) di un'immagine da path o bytes.
+
+    Miniatura 32x32 in scala di grigi, DCT 2D e confronto dei coefficienti
+    8x8 a bassa frequenza con la loro mediana: resiste a ridimensionamento
+    e ricompressione, quindi l'originale caricato e il WebP ottimizzato
+    danno (quasi) lo stesso hash. I JPEG vengono decodificati a scala
+    ridotta (``draft()``): costa una frazione dell'ottimizzazione.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        img = Image.open(source)
+    else:
+        img = Image.open(io.BytesIO(source))
+    with img:
+        img.draft("L", (_DCT_SIZE * 2, _DCT_SIZE * 2))
+        pixels = list(img.convert("L").resize((_DCT_SIZE, _DCT_SIZE), Image.Resampling.BOX).getdata())
+
+    # DCT separabile, solo le prime HASH_SIZE frequenze per asse
+    rows = [
+        [sum(pixels[y * _DCT_SIZE + x] * _DCT_COS[u][x] for x in range(_DCT_SIZE)) for u in range(HASH_SIZE)]
+        for y in range(_DCT_SIZE)
+    ]
+    coefficients = [
+        sum(rows[y][u] * _DCT_COS[v][y] for y in range(_DCT_SIZE))
+        for v in range(HASH_SIZE)
+        for u in range(HASH_SIZE)
+    ]
+    # Mediana senza la componente continua (luminosità media)
+    median = sorted(coefficients[1:])[len(coefficients[1:]) // 2]
+    value = 0
+    for coefficient in coefficients:
+        value = (value << 1) | (coefficient > median)
+    return value
+
+
+def _map_ordered(fn, sources, workers: int, max_in_flight: int | None, *args):
+    """``fn(source, *args)`` su ogni sorgente, in ordine, sul pool se ``workers > 1``."""
+    if workers <= 1:
+        for source in sources:
+            yield fn(source, *args)
+        return
+
+    max_in_flight = max(1, max_in_flight or 2 * workers)
+    pool = _get_pool(workers)
+    pending = deque()
+    sources = iter(sources)
+    try:
+        while True:
+            # Riempie la finestra, poi consuma sempre il più vecchio: l'ordine
+            # dei risultati (e dei filename -000, -001...) resta deterministico
+            for source in sources:
+                pending.append(pool.submit(fn, source, *args))
+                if len(pending) >= max_in_flight:
+                    break
+            if not pending:
+                return
+            yield pending.popleft().result()
+    except BrokenProcessPool:
+        # Worker terminato (es. OOM killer): il prossimo upload ricrea il pool
+        logger.error("Pool ottimizzazione immagini interrotto, verrà ricreato")
+        _reset_pool()
+        raise
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def optimize_images(
+    sources,
+    workers: int = 1,
+    max_in_flight: int | None = None,
+    webp_method: int = WEBP_METHOD,
+):
+    """
+    Ottimizza più immagini, restituendo i bytes WebP nello stesso ordine.
+
+    Args:
+        sources: iterabile di path o bytes (consumato in modo lazy)
+        workers: processi del pool; ``<= 1`` ottimizza nel processo corrente
+        max_in_flight: immagini inviate al pool e non ancora restituite
+            (default ``2 * workers``); limita la RSS di picco, perché oltre
+            questa soglia le sorgenti successive non vengono nemmeno lette
+        webp_method: effort dell'encoder WebP (vedi ``optimize_image``)
+
+    Yields:
+        Bytes dell'immagine ottimizzata, in ordine di ``sources``.
+    """
+    return _map_ordered(optimize_image_source, sources, workers, max_in_flight, webp_method)
+
+
+def perceptual_hashes(sources, workers: int = 1, max_in_flight: int | None = None):
+    """Come ``optimize_images`` ma calcola solo ``perceptual_hash``."""
+    return _map_ordered(perceptual_hash, sources, workers, max_in_flight)
+
+
 def slugify_title(title: str) -> str:
     """
     Converte un titolo in slug URL-safe.
@@ -0,0 +1,120 @@
+"""
+MC Castellazzo - JSON-LD Cache
+==============================
+Cache del JSON-LD serializzato di ``JsonLdMixin.get_json_ld``.
+
+Generare il JSON-LD costa: ``get_organization_data`` (SeoSettings,
+SiteSettings, rendition di logo e immagine), ``full_url`` delle pagine
+collegate, ``clean_html`` e ``json.dumps(indent=2)``. Il risultato cambia
+solo quando un editor pubblica o modifica i settings, quindi viene salvato
+nella cache condivisa con chiave:
+
+    json_ld:<generazione>:<page_id>:<live_revision_id>:<locale_id>[:<vary>]
+
+- ``generazione``: token rigenerato su publish/unpublish/spostamento/
+  cancellazione di pagine e su save dei settings (SeoSettings,
+  SiteSettings...). Cambiare token invalida tutte le entry in O(1): le
+  vecchie scadono da sole col TTL. Serve anche per le pagine "lista", il
+  cui JSON-LD dipende dai figli e non dalla propria revisione.
+- ``vary``: input dipendenti dalla richiesta dichiarati dalla pagina con
+  ``json_ld_vary_on_date`` (data odierna, es. eventi dell'anno corrente) e
+  ``json_ld_vary_on_params`` (parametri GET, es. ``?q=`` e ``?tag=``).
+
+Anteprime e pagine non pubblicate non vengono mai messe in cache (il
+contenuto di un'anteprima non corrisponde alla revisione live).
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import uuid
+from datetime import date
+
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from wagtail.contrib.settings.models import BaseGenericSetting, BaseSiteSetting
+from wagtail.models import Page, Site
+from wagtail.signals import page_published, page_unpublished, post_page_move
+
+logger = logging.getLogger(__name__)
+
+_CACHE_KEY_PREFIX = "json_ld"
+_GENERATION_KEY = "json_ld:generation"
+# Rete di sicurezza: anche senza segnali il JSON-LD non vive oltre 24h
+_JSON_LD_TTL_SECONDS = 24 * 3600
+
+
+def _generation() -> str:
+    return cache.get_or_set(_GENERATION_KEY, lambda: uuid.uuid4().hex, timeout=None)
+
+
+def _vary_suffix(page, request) -> str:
+    parts = []
+    if getattr(page, "json_ld_vary_on_date", False):
+        parts.append(date.today().isoformat())
+    params = getattr(page, "json_ld_vary_on_params", ())
+    if params and request is not None:
+        parts.extend(f"{name}={request.GET.get(name, '').strip()}" for name in params)
+    if not parts:
+        return ""
+    return hashlib.md5("&".join(parts).encode(), usedforsecurity=False).hexdigest()
+
+
+def json_ld_cache_key(page, request=None) -> str | None:
+    """
+    Chiave di cache del JSON-LD di ``page``, o None se non va messo in cache
+    (anteprima o pagina non pubblicata).
+    """
+    if request is not None and getattr(request, "is_preview", False):
+        return None
+    if not page.live:
+        return None
+    key = f"{_CACHE_KEY_PREFIX}:{_generation()}:{page.pk}:{page.live_revision_id}:{page.locale_id}"
+    suffix = _vary_suffix(page, request)
+    return f"{key}:{suffix}" if suffix else key
+
+
+def get_cached_json_ld(page, request, build) -> str:
+    """
+    JSON-LD dalla cache condivisa; ``build()`` viene chiamato solo su miss.
+    """
+    key = json_ld_cache_key(page, request)
+    if key is None:
+        return build()
+    json_ld = cache.get(key)
+    if json_ld is None:
+        json_ld = build()
+        cache.set(key, json_ld, timeout=_JSON_LD_TTL_SECONDS)
+    return json_ld
+
+
+def invalidate_json_ld_cache() -> None:
+    """Invalida il JSON-LD di tutte le pagine (nuovo token di generazione)."""
+    cache.set(_GENERATION_KEY, uuid.uuid4().hex, timeout=None)
+    logger.debug("JSON-LD cache invalidated")
+
+
+# ---------------------------------------------------------------------------
+# Signal receivers
+# ---------------------------------------------------------------------------
+
+@receiver(page_published)
+@receiver(page_unpublished)
+@receiver(post_page_move)
+def _on_page_tree_change(sender, instance, **kwargs):
+    invalidate_json_ld_cache()
+
+
+@receiver(post_delete, sender=Page)
+@receiver(post_save, sender=Site)
+def _on_page_delete_or_site_change(sender, instance, **kwargs):
+    invalidate_json_ld_cache()
+
+
+@receiver(post_save)
+def _on_settings_save(sender, instance, created=False, **kwargs):
+    # La creazione (``for_site()`` al primo accesso, valori di default) non
+    # cambia nulla di già generato: invalida solo sulle modifiche
+    if not created and issubclass(sender, (BaseSiteSetting, BaseGenericSetting)):
+        invalidate_json_ld_cache()
@@ -6,16 +6,47 @@ Prova i provider configurati in ordine: se uno va in timeout o fallisce,
 passa al successivo. Ogni chiamata HTTP ha un timeout fisso per evitare
 che i worker Gunicorn vengano uccisi.
 
+Le chiamate HTTP girano su un pool di thread a lunga vita, con client e
+sessioni keep-alive riutilizzati (apps.core.translator_pool).
+
 Provider supportati: 'google', 'mymemory', 'deepl'
 Default: ['google', 'mymemory'] — Google primo (più veloce), poi MyMemory.
 
+HTML: ogni blocco (testo e tag inline come ``<a>``, ``<b>``, ``<em>`` fra due
+tag di blocco) è un solo segmento, con i tag inline sostituiti da segnaposto
+(``[1]…[/1]``, ``[2/]``) e rimessi dopo la traduzione: il provider vede la
+frase intera. Se i segnaposto non tornano tutti e ben annidati, quel blocco
+viene ritradotto nodo di testo per nodo di testo.
+
+Modalità batch (default): i segmenti di tutte le stringhe (testi semplici e
+blocchi dell'HTML) vengono deduplicati e impacchettati in poche
+richieste, uniti da ``SEGMENT_SEPARATOR`` entro il limite di caratteri del
+provider (``BATCH_MAX_CHARS``). Se la risposta non si divide esattamente
+nello stesso numero di segmenti, o la richiesta fallisce, quel pacchetto
+viene tradotto segmento per segmento come prima.
+
+Rate limiting: un token bucket per provider (``RATE_LIMITS``, richieste al
+secondo) al posto delle pause fisse; più lingue destinazione vengono
+tradotte in parallelo (``_translate_many_locales``) entro quel budget.
+
+Circuit breaker (apps.core.provider_health): un provider che fallisce o va
+in timeout più volte di fila viene saltato per un po' e poi riprovato con
+una sola richiesta; l'ordine dei provider segue latenza e tasso di successo
+osservati (``PROVIDERS`` resta l'ordine a parità). Stato in
+``/admin/translator-status/``.
+
+Memoria di traduzione (apps.core.translation_memory): i testi vengono
+divisi in frasi e quelle già tradotte (LRU in-process, poi DB) non vanno in
+rete; le nuove traduzioni riuscite vengono memorizzate con il provider.
+
 Configurazione in settings.py:
     WAGTAILLOCALIZE_MACHINE_TRANSLATOR = {
         'CLASS': 'apps.core.machine_translator.DeepTranslatorMachineTranslator',
         'OPTIONS': {
-            'DELAY': 0.3,
+            'RATE_LIMITS': {'google': 5, 'mymemory': 2},
             'HTTP_TIMEOUT': 8,
             'PROVIDERS': ['google', 'mymemory'],
+            'BATCH': True,
         }
     }
 
@@ -27,11 +58,14 @@ import concurrent.futures
 import logging
 import re
 import time
+from functools import partial
 from html.parser import HTMLParser
 
 from wagtail_localize.machine_translators.base import BaseMachineTranslator
 from wagtail_localize.strings import StringValue
 
+from apps.core import provider_health, translation_memory, translator_pool
+
 logger = logging.getLogger(__name__)
 
 
@@ -53,6 +87,43 @@ LANGUAGE_MAP_ISO = {
     "es": "es",
 }
 
+# Separatore fra i segmenti impacchettati in una richiesta: un simbolo su
+# riga propria, che i provider lasciano invariato e non compare nei contenuti
+SEGMENT_SEPARATOR = "\n\u2016\n"
+_SEPARATOR_RE = re.compile(r"\s*\u2016\s*")
+
+# Caratteri massimi per richiesta (limiti di deep-translator: Google 5000,
+# MyMemory 500), con margine per i separatori
+BATCH_MAX_CHARS = {
+    "google": 4500,
+    "mymemory": 450,
+    "deepl": 4500,
+}
+# Richieste al secondo sostenibili per provider (token bucket per processo,
+# con burst di un secondo): le lingue tradotte in parallelo le condividono
+RATE_LIMITS = {
+    "google": 5,
+    "mymemory": 2,
+    "deepl": 10,
+}
+
+# Segmenti massimi per richiesta: un pacchetto fallito costa al massimo
+# questo numero di traduzioni singole
+BATCH_MAX_SEGMENTS = 40
+
+# Fine frase: punteggiatura, spazi, poi maiuscola, cifra o apertura di citazione
+_SENTENCE_BREAK_RE = re.compile(r"(?<=[.!?\u2026])(\s+)(?=[\"'«“(\[]?[A-ZÀ-ÖØ-Þ0-9])")
+
+# Tag inline: restano dentro il segmento del blocco come segnaposto
+INLINE_TAGS = frozenset({
+    "a", "abbr", "b", "bdi", "bdo", "br", "cite", "code", "data", "dfn", "em", "i",
+    "kbd", "mark", "q", "s", "samp", "small", "span", "strong", "sub", "sup",
+    "time", "u", "var", "wbr",
+})
+VOID_INLINE_TAGS = frozenset({"br", "wbr"})
+_PLACEHOLDER_RE = re.compile(r"\[(/?)(\d+)(/?)\]")
+_TAG_NAME_RE = re.compile(r"^</?([a-zA-Z][a-zA-Z0-9]*)")
+
 LANGUAGE_MAP_SIMPLE = {
     "it": "italian",
     "en": "english",
@@ -124,13 +195,20 @@ class DeepTranslatorMachineTranslator(BaseMachineTranslator):
     def __init__(self, options=None):
         super().__init__(options)
         opts = options or {}
-        self.delay = opts.get("DELAY", 0.3)
+        # Richieste al secondo per provider (token bucket); 0/None = nessun limite
+        self.rate_limits = {**RATE_LIMITS, **opts.get("RATE_LIMITS", {})}
         self.http_timeout = opts.get("HTTP_TIMEOUT", 8)
         # Lista provider in ordine di priorità
         self.providers = opts.get("PROVIDERS", ["google", "mymemory"])
         # Opzioni specifiche provider
         self.mymemory_email = opts.get("MYMEMORY_EMAIL", None)
         self.deepl_api_key = opts.get("DEEPL_API_KEY", "")
+        # Modalità batch: più segmenti per richiesta HTTP
+        self.batch = opts.get("BATCH", True)
+        self.batch_max_chars = opts.get("BATCH_MAX_CHARS", None)
+        self.batch_max_segments = opts.get("BATCH_MAX_SEGMENTS", BATCH_MAX_SEGMENTS)
+        # Memoria di traduzione condivisa (apps.core.translation_memory)
+        self.memory = opts.get("MEMORY", True)
 
     # ------------------------------------------------------------------
     # Creazione istanze traduttori
@@ -168,39 +246,61 @@ class DeepTranslatorMachineTranslator(BaseMachineTranslator):
     # Traduzione con timeout + fallback
     # ------------------------------------------------------------------
 
-    def _call_translate(self, translator, text):
-        """Chiama translator.translate() in un thread separato con timeout."""
-        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
-            future = executor.submit(translator.translate, text.strip())
-            return future.result(timeout=self.http_timeout)
-
     def _translate_with_provider(self, text, source_lang, target_lang, provider):
-        """Tenta la traduzione con un singolo provider. Rilancia eccezioni."""
-        translator = self._make_translator(provider, source_lang, target_lang)
-        return self._call_translate(translator, text)
+        """
+        Tenta la traduzione con un singolo provider. Rilancia eccezioni.
 
-    def _translate_text(self, text, source_lang, target_lang):
+        Attende prima un token dal bucket del provider (``RATE_LIMITS``),
+        poi la chiamata gira sul pool di thread del processo, con client e
+        sessione HTTP keep-alive riutilizzati per provider e coppia di
+        lingue (apps.core.translator_pool). L'attesa del token non conta
+        nel timeout HTTP.
+
+        Esito e latenza alimentano il circuit breaker del provider
+        (apps.core.provider_health): con il breaker aperto la chiamata non
+        parte e viene sollevato ``ProviderUnavailable``.
         """
-        Traduce un singolo testo provando i provider in ordine.
-        Restituisce il testo originale se tutti i provider falliscono.
+        key = (provider, source_lang, target_lang, self.mymemory_email, self.deepl_api_key)
+        provider_health.acquire(provider)
+        translator_pool.throttle(provider, self.rate_limits.get(provider))
+        start = time.monotonic()
+        try:
+            result = translator_pool.call(
+                key,
+                partial(self._make_translator, provider, source_lang, target_lang),
+                text.strip(),
+                self.http_timeout,
+            )
+        except concurrent.futures.TimeoutError:
+            provider_health.record_failure(provider, f"timeout ({self.http_timeout}s)")
+            raise
+        except Exception as e:
+            provider_health.record_failure(provider, f"{type(e).__name__}: {e}")
+            raise
+        provider_health.record_success(provider, time.monotonic() - start)
+        return result
+
+    def _provider_order(self):
+        """Provider con breaker non aperto, dal più rapido e affidabile."""
+        return provider_health.order(self.providers, self.http_timeout)
+
+    def _translate_single(self, text, source_lang, target_lang):
         """
-        if not text or not text.strip():
-            return text
-
-        leading = len(text) - len(text.lstrip())
-        trailing = len(text) - len(text.rstrip())
+        Traduce un singolo testo provando i provider in ordine.
 
-        for provider in self.providers:
+        Returns:
+            (traduzione, provider), oppure (testo originale, None) se tutti
+            i provider falliscono.
+        """
+        for provider in self._provider_order():
             try:
                 result = self._translate_with_provider(
                     text, source_lang, target_lang, provider
                 )
                 if result and result.strip():
-                    if leading:
-                        result = " " * leading + result
-                    if trailing:
-                        result = result + " " * trailing
-                    return result
+                    return _restore_whitespace(text, result), provider
+            except provider_health.ProviderUnavailable:
+                continue
             except concurrent.futures.TimeoutError:
                 logger.warning(
                     f"[{provider}] timeout ({self.http_timeout}s) su '{text[:40]}...'"
@@ -216,91 +316,325 @@ class DeepTranslatorMachineTranslator(BaseMachineTranslator):
             f"Tutti i provider hanno fallito per '{text[:60]}'. "
             f"Stringa non tradotta — riesegui `retry_translations`."
         )
-        return text
+        return text, None
+
+    def _translate_text(self, text, source_lang, target_lang):
+        """
+        Traduce un singolo testo (memoria di traduzione, poi provider).
+        Restituisce il testo originale se tutti i provider falliscono.
+        """
+        if not text or not text.strip():
+            return text
+        return self._translate_segments([text], source_lang, target_lang)[0]
+
+    # ------------------------------------------------------------------
+    # Modalità batch: più segmenti per richiesta
+    # ------------------------------------------------------------------
+
+    def _max_chars(self, provider):
+        if self.batch_max_chars:
+            return self.batch_max_chars
+        return BATCH_MAX_CHARS.get(provider, BATCH_MAX_CHARS["mymemory"])
+
+    def _pack(self, segments):
+        """
+        Divide i segmenti in pacchetti entro il limite del primo provider
+        disponibile. Un segmento troppo lungo o che contiene il separatore
+        resta da solo.
+        """
+        providers = self._provider_order() or self.providers
+        limit = self._max_chars(providers[0]) if providers else 0
+        packs, current, size = [], [], 0
+        for segment in segments:
+            cost = len(segment) + len(SEGMENT_SEPARATOR)
+            alone = len(segment) > limit or "\u2016" in segment
+            if current and (alone or size + cost > limit or len(current) >= self.batch_max_segments):
+                packs.append(current)
+                current, size = [], 0
+            current.append(segment)
+            size += cost
+            if alone:
+                packs.append(current)
+                current, size = [], 0
+        if current:
+            packs.append(current)
+        return packs
+
+    def _translate_pack(self, segments, source_lang, target_lang):
+        """
+        Traduce un pacchetto con una sola richiesta per provider.
+
+        Returns:
+            (traduzioni nello stesso ordine, provider), o None se nessun
+            provider restituisce esattamente un risultato per segmento.
+        """
+        joined = SEGMENT_SEPARATOR.join(segments)
+        for provider in self._provider_order():
+            if len(joined) > self._max_chars(provider):
+                continue
+            try:
+                result = self._translate_with_provider(joined, source_lang, target_lang, provider)
+            except provider_health.ProviderUnavailable:
+                continue
+            except concurrent.futures.TimeoutError:
+                logger.warning(f"[{provider}] timeout ({self.http_timeout}s) su pacchetto di {len(segments)} segmenti")
+                continue
+            except Exception as e:
+                logger.warning(f"[{provider}] errore su pacchetto di {len(segments)} segmenti: {e}")
+                continue
+            parts = _SEPARATOR_RE.split(result.strip()) if result else []
+            if len(parts) == len(segments) and all(part.strip() for part in parts):
+                return parts, provider
+            logger.warning(
+                f"[{provider}] pacchetto di {len(segments)} segmenti diviso in {len(parts)}"
+                f" — passo al provider successivo"
+            )
+        return None
+
+    def _translate_packs(self, packs, source_lang, target_lang):
+        """
+        Traduce i pacchetti di una lingua, solo rete (nessun accesso al DB).
+        Ogni pacchetto fallito ricade sulla traduzione frase per frase.
+
+        Returns:
+            [(frase, traduzione, provider o None se fallita), ...]
+        """
+        entries = []
+        for pack in packs:
+            packed = self._translate_pack(pack, source_lang, target_lang) if len(pack) > 1 else None
+            if packed is not None:
+                parts, provider = packed
+                entries.extend((unit, part.strip(), provider) for unit, part in zip(pack, parts, strict=True))
+            else:
+                for unit in pack:
+                    result, provider = self._translate_single(unit, source_lang, target_lang)
+                    entries.append((unit, result.strip(), provider))
+        return entries
+
+    def _translate_units(self, units_by_lang, source_lang):
+        """
+        Traduce frasi distinte in una o più lingue destinazione.
+
+        Le frasi già nella memoria di traduzione non vanno in rete; le altre
+        vengono impacchettate e le lingue procedono in parallelo (un thread
+        per lingua), con ogni richiesta regolata dal token bucket del
+        provider. La memoria viene letta e scritta solo dal thread
+        chiamante, che possiede la connessione al DB.
+
+        Args:
+            units_by_lang: {lingua destinazione: [frase, ...]}
+
+        Returns:
+            {lingua destinazione: {frase: traduzione}}
+        """
+        translated = {}
+        packs = {}
+        for target_lang, units in units_by_lang.items():
+            translated[target_lang] = (
+                translation_memory.lookup(units, source_lang, target_lang) if self.memory else {}
+            )
+            missing = [unit for unit in units if unit not in translated[target_lang]]
+            if missing:
+                packs[target_lang] = self._pack(missing) if self.batch else [[unit] for unit in missing]
+
+        if len(packs) > 1:
+            with concurrent.futures.ThreadPoolExecutor(
+                max_workers=len(packs), thread_name_prefix="translator-locale"
+            ) as executor:
+                futures = {
+                    target_lang: executor.submit(self._translate_packs, lang_packs, source_lang, target_lang)
+                    for target_lang, lang_packs in packs.items()
+                }
+                results = {target_lang: future.result() for target_lang, future in futures.items()}
+        else:
+            results = {
+                target_lang: self._translate_packs(lang_packs, source_lang, target_lang)
+                for target_lang, lang_packs in packs.items()
+            }
+
+        for target_lang, entries in results.items():
+            for unit, result, _provider in entries:
+                translated[target_lang][unit] = result
+            if self.memory:
+                translation_memory.store(
+                    [entry for entry in entries if entry[2]], source_lang, target_lang
+                )
+        return translated
+
+    def _translate_segments_locales(self, texts_by_lang, source_lang):
+        """
+        Traduce liste di testi semplici con il minimo di richieste.
+
+        Ogni testo viene diviso in frasi (``split_sentences``): le frasi
+        uguali, anche in testi diversi, vengono tradotte una volta sola e
+        un paragrafo ritoccato ritraduce solo le frasi cambiate.
+
+        Args:
+            texts_by_lang: {lingua destinazione: [testo, ...]}
+
+        Returns:
+            {lingua destinazione: traduzioni nello stesso ordine dei testi}
+        """
+        plans = {}
+        for target_lang, texts in texts_by_lang.items():
+            positions = {}
+            for i, text in enumerate(texts):
+                if text and text.strip():
+                    positions.setdefault(text.strip(), []).append(i)
+            sentences = {segment: split_sentences(segment) for segment in positions}
+            plans[target_lang] = sentences, positions
+
+        translated = self._translate_units(
+            {
+                target_lang: list(dict.fromkeys(unit for parts in sentences.values() for unit, _sep in parts))
+                for target_lang, (sentences, _positions) in plans.items()
+            },
+            source_lang,
+        )
+
+        results = {}
+        for target_lang, texts in texts_by_lang.items():
+            sentences, positions = plans[target_lang]
+            lang_results = list(texts)
+            for segment, parts in sentences.items():
+                result = "".join(translated[target_lang][unit] + separator for unit, separator in parts)
+                for i in positions[segment]:
+                    lang_results[i] = _restore_whitespace(texts[i], result)
+            results[target_lang] = lang_results
+        return results
+
+    def _translate_segments(self, texts, source_lang, target_lang):
+        """Come ``_translate_segments_locales`` per una sola lingua."""
+        return self._translate_segments_locales({target_lang: texts}, source_lang)[target_lang]
+
+    def _translate_many_locales(self, values_by_lang, source_lang):
+        """
+        Traduce più valori (testo semplice o HTML) in una o più lingue.
+
+        I blocchi di tutti gli HTML (con i tag inline come segnaposto) e i
+        testi semplici finiscono nella stessa lista di segmenti, poi ogni
+        valore viene ricomposto. Le lingue vengono tradotte in parallelo
+        (``_translate_units``).
+
+        Args:
+            values_by_lang: {lingua destinazione: [valore, ...]}
+
+        Returns:
+            {lingua destinazione: traduzioni nello stesso ordine dei valori}
+        """
+        layouts = {}
+        segments = {}
+        for target_lang, values in values_by_lang.items():
+            layouts[target_lang], segments[target_lang] = _layout(values)
+
+        translated = self._translate_segments_locales(segments, source_lang)
+
+        # Blocchi con i segnaposto persi o rimescolati dal provider: secondo
+        # giro, nodo di testo per nodo di testo (tutti insieme)
+        node_segments = {}
+        for target_lang, lang_layouts in layouts.items():
+            lang_segments = node_segments[target_lang] = []
+            for item in (item for layout in lang_layouts if layout for item in layout):
+                if isinstance(item, _InlineRun):
+                    item.result = item.restore(translated[target_lang][item.index])
+                    if item.result is None:
+                        logger.warning(
+                            f"[{target_lang}] segnaposto non validi in '{segments[target_lang][item.index][:40]}...'"
+                            f" — traduco nodo per nodo"
+                        )
+                        item.result = item.node_layout(lang_segments)
+        node_segments = {target_lang: items for target_lang, items in node_segments.items() if items}
+        node_translated = self._translate_segments_locales(node_segments, source_lang) if node_segments else {}
+
+        def render(item, target_lang):
+            if isinstance(item, int):
+                return translated[target_lang][item]
+            if isinstance(item, str):
+                return item
+            if isinstance(item.result, str):
+                return item.result
+            return "".join(
+                node_translated[target_lang][part] if isinstance(part, int) else part for part in item.result
+            )
+
+        results = {}
+        for target_lang, values in values_by_lang.items():
+            lang_results = []
+            for value, layout in zip(values, layouts[target_lang], strict=True):
+                if layout is None:
+                    lang_results.append(value)
+                else:
+                    lang_results.append("".join(render(item, target_lang) for item in layout))
+            results[target_lang] = lang_results
+        return results
+
+    def _translate_many(self, values, source_lang, target_lang):
+        """
+        Traduce più valori (testo semplice o HTML) in un unico batch.
+
+        Returns:
+            Lista di traduzioni nello stesso ordine di ``values``.
+        """
+        return self._translate_many_locales({target_lang: values}, source_lang)[target_lang]
 
     def _translate_html(self, html, source_lang, target_lang):
         """Traduce HTML preservando i tag."""
         if not html or not html.strip():
             return html
-        
-        # Estrai le parti
-        parser = HTMLTextExtractor()
-        parser.feed(html)
-        parts = parser.get_parts()
-        
-        # Traduci solo le parti testuali
-        result = []
-        for part_type, content in parts:
-            if part_type == "text" and content.strip():
-                translated = self._translate_text(content, source_lang, target_lang)
-                result.append(translated)
-                time.sleep(self.delay)  # Rate limiting
-            else:
-                result.append(content)
-        
-        return "".join(result)
-    
+        return self._translate_many([html], source_lang, target_lang)[0]
+
     def translate(self, source_locale, target_locale, strings):
         """
         Traduce una lista di StringValue.
-        
+
         Args:
             source_locale: Locale sorgente (es. it)
             target_locale: Locale destinazione (es. en)
             strings: Lista di StringValue da tradurre
-            
+
         Returns:
             Dict con StringValue originali come chiavi e traduzioni come valori
         """
         source_lang = LANGUAGE_MAP_SIMPLE.get(
-            source_locale.language_code, 
+            source_locale.language_code,
             source_locale.language_code
         )
         target_lang = LANGUAGE_MAP_SIMPLE.get(
             target_locale.language_code,
             target_locale.language_code
         )
-        
+
         logger.info(
             f"Traduzione automatica: {source_lang} -> {target_lang} "
             f"({len(strings)} stringhe)"
         )
-        
+
         translations = {}
-        
-        for i, string in enumerate(strings):
+        pending = []
+        for string in strings:
+            # Ottieni l'HTML traducibile
+            html = string.get_translatable_html()
+            if not html or not html.strip():
+                translations[string] = string
+            else:
+                pending.append((string, html))
+
+        translated = self._translate_many([html for _string, html in pending], source_lang, target_lang)
+
+        for i, ((string, html), result) in enumerate(zip(pending, translated, strict=True)):
             try:
-                # Ottieni l'HTML traducibile
-                html = string.get_translatable_html()
-                
-                if not html or not html.strip():
-                    translations[string] = string
-                    continue
-                
                 # Verifica se contiene tag HTML
-                has_html = bool(re.search(r"<[^>]+>", html))
-                
-                if has_html:
-                    translated_html = self._translate_html(html, source_lang, target_lang)
-                    translations[string] = StringValue.from_translated_html(translated_html)
+                if re.search(r"<[^>]+>", html):
+                    translations[string] = StringValue.from_translated_html(result)
                 else:
-                    translated_text = self._translate_text(html, source_lang, target_lang)
-                    translations[string] = StringValue.from_plaintext(translated_text)
-                
-                # Log progresso
-                if (i + 1) % 10 == 0:
-                    logger.info(f"Tradotte {i + 1}/{len(strings)} stringhe...")
-                
-                # Rate limiting per evitare blocchi
-                time.sleep(self.delay)
-                
+                    translations[string] = StringValue.from_plaintext(result)
             except Exception as e:
                 logger.error(f"Errore traduzione stringa {i}: {e}")
                 translations[string] = string
-        
+
         logger.info(f"Traduzione completata: {len(translations)} stringhe")
         return translations
-    
+
     def can_translate(self, source_locale, target_locale):
         """
         Verifica se questa coppia di lingue è supportata.
@@ -317,6 +651,209 @@ class DeepTranslatorMachineTranslator(BaseMachineTranslator):
         return source in supported and target in supported
 
 
+class _InlineRun:
+    """
+    Blocco di testo e tag inline tradotto come un solo segmento, con i tag
+    sostituiti da segnaposto.
+    """
+
+    def __init__(self, index, tags, nodes):
+        self.index = index  # segmento con i segnaposto
+        self.tags = tags  # {segnaposto: tag originale}
+        self.nodes = nodes  # parti originali, per la traduzione nodo per nodo
+        self.result = None
+
+    def restore(self, translated):
+        """
+        Rimette i tag al posto dei segnaposto. None se non ci sono tutti,
+        una volta sola, con ogni chiusura dopo la sua apertura e ben annidata.
+        """
+        tokens = [match.group(0) for match in _PLACEHOLDER_RE.finditer(translated)]
+        if sorted(tokens) != sorted(self.tags):
+            return None
+        stack = []
+        for token in tokens:
+            if token.startswith("[/"):
+                if not stack or stack.pop() != token[2:-1]:
+                    return None
+            elif not token.endswith("/]") and f"[/{token[1:-1]}]" in self.tags:
+                stack.append(token[1:-1])
+        return _PLACEHOLDER_RE.sub(lambda match: self.tags[match.group(0)], translated)
+
+    def node_layout(self, segments):
+        """Layout nodo per nodo (come ``_layout``), aggiungendo i testi a ``segments``."""
+        layout = []
+        for part_type, content in self.nodes:
+            if part_type == "text" and content.strip():
+                layout.append(len(segments))
+                segments.append(content)
+            else:
+                layout.append(content)
+        return layout
+
+
+def _inline_runs(parts):
+    """
+    Raggruppa le parti di un HTML: tag di blocco (copiati invariati) e
+    sequenze di testo e tag inline fra due tag di blocco.
+    """
+    run = []
+    for part in parts:
+        part_type, content = part
+        name = _TAG_NAME_RE.match(content) if part_type != "text" else None
+        if name and name.group(1).lower() not in INLINE_TAGS:
+            if run:
+                yield run
+                run = []
+            yield part
+        else:
+            run.append(part)
+    if run:
+        yield run
+
+
+def _is_edge(part):
+    """Parte che non serve al provider agli estremi di un blocco."""
+    part_type, content = part
+    if part_type == "text":
+        return not content.strip()
+    return _TAG_NAME_RE.match(content).group(1).lower() in VOID_INLINE_TAGS
+
+
+def _wraps(run):
+    """True se il primo tag del blocco si chiude con l'ultima parte."""
+    part_type, content = run[0]
+    if part_type != "start" or len(run) < 2 or run[-1][0] != "end":
+        return False
+    name = _TAG_NAME_RE.match(content).group(1).lower()
+    depth = 0
+    for index, (kind, text) in enumerate(run):
+        if kind == "text" or _TAG_NAME_RE.match(text).group(1).lower() != name:
+            continue
+        depth += 1 if kind == "start" else -1
+        if depth == 0:
+            return index == len(run) - 1
+    return False
+
+
+def _trim_run(run):
+    """
+    Separa dagli estremi del blocco spazi, tag vuoti e tag che lo avvolgono
+    tutto (``<b>Moto</b>``): restano markup, senza segnaposto.
+
+    Returns:
+        (prima, blocco, dopo)
+    """
+    before, after = [], []
+    while run:
+        if _is_edge(run[0]):
+            before.append(run[0])
+            run = run[1:]
+        elif _is_edge(run[-1]):
+            after.insert(0, run[-1])
+            run = run[:-1]
+        elif _wraps(run):
+            before.append(run[0])
+            after.insert(0, run[-1])
+            run = run[1:-1]
+        else:
+            break
+    return before, run, after
+
+
+def _placeholder_segment(run):
+    """
+    Testo del blocco con i tag inline come segnaposto.
+
+    Returns:
+        (segmento, {segnaposto: tag}), o None se il testo contiene già
+        qualcosa che somiglia a un segnaposto
+    """
+    if any(part_type == "text" and _PLACEHOLDER_RE.search(content) for part_type, content in run):
+        return None
+    pieces, tags, open_tags = [], {}, []
+    number = 0
+    for part_type, content in run:
+        if part_type == "text":
+            pieces.append(content)
+            continue
+        number += 1
+        name = _TAG_NAME_RE.match(content).group(1).lower()
+        if part_type == "start" and name not in VOID_INLINE_TAGS:
+            token = f"[{number}]"
+            open_tags.append((name, number))
+        elif part_type == "end" and open_tags and open_tags[-1][0] == name:
+            number -= 1
+            token = f"[/{open_tags.pop()[1]}]"
+        else:
+            token = f"[{number}/]"  # tag vuoto o chiusura senza apertura
+        tags[token] = content
+        pieces.append(token)
+    return "".join(pieces), tags
+
+
+def _layout(values):
+    """
+    Scompone i valori in segmenti da tradurre.
+
+    Returns:
+        (layouts, segments): per ogni valore None (vuoto) o la lista delle
+        parti, dove un intero è l'indice del segmento in ``segments``, un
+        ``_InlineRun`` un blocco HTML tradotto con segnaposto e una stringa
+        è markup da copiare invariato.
+    """
+    layouts = []
+    segments = []
+    for value in values:
+        if not value or not value.strip():
+            layouts.append(None)
+        elif re.search(r"<[^>]+>", value):
+            parser = HTMLTextExtractor()
+            parser.feed(value)
+            layout = []
+            for item in _inline_runs(parser.get_parts()):
+                if isinstance(item, tuple):
+                    layout.append(item[1])
+                    continue
+                before, run, after = _trim_run(item)
+                layout.extend(content for _part_type, content in before)
+                placeholder = _placeholder_segment(run) if len(run) > 1 else None
+                if placeholder is None:
+                    layout.extend(_InlineRun(None, {}, run).node_layout(segments))
+                else:
+                    layout.append(_InlineRun(len(segments), placeholder[1], run))
+                    segments.append(placeholder[0])
+                layout.extend(content for _part_type, content in after)
+            layouts.append(layout)
+        else:
+            layouts.append([len(segments)])
+            segments.append(value)
+    return layouts, segments
+
+
+def split_sentences(text):
+    """
+    Divide un testo in frasi.
+
+    Returns:
+        [(frase, spazi che la seguono), ...]: riunendo le coppie si ottiene
+        il testo originale.
+    """
+    pieces = _SENTENCE_BREAK_RE.split(text)
+    return [(pieces[i], pieces[i + 1] if i + 1 < len(pieces) else "") for i in range(0, len(pieces), 2)]
+
+
+def _restore_whitespace(original, result):
+    """Riporta sulla traduzione gli spazi iniziali e finali dell'originale."""
+    leading = len(original) - len(original.lstrip())
+    trailing = len(original) - len(original.rstrip())
+    if leading:
+        result = " " * leading + result
+    if trailing:
+        result = result + " " * trailing
+    return result
+
+
 # ---------------------------------------------------------------------------
 # Funzione standalone: traduzione segmenti pendenti in background
 # ---------------------------------------------------------------------------
@@ -334,7 +871,8 @@ def translate_pending_segments(locale_code=None, max_strings=200):
 
     Chiamabile da:
     - management command `retry_translations`
-    - hook Wagtail `page_served` (background thread)
+    - lavoro in coda `translate_pending` (apps.core.translation_queue,
+      `manage.py translation_worker`)
 
     Args:
         locale_code: codice lingua target (es. 'fr'). None = tutte le lingue.
@@ -387,34 +925,38 @@ def translate_pending_segments(locale_code=None, max_strings=200):
             logger.error("Locale italiano non trovato.")
             return stats
 
-        # Mappa codici semplici per la chiamata _translate_text
+        # Raggruppa per lingua target: le lingue vengono tradotte in parallelo
+        src = LANGUAGE_MAP_ISO.get("it", "it")
+        by_target = {}
         for st in pending:
-            try:
-                src = LANGUAGE_MAP_ISO.get("it", "it")
-                tgt = LANGUAGE_MAP_ISO.get(st.locale.language_code, st.locale.language_code)
-
-                original = st.translation_of.data
-                if not original or not original.strip():
-                    stats["skipped"] += 1
-                    continue
-
-                has_html = bool(re.search(r"<[^>]+>", original))
-                if has_html:
-                    result = translator._translate_html(original, src, tgt)
-                else:
-                    result = translator._translate_text(original, src, tgt)
-
-                if result and result != original:
-                    st.data = result
-                    st.save(update_fields=["data"])
-                    stats["done"] += 1
-                    time.sleep(translator.delay)
-                else:
-                    stats["skipped"] += 1
-
-            except Exception as e:
-                logger.error(f"translate_pending_segments errore su stringa {st.pk}: {e}")
-                stats["errors"] += 1
+            original = st.translation_of.data
+            if not original or not original.strip():
+                stats["skipped"] += 1
+                continue
+            tgt = LANGUAGE_MAP_ISO.get(st.locale.language_code, st.locale.language_code)
+            by_target.setdefault(tgt, []).append(st)
+
+        originals = {tgt: [st.translation_of.data for st in group] for tgt, group in by_target.items()}
+        try:
+            translated = translator._translate_many_locales(originals, src)
+        except Exception as e:
+            logger.error(f"translate_pending_segments errore sul batch: {e}")
+            stats["errors"] += sum(len(group) for group in by_target.values())
+            translated = {}
+
+        for tgt, results in translated.items():
+            group = by_target[tgt]
+            for st, original, result in zip(group, originals[tgt], results, strict=True):
+                try:
+                    if result and result != original:
+                        st.data = result
+                        st.save(update_fields=["data"])
+                        stats["done"] += 1
+                    else:
+                        stats["skipped"] += 1
+                except Exception as e:
+                    logger.error(f"translate_pending_segments errore su stringa {st.pk}: {e}")
+                    stats["errors"] += 1
 
     except Exception as e:
         logger.exception(f"translate_pending_segments errore generale: {e}")
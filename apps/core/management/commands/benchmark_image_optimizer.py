@@ -0,0 +1,105 @@
+"""
+Management command: benchmark dell'ottimizzazione immagini del bulk upload.
+
+Per ogni originale (file o cartelle) confronta il percorso a piena
+risoluzione con la decodifica ridotta (``draft()``/``reduce()``) e i livelli
+di effort WebP richiesti: tempo mediano, megapixel decodificati (proxy della
+memoria), peso dell'output e PSNR rispetto all'output di riferimento
+(piena risoluzione, ``method=6``).
+
+Uso:
+    python manage.py benchmark_image_optimizer media/original_images
+    python manage.py benchmark_image_optimizer foto/ --methods 4 6 --repeat 5
+"""
+from __future__ import annotations
+
+import io
+import math
+import statistics
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from PIL import Image, ImageChops, ImageStat
+
+from apps.core.image_optimizer import open_for_resize, optimize_image
+
+EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".tif", ".tiff"}
+REFERENCE_METHOD = 6
+
+
+def psnr(reference: bytes, candidate: bytes) -> float:
+    """PSNR in dB fra due immagini (inf se identiche)."""
+    with Image.open(io.BytesIO(reference)) as a, Image.open(io.BytesIO(candidate)) as b:
+        a, b = a.convert("RGB"), b.convert("RGB")
+        if a.size != b.size:
+            b = b.resize(a.size)
+        rms = ImageStat.Stat(ImageChops.difference(a, b)).rms
+    mse = sum(value**2 for value in rms) / len(rms)
+    return math.inf if mse == 0 else 10 * math.log10(255**2 / mse)
+
+
+def _collect(paths) -> list[Path]:
+    files = []
+    for raw in paths:
+        path = Path(raw)
+        if path.is_dir():
+            files.extend(sorted(p for p in path.rglob("*") if p.suffix.lower() in EXTENSIONS))
+        elif path.is_file():
+            files.append(path)
+        else:
+            raise CommandError(f"Percorso non trovato: {raw}")
+    return files
+
+
+def _decoded_megapixels(data: bytes, fast_decode: bool) -> float:
+    img, _target = open_for_resize(io.BytesIO(data), fast_decode)
+    return img.size[0] * img.size[1] / 1_000_000
+
+
+class Command(BaseCommand):
+    help = "Benchmark di optimize_image: decodifica ridotta ed effort WebP vs percorso completo."
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="+", help="File o cartelle di originali")
+        parser.add_argument("--methods", type=int, nargs="+", default=[4, 6], help="Effort WebP da provare")
+        parser.add_argument("--repeat", type=int, default=3, help="Ripetizioni per misura (default: 3)")
+
+    def _measure(self, data: bytes, method: int, fast_decode: bool, repeat: int):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            output = optimize_image(io.BytesIO(data), webp_method=method, fast_decode=fast_decode).getvalue()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings), output
+
+    def handle(self, *args, **options):
+        files = _collect(options["paths"])
+        if not files:
+            raise CommandError("Nessuna immagine trovata")
+
+        variants = [(fast, method) for fast in (False, True) for method in options["methods"]]
+        totals = {variant: {"ms": 0.0, "mp": 0.0, "bytes": 0, "psnr": []} for variant in variants}
+
+        for path in files:
+            data = path.read_bytes()
+            _ms, reference = self._measure(data, REFERENCE_METHOD, False, 1)
+            for fast, method in variants:
+                ms, output = self._measure(data, method, fast, options["repeat"])
+                total = totals[(fast, method)]
+                total["ms"] += ms
+                total["mp"] += _decoded_megapixels(data, fast)
+                total["bytes"] += len(output)
+                total["psnr"].append(psnr(reference, output))
+
+        baseline_ms = totals[(False, REFERENCE_METHOD)]["ms"] if (False, REFERENCE_METHOD) in totals else None
+        self.stdout.write(f"{len(files)} immagini, riferimento: piena risoluzione, method={REFERENCE_METHOD}")
+        for (fast, method), total in totals.items():
+            speedup = f" x{baseline_ms / total['ms']:.1f}" if baseline_ms and total["ms"] else ""
+            self.stdout.write(
+                f"{'ridotta' if fast else 'completa':<9} method={method} "
+                f"tempo={total['ms'] / len(files):.0f} ms/img{speedup} "
+                f"decodificati={total['mp'] / len(files):.1f} MP/img "
+                f"output={total['bytes'] / len(files) / 1024:.0f} KB/img "
+                f"psnr_min={min(total['psnr']):.1f} dB"
+            )
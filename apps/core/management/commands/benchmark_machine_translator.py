@@ -0,0 +1,144 @@
+"""
+Management command: microbenchmark dell'overhead per stringa del traduttore.
+
+Avvia un provider finto in locale (risposte in formato MyMemory, HTTP/1.1
+keep-alive, latenza configurabile) e traduce le stesse stringhe in due modi:
+
+- ``prima``: per ogni stringa un nuovo client deep-translator, un nuovo
+  ``ThreadPoolExecutor`` e una nuova connessione TCP (``requests.get``);
+- ``dopo``: ``DeepTranslatorMachineTranslator._translate_with_provider``,
+  con executor, client e sessione keep-alive riutilizzati
+  (apps.core.translator_pool).
+
+Riporta il tempo per stringa e le connessioni TCP aperte verso il provider.
+Memoria di traduzione, batch e rate limiting non entrano in gioco: si
+misura solo la singola chiamata. In locale non c'è TLS: ``--handshake`` aggiunge un ritardo
+a ogni nuova connessione per simulare handshake TCP+TLS verso un provider
+reale (tipicamente 2-3 RTT).
+
+Uso:
+    python manage.py benchmark_machine_translator
+    python manage.py benchmark_machine_translator --strings 500 --latency 20 --handshake 60
+"""
+from __future__ import annotations
+
+import concurrent.futures
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from django.core.management.base import BaseCommand
+
+from apps.core import translator_pool
+from apps.core.machine_translator import DeepTranslatorMachineTranslator
+
+
+class _StubProvider(BaseHTTPRequestHandler):
+    """Risponde come l'API MyMemory, traducendo in maiuscolo."""
+
+    protocol_version = "HTTP/1.1"  # keep-alive
+    # Header e body in due write: senza TCP_NODELAY Nagle + delayed ACK
+    # aggiungerebbero ~40 ms alle connessioni riutilizzate
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        if self.server.handshake:
+            time.sleep(self.server.handshake)
+
+    def do_GET(self):
+        self.server.connections.add(self.client_address)
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        text = parse_qs(urlparse(self.path).query).get("q", [""])[0]
+        body = json.dumps({"responseData": {"translatedText": text.upper()}, "matches": []}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _StubTranslator(DeepTranslatorMachineTranslator):
+    """Traduttore con MyMemory puntato al provider finto."""
+
+    base_url = None
+
+    def _make_mymemory_translator(self, source_lang, target_lang):
+        translator = super()._make_mymemory_translator(source_lang, target_lang)
+        translator._base_url = self.base_url
+        return translator
+
+
+class Command(BaseCommand):
+    help = "Microbenchmark: overhead per stringa del traduttore, prima/dopo il pool di thread e sessioni."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--strings", type=int, default=200, help="Stringhe tradotte per variante (default: 200)")
+        parser.add_argument("--latency", type=float, default=0, help="Latenza del provider finto in ms (default: 0)")
+        parser.add_argument(
+            "--handshake", type=float, default=0, help="Ritardo per ogni nuova connessione in ms (default: 0)"
+        )
+
+    def _before(self, translator, text):
+        client = translator._make_translator("mymemory", "it", "en")
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(client.translate, text).result(timeout=translator.http_timeout)
+
+    def _after(self, translator, text):
+        return translator._translate_with_provider(text, "it", "en", "mymemory")
+
+    def _measure(self, server, run, translator, count):
+        server.connections = set()
+        timings = []
+        for n in range(count):
+            start = time.perf_counter()
+            result = run(translator, f"Stringa di prova {n}")
+            timings.append((time.perf_counter() - start) * 1000)
+            assert result == f"STRINGA DI PROVA {n}", result
+        return timings, len(server.connections)
+
+    def handle(self, *args, **options):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _StubProvider)
+        server.daemon_threads = True
+        server.latency = options["latency"] / 1000
+        server.handshake = options["handshake"] / 1000
+        server.connections = set()
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        translator = _StubTranslator(
+            options={"PROVIDERS": ["mymemory"], "MEMORY": False, "RATE_LIMITS": {"mymemory": 0}}
+        )
+        translator.base_url = f"http://127.0.0.1:{server.server_address[1]}/get"
+        translator_pool.reset()
+        try:
+            # Riscaldamento: import e primo client fuori dalla misura
+            self._before(translator, "riscaldamento")
+            self._after(translator, "riscaldamento")
+            results = {
+                name: self._measure(server, run, translator, options["strings"])
+                for name, run in (("prima", self._before), ("dopo", self._after))
+            }
+        finally:
+            translator_pool.reset()
+            server.shutdown()
+            server.server_close()
+
+        self.stdout.write(
+            f"{options['strings']} stringhe, latenza provider {options['latency']:.0f} ms, "
+            f"handshake {options['handshake']:.0f} ms"
+        )
+        baseline = statistics.mean(results["prima"][0])
+        for name, (timings, connections) in results.items():
+            mean = statistics.mean(timings)
+            self.stdout.write(
+                f"{name:<6} media={mean:.2f} ms/stringa mediana={statistics.median(timings):.2f} ms "
+                f"p95={sorted(timings)[int(len(timings) * 0.95) - 1]:.2f} ms "
+                f"connessioni={connections} x{baseline / mean:.1f}"
+            )
@@ -8,10 +8,12 @@ Uso:
     python manage.py force_translate --dry-run    # Mostra cosa farebbe senza modificare
 """
 
+from django.conf import settings
 from django.core.management.base import BaseCommand
 from wagtail.models import Page, Locale
 from wagtail_localize.models import TranslationSource, Translation, StringTranslation
-from deep_translator import GoogleTranslator
+
+from apps.core.machine_translator import DeepTranslatorMachineTranslator
 
 
 class Command(BaseCommand):
@@ -44,6 +46,9 @@ class Command(BaseCommand):
         self.skip_existing = options.get("skip_existing", False)
         self.lang_map = {"fr": "fr", "en": "en", "de": "de", "es": "es"}
         self.target_locales = Locale.objects.exclude(language_code="it")
+        # Stessi provider della traduzione automatica, con memoria di traduzione
+        mt_settings = getattr(settings, "WAGTAILLOCALIZE_MACHINE_TRANSLATOR", {})
+        self.translator = DeepTranslatorMachineTranslator(options=mt_settings.get("OPTIONS", {}))
 
         self.stdout.write(self.style.NOTICE("=" * 60))
         self.stdout.write(self.style.NOTICE("FORCE TRANSLATE - Sincronizzazione e Traduzione"))
@@ -90,15 +95,20 @@ class Command(BaseCommand):
             return
 
         # 2. Crea Translation per ogni lingua mancante
+        translations = {}
         for locale in self.target_locales:
             translation = self.ensure_translation(source, page, locale, stats)
-            if not translation:
-                continue
+            if translation:
+                translations[locale] = translation
+
+        # 3. Traduci i testi della pagina in tutte le lingue insieme
+        self.prefetched = self.prefetch_translations(source, translations)
 
-            # 3. Traduci i segmenti
+        for locale, translation in translations.items():
+            # 4. Salva i segmenti tradotti
             self.translate_segments(source, translation, locale, stats)
 
-            # 4. Pubblica la traduzione
+            # 5. Pubblica la traduzione
             self.publish_translation(translation, stats)
 
     def ensure_translation_source(self, page, stats):
@@ -195,14 +205,58 @@ class Command(BaseCommand):
                         )
                     stats["segments_translated"] += 1
 
+    def prefetch_translations(self, source, translations):
+        """
+        Traduce i testi della pagina per tutte le lingue con un'unica chiamata:
+        le lingue procedono in parallelo entro il rate limit dei provider.
+
+        Returns:
+            {lingua: {testo originale: traduzione}}
+        """
+        texts = list(dict.fromkeys(
+            segment.string.data
+            for segment in source.stringsegment_set.select_related("string")
+            if segment.string.data and len(segment.string.data.strip()) >= 2
+        ))
+        by_lang = {}
+        for locale in translations:
+            target_lang = locale.language_code
+            if target_lang not in self.lang_map:
+                continue
+            lang_texts = texts
+            if self.skip_existing:
+                done = set(
+                    StringTranslation.objects.filter(
+                        translation_of__in=source.stringsegment_set.values("string"), locale=locale,
+                    ).values_list("translation_of__data", flat=True)
+                )
+                lang_texts = [text for text in texts if text not in done]
+            by_lang[self.lang_map[target_lang]] = lang_texts
+        if not by_lang:
+            return {}
+
+        try:
+            results = self.translator._translate_many_locales(by_lang, "it")
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f"  Traduzione: ERRORE - {e}"))
+            return {}
+        return {
+            lang: dict(zip(by_lang[lang], translated, strict=True))
+            for lang, translated in results.items()
+        }
+
     def translate_text(self, text, target):
-        """Traduce il testo usando Google Translator."""
+        """Traduce il testo (già tradotto da prefetch_translations, se possibile)."""
         if not text or len(text.strip()) < 2:
             return text
-        try:
-            return GoogleTranslator(source="it", target=target).translate(text)
-        except Exception:
-            return None
+        translated = getattr(self, "prefetched", {}).get(target, {}).get(text)
+        if translated is None:
+            try:
+                translated = self.translator._translate_html(text, "it", target)
+            except Exception:
+                return None
+        # Testo invariato = tutti i provider falliti: non sovrascrivere
+        return None if translated == text else translated
 
     def sanitize_slug(self, slug):
         """Rende lo slug valido per Wagtail."""
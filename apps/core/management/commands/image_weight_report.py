@@ -0,0 +1,74 @@
+"""
+Management command: byte immagine scaricati per tipo di pagina.
+
+Renderizza alcune pagine pubblicate per ogni tipo e stima i byte immagine
+che un browser scarica con ``<picture>``/``srcset`` (apps.core.picture)
+rispetto alla sola rendition fissa dell'``<img src>`` usata in precedenza.
+Due profili: mobile (390px, DPR 2) e desktop (1440px, DPR 1).
+
+Uso:
+    python manage.py image_weight_report
+    python manage.py image_weight_report --per-type 5
+    python manage.py image_weight_report --page-type GalleryPage --no-avif
+"""
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+from django.test import Client
+from wagtail.models import Page, get_page_models
+
+from apps.core.picture import estimate_image_bytes
+
+PROFILES = (
+    ("mobile", 390, 2),
+    ("desktop", 1440, 1),
+)
+
+
+def _kb(value: int) -> str:
+    return f"{value / 1024:.0f} KB"
+
+
+class Command(BaseCommand):
+    help = "Stima i byte immagine scaricati per tipo di pagina (srcset/AVIF vs rendition fissa)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--per-type", type=int, default=3, help="Pagine misurate per tipo (default: 3)")
+        parser.add_argument("--page-type", type=str, help="Solo questo tipo (nome classe, es. GalleryPage)")
+        parser.add_argument("--no-avif", action="store_true", help="Simula un browser senza supporto AVIF")
+
+    def handle(self, *args, **options):
+        mime_types = ("image/webp",) if options["no_avif"] else ("image/avif", "image/webp")
+        client = Client(raise_request_exception=False)
+
+        for model in get_page_models():
+            if model is Page or model._meta.abstract:
+                continue
+            if options["page_type"] and model.__name__ != options["page_type"]:
+                continue
+            pages = list(model.objects.live().public()[: options["per_type"]])
+            if not pages:
+                continue
+
+            totals = {name: {"images": 0, "bytes": 0, "fallback_bytes": 0, "unknown": 0} for name, _w, _d in PROFILES}
+            for page in pages:
+                site = page.get_site()
+                response = client.get(page.url, HTTP_HOST=site.hostname if site else "localhost")
+                if response.status_code != 200:
+                    self.stderr.write(f"{model.__name__} {page.url}: HTTP {response.status_code}, saltata")
+                    continue
+                html = response.content.decode()
+                for name, viewport, dpr in PROFILES:
+                    report = estimate_image_bytes(html, viewport, dpr, mime_types)
+                    for key, value in report.items():
+                        totals[name][key] += value
+
+            for name, _viewport, _dpr in PROFILES:
+                total = totals[name]
+                fallback = total["fallback_bytes"]
+                saving = (1 - total["bytes"] / fallback) * 100 if fallback else 0
+                self.stdout.write(
+                    f"{model.__name__:<22} {name:<8} pagine={len(pages)} immagini={total['images']} "
+                    f"img_src={_kb(fallback)} picture={_kb(total['bytes'])} "
+                    f"riduzione={saving:.0f}% non_misurate={total['unknown']}"
+                )
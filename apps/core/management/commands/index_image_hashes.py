@@ -0,0 +1,28 @@
+"""
+Management command: indicizza gli hash percettivi delle immagini esistenti.
+
+Calcola il pHash DCT (``image_optimizer.perceptual_hash``, indice di
+apps.core.image_dedup) per le immagini caricate prima dell'indice, così il
+bulk upload riconosce anche i loro duplicati.
+
+Uso:
+    python manage.py index_image_hashes
+"""
+from django.core.management.base import BaseCommand
+from wagtail.images import get_image_model
+
+from apps.core.image_dedup import index_image
+
+
+class Command(BaseCommand):
+    help = "Calcola l'hash percettivo delle immagini senza indice duplicati."
+
+    def handle(self, *args, **options):
+        image_ids = list(
+            get_image_model().objects
+            .filter(perceptual_hash__isnull=True)
+            .values_list("pk", flat=True)
+        )
+        for image_id in image_ids:
+            index_image(image_id)
+        self.stdout.write(self.style.SUCCESS(f"Immagini indicizzate: {len(image_ids)}"))
@@ -14,7 +14,6 @@ Uso:
     python manage.py traduci --dry-run    # Solo mostra cosa farebbe
     python manage.py traduci --skip-extract  # Salta estrazione, solo traduzione
 """
-import time
 from django.core.management import call_command
 from django.core.management.base import BaseCommand
 from django.conf import settings
@@ -210,9 +209,6 @@ class Command(BaseCommand):
                     
                     translated_count += 1
                     
-                    # Rate limiting
-                    time.sleep(0.3)
-                    
             except Exception as e:
                 if verbose:
                     self.stdout.write(self.style.WARNING(f"     ⚠️  Errore: {entry.msgid[:30]}... - {e}"))
@@ -5,7 +5,6 @@ Traduce automaticamente le stringhe UI nei file .po
 """
 import os
 import re
-import time
 from pathlib import Path
 from django.core.management.base import BaseCommand
 from django.conf import settings
@@ -90,7 +89,7 @@ class Command(BaseCommand):
             
             # Traduci
             try:
-                time.sleep(0.3)  # Rate limiting
+                # Rate limiting nel traduttore (token bucket per provider)
                 translated = translator._translate_text(msgid_text, 'it', target_lang)
                 
                 if translated and translated != msgid_text:
@@ -0,0 +1,92 @@
+"""
+Management command: worker della coda di traduzione (apps.core.translation_queue).
+
+Prende in lease ed esegue i lavori di ``TranslationJob`` uno alla volta;
+quando la coda è vuota attende ``--poll`` secondi. SIGTERM/SIGINT fanno
+terminare il lavoro in corso prima di uscire. I lavori conclusi vengono
+cancellati dopo ``TRANSLATION_QUEUE_KEEP_DAYS`` giorni.
+
+Uso:
+    python manage.py translation_worker                  # servizio (systemd, docker)
+    python manage.py translation_worker --once           # svuota la coda ed esce (cron)
+
+Systemd (esempio):
+    ExecStart=/www/wwwroot/mccastellazzob.com/venv_new/bin/python \
+              /www/wwwroot/mccastellazzob.com/app/manage.py translation_worker \
+              --settings=mccastellazzob.settings.prod
+    Restart=always
+"""
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.core import translation_queue
+
+
+class Command(BaseCommand):
+    help = "Esegue i lavori di traduzione in background (coda TranslationJob)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Esegue i lavori pronti ed esce quando la coda è vuota.",
+        )
+        parser.add_argument(
+            "--poll",
+            type=float,
+            default=5,
+            help="Secondi di attesa con coda vuota (default: 5)",
+        )
+        parser.add_argument(
+            "--max-jobs",
+            type=int,
+            default=0,
+            help="Esce dopo N lavori (0 = nessun limite); utile per riciclare il processo.",
+        )
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        previous = {signum: signal.signal(signum, self._stop) for signum in (signal.SIGTERM, signal.SIGINT)}
+        try:
+            processed = self._loop(options)
+        finally:
+            for signum, handler in previous.items():
+                signal.signal(signum, handler)
+        self.stdout.write(self.style.SUCCESS(f"Worker traduzioni fermato — lavori eseguiti: {processed}"))
+
+    def _loop(self, options):
+        worker = translation_queue.worker_name()
+        keep_days = getattr(settings, "TRANSLATION_QUEUE_KEEP_DAYS", 7)
+        processed = 0
+        last_prune = 0.0
+        self.stdout.write(f"Worker traduzioni {worker} avviato")
+
+        while not self.stopping:
+            close_old_connections()
+            job = translation_queue.run_next(worker)
+            if job is not None:
+                processed += 1
+                job.refresh_from_db()
+                self.stdout.write(f"  {job.key}: {job.status} (tentativo {job.attempts})")
+                if options["max_jobs"] and processed >= options["max_jobs"]:
+                    break
+                continue
+            if options["once"]:
+                break
+            if time.monotonic() - last_prune > 3600:
+                translation_queue.prune(keep_days)
+                last_prune = time.monotonic()
+            self._sleep(options["poll"])
+        return processed
+
+    def _stop(self, signum, frame):
+        self.stopping = True
+
+    def _sleep(self, seconds):
+        deadline = time.monotonic() + seconds
+        while not self.stopping and time.monotonic() < deadline:
+            time.sleep(min(0.5, deadline - time.monotonic()))
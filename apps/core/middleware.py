@@ -1,15 +1,25 @@
 """
-MC Castellazzo - Security Headers Middleware (V2-020 + V2-017)
-==============================================================
-Aggiunge header di sicurezza moderni non coperti nativamente da Django:
+MC Castellazzo - Middleware
+===========================
+SecurityHeadersMiddleware (V2-020 + V2-017): aggiunge header di sicurezza
+moderni non coperti nativamente da Django:
 - Content-Security-Policy (V2-017)
 - Permissions-Policy
 - Cross-Origin-Opener-Policy (COOP)
 - Cross-Origin-Embedder-Policy (COEP)
 - Cross-Origin-Resource-Policy (CORP)
+
+QueryStatsMiddleware: conta query SQL e tempo DB per richiesta, etichettati
+con la classe della pagina Wagtail servita (vedi ``query_budget``).
 """
+import logging
+import time
+from contextlib import ExitStack
 
 from django.conf import settings
+from django.db import connections
+
+query_stats_logger = logging.getLogger("apps.core.query_stats")
 
 
 # CSP per pagine pubbliche del sito.
@@ -89,3 +99,78 @@ class SecurityHeadersMiddleware:
         response["Cross-Origin-Resource-Policy"] = "same-site"
 
         return response
+
+
+# ---------------------------------------------------------------------------
+# Query budget instrumentation
+# ---------------------------------------------------------------------------
+
+# Attributo impostato dall'hook before_serve_page (apps.core.wagtail_hooks)
+SERVED_PAGE_ATTR = "_served_page_class"
+
+
+class QueryStats:
+    """Execute wrapper che conta le query e somma il tempo passato nel DB."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+    @property
+    def duration_ms(self) -> float:
+        return round(self.duration * 1000, 1)
+
+
+class QueryStatsMiddleware:
+    """
+    Registra numero di query SQL e tempo DB per ogni richiesta.
+
+    - log ``apps.core.query_stats``: una riga per richiesta, WARNING se la
+      pagina servita supera il proprio ``query_budget``;
+    - header ``X-DB-Queries``, ``X-DB-Time-Ms`` e ``X-Page-Type`` solo per
+      utenti staff.
+
+    Per disabilitare: settare ``QUERY_STATS_ENABLED = False`` nei settings.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, "QUERY_STATS_ENABLED", True)
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        stats = QueryStats()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(stats))
+            response = self.get_response(request)
+
+        page_class = getattr(request, SERVED_PAGE_ATTR, None)
+        page_type = page_class.__name__ if page_class else "-"
+        budget = getattr(page_class, "query_budget", None)
+        over_budget = budget is not None and stats.count > budget
+
+        query_stats_logger.log(
+            logging.WARNING if over_budget else logging.INFO,
+            "QUERY_STATS page=%s path=%s status=%s queries=%s db_ms=%s budget=%s",
+            page_type, request.path, response.status_code,
+            stats.count, stats.duration_ms, budget if budget is not None else "-",
+        )
+
+        user = getattr(request, "user", None)
+        if user is not None and user.is_staff:
+            response["X-DB-Queries"] = str(stats.count)
+            response["X-DB-Time-Ms"] = str(stats.duration_ms)
+            response["X-Page-Type"] = page_type
+
+        return response
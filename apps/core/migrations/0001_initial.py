@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('wagtailimages', '0027_image_description'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageHash',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('phash', models.BigIntegerField(verbose_name='Hash percettivo')),
+                ('band0', models.PositiveSmallIntegerField(db_index=True)),
+                ('band1', models.PositiveSmallIntegerField(db_index=True)),
+                ('band2', models.PositiveSmallIntegerField(db_index=True)),
+                ('band3', models.PositiveSmallIntegerField(db_index=True)),
+                ('band4', models.PositiveSmallIntegerField(db_index=True)),
+                ('band5', models.PositiveSmallIntegerField(db_index=True)),
+                ('band6', models.PositiveSmallIntegerField(db_index=True)),
+                ('band7', models.PositiveSmallIntegerField(db_index=True)),
+                ('image', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='perceptual_hash', to='wagtailimages.image', verbose_name='Immagine')),
+            ],
+            options={
+                'verbose_name': 'Hash immagine',
+                'verbose_name_plural': 'Hash immagini',
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TranslationMemory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_hash', models.CharField(max_length=64, verbose_name='Hash sorgente')),
+                ('source_lang', models.CharField(max_length=10, verbose_name='Lingua sorgente')),
+                ('target_lang', models.CharField(max_length=10, verbose_name='Lingua destinazione')),
+                ('source_text', models.TextField(verbose_name='Testo sorgente')),
+                ('translated_text', models.TextField(verbose_name='Traduzione')),
+                ('provider', models.CharField(max_length=20, verbose_name='Provider')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Aggiornata il')),
+            ],
+            options={
+                'verbose_name': 'Memoria di traduzione',
+                'verbose_name_plural': 'Memoria di traduzione',
+                'unique_together': {('source_hash', 'source_lang', 'target_lang')},
+            },
+        ),
+    ]
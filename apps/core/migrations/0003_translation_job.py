@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_translation_memory'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TranslationJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task', models.CharField(max_length=50, verbose_name='Tipo')),
+                ('key', models.CharField(db_index=True, max_length=200, verbose_name='Chiave')),
+                ('payload', models.JSONField(blank=True, default=dict, verbose_name='Parametri')),
+                ('status', models.CharField(choices=[('queued', 'In coda'), ('running', 'In esecuzione'), ('done', 'Completato'), ('failed', 'Fallito')], default='queued', max_length=10, verbose_name='Stato')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Tentativi')),
+                ('run_after', models.DateTimeField(db_index=True, verbose_name='Eseguibile dal')),
+                ('locked_by', models.CharField(blank=True, max_length=100, verbose_name='Worker')),
+                ('locked_until', models.DateTimeField(blank=True, null=True, verbose_name='Lease fino a')),
+                ('last_error', models.TextField(blank=True, verbose_name='Ultimo errore')),
+                ('result', models.JSONField(blank=True, null=True, verbose_name='Risultato')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Creato il')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Aggiornato il')),
+            ],
+            options={
+                'verbose_name': 'Lavoro di traduzione',
+                'verbose_name_plural': 'Lavori di traduzione',
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status', 'queued')), fields=('key',), name='core_translationjob_one_queued_per_key')],
+            },
+        ),
+    ]
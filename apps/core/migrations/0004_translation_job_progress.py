@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_translation_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='translationjob',
+            name='progress',
+            field=models.JSONField(blank=True, null=True, verbose_name='Avanzamento'),
+        ),
+    ]
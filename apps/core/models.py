@@ -0,0 +1,118 @@
+"""
+MC Castellazzo - Core Models
+============================
+Indice degli hash percettivi delle immagini (apps.core.image_dedup),
+memoria di traduzione (apps.core.translation_memory) e coda dei lavori di
+traduzione in background (apps.core.translation_queue).
+"""
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+from wagtail.images import get_image_model_string
+
+
+class ImageHash(models.Model):
+    """
+    Hash percettivo a 64 bit di un'immagine, diviso in 8 bande da 8 bit
+    indicizzate: due hash a distanza di Hamming <= 7 hanno almeno una banda
+    identica, quindi la ricerca dei quasi-duplicati usa gli indici invece
+    di confrontare tutta la tabella.
+    """
+
+    image = models.OneToOneField(
+        get_image_model_string(),
+        on_delete=models.CASCADE,
+        related_name="perceptual_hash",
+        verbose_name=_("Immagine"),
+    )
+    phash = models.BigIntegerField(verbose_name=_("Hash percettivo"))
+    band0 = models.PositiveSmallIntegerField(db_index=True)
+    band1 = models.PositiveSmallIntegerField(db_index=True)
+    band2 = models.PositiveSmallIntegerField(db_index=True)
+    band3 = models.PositiveSmallIntegerField(db_index=True)
+    band4 = models.PositiveSmallIntegerField(db_index=True)
+    band5 = models.PositiveSmallIntegerField(db_index=True)
+    band6 = models.PositiveSmallIntegerField(db_index=True)
+    band7 = models.PositiveSmallIntegerField(db_index=True)
+
+    class Meta:
+        verbose_name = _("Hash immagine")
+        verbose_name_plural = _("Hash immagini")
+
+    def __str__(self):
+        return f"{self.image_id}: {self.phash & 0xFFFFFFFFFFFFFFFF:016x}"
+
+
+class TranslationMemory(models.Model):
+    """
+    Traduzione automatica già ottenuta per un testo sorgente normalizzato
+    (spazi compressi, Unicode NFC), in una coppia di lingue. La chiave è lo
+    SHA-256 del testo: indice di lunghezza fissa anche per paragrafi lunghi.
+    """
+
+    source_hash = models.CharField(max_length=64, verbose_name=_("Hash sorgente"))
+    source_lang = models.CharField(max_length=10, verbose_name=_("Lingua sorgente"))
+    target_lang = models.CharField(max_length=10, verbose_name=_("Lingua destinazione"))
+    source_text = models.TextField(verbose_name=_("Testo sorgente"))
+    translated_text = models.TextField(verbose_name=_("Traduzione"))
+    provider = models.CharField(max_length=20, verbose_name=_("Provider"))
+    updated_at = models.DateTimeField(auto_now=True, verbose_name=_("Aggiornata il"))
+
+    class Meta:
+        verbose_name = _("Memoria di traduzione")
+        verbose_name_plural = _("Memoria di traduzione")
+        unique_together = [("source_hash", "source_lang", "target_lang")]
+
+    def __str__(self):
+        return f"[{self.source_lang}→{self.target_lang}] {self.source_text[:50]}"
+
+
+class TranslationJob(models.Model):
+    """
+    Lavoro di traduzione in background, eseguito da
+    ``manage.py translation_worker``. ``key`` identifica il lavoro (es.
+    ``pending:fr``): può esserci un solo lavoro in coda per chiave, quindi
+    accodarlo più volte non ha effetto.
+    """
+
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+
+    task = models.CharField(max_length=50, verbose_name=_("Tipo"))
+    key = models.CharField(max_length=200, db_index=True, verbose_name=_("Chiave"))
+    payload = models.JSONField(default=dict, blank=True, verbose_name=_("Parametri"))
+    status = models.CharField(
+        max_length=10,
+        choices=[
+            (STATUS_QUEUED, _("In coda")),
+            (STATUS_RUNNING, _("In esecuzione")),
+            (STATUS_DONE, _("Completato")),
+            (STATUS_FAILED, _("Fallito")),
+        ],
+        default=STATUS_QUEUED,
+        verbose_name=_("Stato"),
+    )
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name=_("Tentativi"))
+    run_after = models.DateTimeField(db_index=True, verbose_name=_("Eseguibile dal"))
+    locked_by = models.CharField(max_length=100, blank=True, verbose_name=_("Worker"))
+    locked_until = models.DateTimeField(null=True, blank=True, verbose_name=_("Lease fino a"))
+    last_error = models.TextField(blank=True, verbose_name=_("Ultimo errore"))
+    progress = models.JSONField(null=True, blank=True, verbose_name=_("Avanzamento"))
+    result = models.JSONField(null=True, blank=True, verbose_name=_("Risultato"))
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("Creato il"))
+    updated_at = models.DateTimeField(auto_now=True, verbose_name=_("Aggiornato il"))
+
+    class Meta:
+        verbose_name = _("Lavoro di traduzione")
+        verbose_name_plural = _("Lavori di traduzione")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["key"],
+                condition=models.Q(status="queued"),
+                name="core_translationjob_one_queued_per_key",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.key} ({self.status})"
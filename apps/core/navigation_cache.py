@@ -0,0 +1,216 @@
+"""
+MC Castellazzo - Navigation Snapshot Cache
+==========================================
+Snapshot per (site, lingua) di navbar, footer e URL delle pagine principali,
+salvato nella cache condivisa (settings.CACHES["default"]).
+
+I context processor ``navigation`` e ``main_pages`` girano ad ogni render
+Jinja2 e senza cache costano ~10 query (Locale, Navbar/Footer ``.first()``,
+7 pagine principali + risoluzione ``.url``). Questi dati cambiano solo quando
+un editor pubblica, quindi lo snapshot viene:
+
+- costruito alla prima richiesta dopo un'invalidazione (cache miss);
+- invalidato su ``page_published`` / ``page_unpublished``, su spostamento e
+  cancellazione di pagine (gli URL salvati cambiano) e su ``post_save`` /
+  ``post_delete`` degli snippet Navbar e Footer.
+
+Lo snapshot contiene solo tipi semplici (dict/list/str), quindi è
+serializzabile su qualsiasi backend di cache e nei template Jinja2 si usa
+esattamente come gli oggetti originali (``navbar.menu_items``,
+``item.value.url``, ``footer.columns``, ``main_pages.events``...).
+
+Chiave: ``navigation_snapshot:<site_id>:<lang>``.
+"""
+from __future__ import annotations
+
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from wagtail.models import Locale, Page, Site
+from wagtail.signals import page_published, page_unpublished, post_page_move
+
+from apps.website.models import Footer, Navbar
+
+logger = logging.getLogger(__name__)
+
+_CACHE_KEY_PREFIX = "navigation_snapshot"
+# Rete di sicurezza: anche senza segnali lo snapshot non vive oltre 24h
+_SNAPSHOT_TTL_SECONDS = 24 * 3600
+
+# Chiavi di main_pages → nome del modello pagina in apps.website.models
+MAIN_PAGE_MODELS = {
+    "home": "HomePage",
+    "events": "EventsPage",
+    "events_archive": "EventsArchivePage",
+    "about": "AboutPage",
+    "contact": "ContactPage",
+    "privacy": "PrivacyPage",
+    "news": "NewsIndexPage",
+}
+
+
+def _cache_key(site_id, lang_code: str) -> str:
+    return f"{_CACHE_KEY_PREFIX}:{site_id}:{lang_code}"
+
+
+def _empty_main_pages() -> dict:
+    return dict.fromkeys(MAIN_PAGE_MODELS)
+
+
+def _resolve_locale(lang_code: str):
+    """Locale per la lingua richiesta con fallback su italiano (o None)."""
+    try:
+        return Locale.objects.get(language_code=lang_code)
+    except Locale.DoesNotExist:
+        try:
+            return Locale.objects.get(language_code="it")
+        except Locale.DoesNotExist:
+            return None
+
+
+def _serialize_link(value) -> dict:
+    """LinkStructValue (NavbarLinkBlock) → dict con URL già risolto."""
+    return {
+        "url": value.url,
+        "button_title": value.get("button_title"),
+        "icon": value.get("icon"),
+    }
+
+
+def _serialize_navbar(navbar) -> dict | None:
+    if navbar is None:
+        return None
+    menu_items = []
+    for item in navbar.menu_items:
+        if item.block_type == "link":
+            value = _serialize_link(item.value)
+        elif item.block_type == "dropdown":
+            value = {
+                "title": item.value.get("title"),
+                "icon": item.value.get("icon"),
+                "links": [_serialize_link(link) for link in item.value.get("links", [])],
+            }
+        else:
+            continue
+        menu_items.append({"block_type": item.block_type, "value": value})
+    return {"name": navbar.name, "menu_items": menu_items}
+
+
+def _serialize_footer(footer) -> dict | None:
+    if footer is None:
+        return None
+    columns = [
+        {
+            "block_type": column.block_type,
+            "value": {
+                "title": column.value.get("title"),
+                "links": [_serialize_link(link) for link in column.value.get("links", [])],
+            },
+        }
+        for column in footer.columns
+    ]
+    social_links = [
+        {
+            "block_type": social.block_type,
+            "value": {
+                "platform": social.value.get("platform"),
+                "url": social.value.get("url"),
+            },
+        }
+        for social in footer.social_links
+    ]
+    return {
+        "name": footer.name,
+        "tagline": footer.tagline,
+        "columns": columns,
+        "social_links": social_links,
+        "copyright_text": footer.copyright_text,
+    }
+
+
+def _main_page_urls(site, locale) -> dict:
+    from apps.website import models as website_models
+
+    pages = _empty_main_pages()
+    for key, model_name in MAIN_PAGE_MODELS.items():
+        model = getattr(website_models, model_name)
+        page = model.objects.filter(locale=locale).live().first()
+        if page:
+            pages[key] = page.get_url(current_site=site)
+    return pages
+
+
+def build_navigation_snapshot(site, lang_code: str, locale=None) -> dict:
+    """
+    Costruisce (senza cache) lo snapshot di navigazione per site e lingua.
+
+    Args:
+        locale: Locale già risolto per ``lang_code`` (se None viene cercato).
+
+    Returns:
+        dict con chiavi ``navbar``, ``footer`` (dict o None) e ``main_pages``.
+    """
+    if locale is None:
+        locale = _resolve_locale(lang_code)
+    if locale is None:
+        return {"navbar": None, "footer": None, "main_pages": _empty_main_pages()}
+
+    navbar = Navbar.objects.filter(is_active=True, locale=locale).first()
+    footer = Footer.objects.filter(is_active=True, locale=locale).first()
+    return {
+        "navbar": _serialize_navbar(navbar),
+        "footer": _serialize_footer(footer),
+        "main_pages": _main_page_urls(site, locale) if site else _empty_main_pages(),
+    }
+
+
+def get_navigation_snapshot(site, lang_code: str, resolve_locale=None) -> dict:
+    """
+    Snapshot dalla cache condivisa, ricostruito solo in caso di miss.
+
+    Args:
+        resolve_locale: callable opzionale che restituisce il Locale della
+            lingua; chiamato solo su cache miss (es. ``SiteContext.locale``).
+    """
+    key = _cache_key(getattr(site, "pk", None), lang_code)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        locale = resolve_locale() if resolve_locale else None
+        snapshot = build_navigation_snapshot(site, lang_code, locale=locale)
+        cache.set(key, snapshot, timeout=_SNAPSHOT_TTL_SECONDS)
+    return snapshot
+
+
+def invalidate_navigation_snapshots() -> None:
+    """Elimina gli snapshot di tutti i site e di tutte le lingue."""
+    site_ids = [*Site.objects.values_list("pk", flat=True), None]
+    lang_codes = [code for code, _name in settings.LANGUAGES]
+    cache.delete_many([_cache_key(site_id, lang) for site_id in site_ids for lang in lang_codes])
+    logger.debug("Navigation snapshots invalidated")
+
+
+# ---------------------------------------------------------------------------
+# Signal receivers
+# ---------------------------------------------------------------------------
+
+@receiver(page_published)
+@receiver(page_unpublished)
+@receiver(post_page_move)
+def _on_page_publish_change(sender, instance, **kwargs):
+    invalidate_navigation_snapshots()
+
+
+@receiver(post_delete, sender=Page)
+def _on_page_delete(sender, instance, **kwargs):
+    invalidate_navigation_snapshots()
+
+
+@receiver(post_save, sender=Navbar)
+@receiver(post_save, sender=Footer)
+@receiver(post_delete, sender=Navbar)
+@receiver(post_delete, sender=Footer)
+def _on_navigation_snippet_change(sender, instance, **kwargs):
+    invalidate_navigation_snapshots()
@@ -0,0 +1,85 @@
+"""
+MC Castellazzo - Organization Snapshot Cache
+============================================
+Snapshot per site dei dati Organization (schema.org) usati da quasi tutti i
+JSON-LD tramite ``apps.core.seo.get_organization_data``.
+
+Costruire i dati costa SeoSettings + SiteSettings, la rendition ``original``
+del logo, la ``fill-1200x630`` dell'immagine e la conversione degli orari;
+``NewsIndexPage`` lo faceva una volta per ogni elemento della lista. Lo
+snapshot viene costruito una volta (con ``geo`` e ``sameAs``; i chiamanti
+li tolgono se non servono), salvato nella cache condivisa fra i worker e
+invalidato su:
+
+- save dei settings (SeoSettings, SiteSettings, ...) e dei Site;
+- save/delete di immagini (logo o immagine org sostituiti o rimossi).
+
+Ogni lettura dalla cache restituisce un oggetto nuovo (i backend di Django
+serializzano i valori), quindi lo snapshot condiviso non può essere
+modificato dai chiamanti.
+
+Chiave: ``organization_snapshot:<site_id>``.
+"""
+from __future__ import annotations
+
+import logging
+
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from wagtail.contrib.settings.models import BaseGenericSetting, BaseSiteSetting
+from wagtail.images import get_image_model
+from wagtail.models import Site
+
+logger = logging.getLogger(__name__)
+
+_CACHE_KEY_PREFIX = "organization_snapshot"
+# Rete di sicurezza: anche senza segnali lo snapshot non vive oltre 24h
+_SNAPSHOT_TTL_SECONDS = 24 * 3600
+
+
+def _cache_key(site_id) -> str:
+    return f"{_CACHE_KEY_PREFIX}:{site_id}"
+
+
+def get_organization_snapshot(site_id, resolve_site) -> dict:
+    """
+    Dati Organization del site dalla cache condivisa, ricostruiti solo su miss.
+
+    Args:
+        site_id: pk del Site (None se la pagina non appartiene a un site)
+        resolve_site: callable che restituisce il Site; chiamato solo su
+            cache miss (es. ``page.get_site``, che costa una query)
+    """
+    from apps.core.seo import build_organization_data
+
+    if site_id is None:
+        return build_organization_data(resolve_site())
+    key = _cache_key(site_id)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = build_organization_data(resolve_site())
+        cache.set(key, snapshot, timeout=_SNAPSHOT_TTL_SECONDS)
+    return snapshot
+
+
+def invalidate_organization_snapshots() -> None:
+    """Elimina lo snapshot di tutti i site."""
+    cache.delete_many([_cache_key(site_id) for site_id in Site.objects.values_list("pk", flat=True)])
+    logger.debug("Organization snapshots invalidated")
+
+
+# ---------------------------------------------------------------------------
+# Signal receivers
+# ---------------------------------------------------------------------------
+
+@receiver(post_save)
+def _on_settings_save(sender, instance, **kwargs):
+    if issubclass(sender, (BaseSiteSetting, BaseGenericSetting, Site)):
+        invalidate_organization_snapshots()
+
+
+@receiver(post_save, sender=get_image_model())
+@receiver(post_delete, sender=get_image_model())
+def _on_image_change(sender, instance, **kwargs):
+    invalidate_organization_snapshots()
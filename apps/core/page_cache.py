@@ -0,0 +1,117 @@
+"""
+MC Castellazzo - Full-Page Cache
+================================
+Cache delle pagine intere per le GET anonime, basata su ``wagtailcache``
+(``FetchFromCacheMiddleware`` in fondo allo stack, ``UpdateCacheMiddleware``
+subito dopo WhiteNoise).
+
+Chiave: quella di Django (``get_cache_key``), cioè URL assoluto con path e
+query string (meno i parametri di tracking in ``WAGTAIL_CACHE_IGNORE_QS``),
+lingua attiva e header in ``Vary``. Il prefisso lingua (``/it/``, ``/en/``...)
+fa parte del path, quindi ogni traduzione ha la propria entry.
+
+Bypass (oltre a quelli di wagtailcache: metodi diversi da GET/HEAD, utenti
+autenticati, anteprime, risposte ``no-cache``/``private``):
+- risposte che hanno usato il token CSRF (form contatti, login...): il
+  token mascherato nell'HTML è legato al cookie del singolo visitatore;
+- risposte che impostano cookie (sessione, messaggi, CSRF).
+Queste vengono marcate ``Cache-Control: private``, così non le salvano
+neanche proxy/CDN a valle.
+
+La cache usa un backend dedicato (``WAGTAIL_CACHE_BACKEND = "pagecache"``),
+quindi il purge svuota solo le pagine e non snapshot/indici/lock in
+``default``. Purge completo su:
+- publish/unpublish/spostamento/cancellazione di pagine;
+- save/delete degli snippet Navbar, Footer, SimpleCarousel, GalleryCategory;
+- save/delete e modifica dei tag delle immagini: le gallerie da collezione
+  (e hero, card, loghi) le leggono al render, quindi foto nuove dal bulk
+  upload comparirebbero solo alla scadenza della cache e quelle cancellate
+  resterebbero come rendition rotte;
+- save dei settings (``BaseSiteSetting``/``BaseGenericSetting``, es.
+  SiteSettings e SeoSettings).
+
+I segnali coprono anche publish fatti fuori dall'admin (archiviazione eventi,
+traduzioni in background, publish programmati), che gli hook admin di
+coderedcms non vedono.
+
+Per disabilitare: ``WAGTAIL_CACHE = False`` nei settings (default in dev).
+"""
+from __future__ import annotations
+
+import logging
+
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils.cache import patch_cache_control
+from wagtail.contrib.settings.models import BaseGenericSetting, BaseSiteSetting
+from wagtail.images import get_image_model
+from wagtail.models import Page
+from wagtail.signals import page_published, page_unpublished, post_page_move
+from wagtailcache.cache import UpdateCacheMiddleware, clear_cache
+
+from apps.website.models import Footer, GalleryCategory, Navbar, SimpleCarousel
+
+logger = logging.getLogger(__name__)
+
+Image = get_image_model()
+
+# Snippet che finiscono nell'HTML di più pagine (layout, home, gallerie)
+PURGE_SNIPPET_MODELS = (Navbar, Footer, SimpleCarousel, GalleryCategory)
+
+
+def is_response_personalized(request, response) -> bool:
+    """True se la risposta contiene dati legati al singolo visitatore."""
+    return bool(request.META.get("CSRF_COOKIE_USED") or response.cookies)
+
+
+class PageCacheUpdateMiddleware(UpdateCacheMiddleware):
+    """
+    ``UpdateCacheMiddleware`` di wagtailcache che non salva mai risposte
+    personalizzate (token CSRF o cookie impostati).
+    """
+
+    def process_response(self, request, response):
+        if is_response_personalized(request, response):
+            patch_cache_control(response, private=True)
+        return super().process_response(request, response)
+
+
+def purge_page_cache() -> None:
+    """Svuota la cache delle pagine (no-op se WAGTAIL_CACHE è False)."""
+    clear_cache()
+    logger.debug("Full-page cache purged")
+
+
+# ---------------------------------------------------------------------------
+# Signal receivers
+# ---------------------------------------------------------------------------
+
+@receiver(page_published)
+@receiver(page_unpublished)
+@receiver(post_page_move)
+def _on_page_tree_change(sender, instance, **kwargs):
+    purge_page_cache()
+
+
+@receiver(post_delete, sender=Page)
+def _on_page_delete(sender, instance, **kwargs):
+    purge_page_cache()
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def _on_snippet_or_settings_change(sender, instance, **kwargs):
+    if issubclass(sender, PURGE_SNIPPET_MODELS + (BaseSiteSetting, BaseGenericSetting)):
+        purge_page_cache()
+
+
+@receiver(post_save, sender=Image)
+@receiver(post_delete, sender=Image)
+def _on_image_change(sender, instance, **kwargs):
+    purge_page_cache()
+
+
+@receiver(m2m_changed)
+def _on_image_tags_change(sender, instance, action, **kwargs):
+    if isinstance(instance, Image) and action in ("post_add", "post_remove", "post_clear"):
+        purge_page_cache()
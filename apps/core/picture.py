@@ -0,0 +1,256 @@
+"""
+MC Castellazzo - Responsive Images
+==================================
+Global Jinja2 ``picture()``: da una filter spec "base" (quella che il
+template usava per l'``<img>``) genera un ``<picture>`` con sorgenti AVIF
+(se Pillow sa scriverle) e WebP e ``srcset`` a più larghezze, così un
+telefono scarica 640px invece dell'hero da 1280px:
+
+    {{ picture(page.image, 'width-1280|format-webp', sizes='100vw', alt='') }}
+
+- varianti: larghezze ``PICTURE_WIDTHS`` minori della base, più la base;
+  ``fill-WxH`` e ``max-WxH`` mantengono le proporzioni (e il ``-cNN``);
+  altre operazioni (``original``, ``height-N``...) restano a larghezza unica;
+- ``<img>`` di fallback: la spec base invariata (stessa rendition di prima);
+- ``picture_specs(spec)`` restituisce tutte le spec coinvolte: i modelli
+  pagina le mettono in ``rendition_specs``, così la pre-generazione in
+  background (apps.core.renditions) e ``attach_renditions`` nelle liste le
+  coprono e il render non crea rendition né fa query in più.
+
+AVIF: Pillow < 11.2 non ha un encoder AVIF; viene usato se registrato
+(Pillow nativo o ``pillow-avif-plugin``), altrimenti la sorgente AVIF viene
+omessa. ``PICTURE_AVIF_ENABLED = False`` lo disattiva comunque.
+
+``estimate_image_bytes(html, ...)`` stima i byte immagine scaricati da un
+browser per una pagina renderizzata (comando ``image_weight_report``).
+"""
+from __future__ import annotations
+
+import logging
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from html.parser import HTMLParser
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils.html import format_html, format_html_join
+from django.utils.safestring import mark_safe
+from wagtail.images.models import SourceImageIOError
+from wagtail.images.shortcuts import get_rendition_or_not_found
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WIDTHS = (320, 640, 960, 1280, 1600)
+
+# (mime type, operazioni di formato) in ordine di preferenza del browser
+AVIF_FORMAT = ("image/avif", "format-avif|avifquality-60")
+WEBP_FORMAT = ("image/webp", "format-webp|webpquality-85")
+
+_RESIZE_RE = re.compile(r"^(?P<op>width|fill|max)-(?P<w>\d+)(?:x(?P<h>\d+))?(?P<crop>-c\d+)?$")
+
+
+@lru_cache(maxsize=1)
+def avif_supported() -> bool:
+    """True se Pillow ha un encoder AVIF registrato."""
+    from PIL import Image as PILImage
+
+    try:
+        import pillow_avif  # noqa: F401 - registra il plugin all'import
+    except ImportError:
+        pass
+    PILImage.init()
+    return "AVIF" in PILImage.SAVE
+
+
+def _source_formats() -> list[tuple[str, str]]:
+    formats = []
+    if getattr(settings, "PICTURE_AVIF_ENABLED", True) and avif_supported():
+        formats.append(AVIF_FORMAT)
+    formats.append(WEBP_FORMAT)
+    return formats
+
+
+def _resize_variants(operation: str, widths) -> list[str]:
+    """Operazioni di resize alle larghezze ``widths`` (più la base)."""
+    match = _RESIZE_RE.match(operation)
+    if not match:
+        return [operation]
+    base_width = int(match["w"])
+    height = int(match["h"]) if match["h"] else None
+    variants = []
+    for width in sorted({w for w in widths if w < base_width} | {base_width}):
+        if height is None:
+            variants.append(f"{match['op']}-{width}")
+        else:
+            scaled = max(1, round(height * width / base_width))
+            variants.append(f"{match['op']}-{width}x{scaled}{match['crop'] or ''}")
+    return variants
+
+
+def picture_sources(spec: str, widths=None) -> list[tuple[str, list[str]]]:
+    """
+    Sorgenti del ``<picture>``: [(mime type, [spec per larghezza]), ...].
+    """
+    widths = widths or getattr(settings, "PICTURE_WIDTHS", DEFAULT_WIDTHS)
+    variants = _resize_variants(spec.split("|")[0], widths)
+    return [
+        (mime, [f"{variant}|{format_ops}" for variant in variants])
+        for mime, format_ops in _source_formats()
+    ]
+
+
+def picture_specs(spec: str, widths=None) -> tuple[str, ...]:
+    """Tutte le filter spec usate da ``picture(image, spec)``: fallback + sorgenti."""
+    specs = {spec: None}
+    for _mime, source_specs in picture_sources(spec, widths):
+        specs.update(dict.fromkeys(source_specs))
+    return tuple(specs)
+
+
+def _attrs_html(attrs: dict) -> str:
+    return format_html_join(" ", '{}="{}"', ((name, value) for name, value in attrs.items() if value is not None))
+
+
+def picture(image, spec: str, widths=None, sizes: str = "100vw", **attrs):
+    """
+    ``<picture>`` responsive per ``image``.
+
+    Args:
+        image: istanza Image (None → stringa vuota)
+        spec: filter spec base, es. ``"width-1280|format-webp"``
+        widths: larghezze delle varianti (default ``PICTURE_WIDTHS``)
+        sizes: attributo ``sizes`` delle sorgenti
+        **attrs: attributi dell'``<img>`` (``alt``, ``class``...); default
+            ``loading="lazy"`` e ``decoding="async"``
+    """
+    if not image:
+        return ""
+    sources = picture_sources(spec, widths)
+    img_attrs = {"alt": image.default_alt_text, "loading": "lazy", "decoding": "async", **attrs}
+    try:
+        renditions = image.get_renditions(*picture_specs(spec, widths))
+    except SourceImageIOError:
+        # File sorgente mancante: <img> segnaposto come il global image()
+        fallback = get_rendition_or_not_found(image, spec)
+        return format_html('<img src="{}" {}>', fallback.url, _attrs_html(img_attrs))
+
+    source_tags = []
+    for mime, source_specs in sources:
+        candidates = {}
+        for source_spec in source_specs:
+            rendition = renditions[source_spec]
+            # Originale più piccolo delle varianti: stessa larghezza, una sola voce
+            candidates.setdefault(rendition.width, rendition.url)
+        srcset = ", ".join(f"{url} {width}w" for width, url in sorted(candidates.items()))
+        source_tags.append(format_html('<source type="{}" srcset="{}" sizes="{}">', mime, srcset, sizes))
+
+    fallback = renditions[spec]
+    img_tag = format_html(
+        '<img src="{}" width="{}" height="{}" {}>',
+        fallback.url, fallback.width, fallback.height, _attrs_html(img_attrs),
+    )
+    return mark_safe("<picture>" + "".join(source_tags) + img_tag + "</picture>")
+
+
+# ---------------------------------------------------------------------------
+# Stima dei byte scaricati
+# ---------------------------------------------------------------------------
+
+@dataclass
+class _ImageElement:
+    src: str = ""
+    sources: list[tuple[str, str, str]] = field(default_factory=list)  # (type, srcset, sizes)
+
+
+class _ImageCollector(HTMLParser):
+    """Raccoglie ``<img>`` e le ``<source>`` del ``<picture>`` che le contiene."""
+
+    def __init__(self):
+        super().__init__()
+        self.images: list[_ImageElement] = []
+        self._sources = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "picture":
+            self._sources = []
+        elif tag == "source" and self._sources is not None:
+            self._sources.append((attrs.get("type", ""), attrs.get("srcset", ""), attrs.get("sizes", "100vw")))
+        elif tag == "img" and attrs.get("src"):
+            self.images.append(_ImageElement(src=attrs["src"], sources=self._sources or []))
+
+    def handle_endtag(self, tag):
+        if tag == "picture":
+            self._sources = None
+
+
+def _slot_width(sizes: str, viewport: int) -> float:
+    """Larghezza dello slot da ``sizes`` (media ``min-width``/``max-width``, px e vw)."""
+    for entry in (part.strip() for part in sizes.split(",")):
+        condition, _, length = entry.rpartition(" ")
+        condition = condition.strip()
+        query = re.match(r"\((min|max)-width:\s*(\d+)px\)", condition)
+        if condition and query:
+            limit = int(query[2])
+            if (query[1] == "min" and viewport < limit) or (query[1] == "max" and viewport > limit):
+                continue
+        if length.endswith("vw"):
+            return viewport * float(length[:-2]) / 100
+        if length.endswith("px"):
+            return float(length[:-2])
+    return float(viewport)
+
+
+def _pick_candidate(srcset: str, needed: float) -> str:
+    """Come il browser: la candidata più piccola larga almeno ``needed``."""
+    candidates = []
+    for item in srcset.split(","):
+        parts = item.split()
+        if len(parts) == 2 and parts[1].endswith("w"):
+            candidates.append((int(parts[1][:-1]), parts[0]))
+    if not candidates:
+        return ""
+    candidates.sort()
+    for width, url in candidates:
+        if width >= needed:
+            return url
+    return candidates[-1][1]
+
+
+def _url_bytes(url: str) -> int | None:
+    media_url = settings.MEDIA_URL
+    if not url.startswith(media_url):
+        return None
+    try:
+        return default_storage.size(url[len(media_url):])
+    except OSError:
+        return None
+
+
+def estimate_image_bytes(html: str, viewport: int, dpr: float = 1, mime_types=("image/avif", "image/webp")) -> dict:
+    """
+    Byte immagine scaricati da un browser con la viewport data.
+
+    Returns:
+        dict con ``images`` (elementi ``<img>``), ``bytes`` (con srcset e
+        formati supportati), ``fallback_bytes`` (solo ``src`` degli ``<img>``,
+        cioè la rendition fissa usata prima dei ``<picture>``) e ``unknown``
+        (URL non nel MEDIA_ROOT, esclusi dai totali).
+    """
+    parser = _ImageCollector()
+    parser.feed(html)
+    report = {"images": len(parser.images), "bytes": 0, "fallback_bytes": 0, "unknown": 0}
+    for element in parser.images:
+        chosen = element.src
+        for mime, srcset, sizes in element.sources:
+            if mime in mime_types:
+                chosen = _pick_candidate(srcset, _slot_width(sizes, viewport) * dpr) or element.src
+                break
+        size, fallback_size = _url_bytes(chosen), _url_bytes(element.src)
+        if size is None or fallback_size is None:
+            report["unknown"] += 1
+            continue
+        report["bytes"] += size
+        report["fallback_bytes"] += fallback_size
+    return report
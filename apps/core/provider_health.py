@@ -0,0 +1,243 @@
+"""
+MC Castellazzo - Provider Health
+================================
+Stato dei provider di traduzione automatica in ogni processo worker:
+circuit breaker e statistiche di latenza/successo usate per ordinare la
+catena di fallback di ``DeepTranslatorMachineTranslator``.
+
+- circuit breaker: dopo ``MACHINE_TRANSLATION_BREAKER_FAILURES`` (3) errori
+  o timeout consecutivi il provider viene escluso (``open``) per
+  ``MACHINE_TRANSLATION_BREAKER_SECONDS`` (30); poi passa
+  ``half_open`` e una sola chiamata di prova decide se richiuderlo o
+  riaprirlo con attesa raddoppiata (fino a ``MAX_OPEN_SECONDS``). Un
+  provider che va in timeout costa così ``HTTP_TIMEOUT`` poche volte, non
+  una volta per stringa;
+- ordine: costo atteso per chiamata = latenza media (EWMA) + tasso di
+  errore × timeout; a parità vale l'ordine di ``PROVIDERS``. Le statistiche
+  invecchiano verso il valore iniziale (``STATS_HALF_LIFE``), quindi un
+  provider scavalcato viene riprovato;
+- monitoraggio: ``snapshot()`` per il processo corrente; ogni processo
+  pubblica il proprio in cache (``get_published()``), letto dalla view
+  admin ``/admin/translator-status/``.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+# Default di MACHINE_TRANSLATION_BREAKER_FAILURES / _BREAKER_SECONDS
+FAILURE_THRESHOLD = 3
+OPEN_SECONDS = 30
+MAX_OPEN_SECONDS = 600
+# Statistiche: media mobile esponenziale, pesata per numero e età dei campioni
+EWMA_ALPHA = 0.2
+MIN_SAMPLES = 5
+STATS_HALF_LIFE = 600
+# Latenza ipotizzata per un provider mai osservato (secondi)
+PRIOR_LATENCY = 1.0
+
+_CACHE_KEY = "translator_health"
+_PUBLISH_INTERVAL = 10
+_STALE_SECONDS = 3600
+
+
+def _failure_threshold() -> int:
+    return getattr(settings, "MACHINE_TRANSLATION_BREAKER_FAILURES", FAILURE_THRESHOLD)
+
+
+def _open_seconds() -> float:
+    return getattr(settings, "MACHINE_TRANSLATION_BREAKER_SECONDS", OPEN_SECONDS)
+
+
+class ProviderUnavailable(Exception):
+    """Circuit breaker aperto: il provider non va chiamato."""
+
+
+class ProviderHealth:
+    """Circuit breaker e statistiche di un provider (protetti da ``_lock``)."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.state = STATE_CLOSED
+        self.consecutive_failures = 0
+        self.open_seconds = _open_seconds()
+        self.opened_until = 0.0
+        self.probe_in_flight = False
+        self.latency = PRIOR_LATENCY
+        self.failure_rate = 0.0
+        self.samples = 0
+        self.last_sample = 0.0
+        self.last_error = ""
+
+    def _refresh(self, now: float) -> None:
+        if self.state == STATE_OPEN and now >= self.opened_until:
+            self.state = STATE_HALF_OPEN
+            self.probe_in_flight = False
+
+    def available(self, now: float) -> bool:
+        self._refresh(now)
+        if self.state == STATE_OPEN:
+            return False
+        return not (self.state == STATE_HALF_OPEN and self.probe_in_flight)
+
+    def acquire(self, now: float) -> bool:
+        if not self.available(now):
+            return False
+        if self.state == STATE_HALF_OPEN:
+            self.probe_in_flight = True
+        return True
+
+    def _sample(self, latency: float | None, failed: bool, now: float) -> None:
+        if latency is not None:
+            self.latency = latency if self.samples == 0 else (1 - EWMA_ALPHA) * self.latency + EWMA_ALPHA * latency
+        self.failure_rate = (1 - EWMA_ALPHA) * self.failure_rate + EWMA_ALPHA * (1.0 if failed else 0.0)
+        self.samples += 1
+        self.last_sample = now
+
+    def success(self, latency: float, now: float) -> bool:
+        self._sample(latency, False, now)
+        changed = self.state != STATE_CLOSED
+        self.state = STATE_CLOSED
+        self.consecutive_failures = 0
+        self.open_seconds = _open_seconds()
+        self.probe_in_flight = False
+        return changed
+
+    def failure(self, error: str, now: float) -> bool:
+        self._sample(None, True, now)
+        self.last_error = error[:200]
+        self.consecutive_failures += 1
+        if self.state == STATE_HALF_OPEN:
+            # Prova fallita: di nuovo aperto, attesa raddoppiata
+            self.open_seconds = min(self.open_seconds * 2, MAX_OPEN_SECONDS)
+        elif self.consecutive_failures < _failure_threshold() or self.state == STATE_OPEN:
+            return False
+        self.state = STATE_OPEN
+        self.opened_until = now + self.open_seconds
+        self.probe_in_flight = False
+        return True
+
+    def cost(self, timeout: float, now: float) -> float:
+        """Secondi attesi per una chiamata, statistiche pesate verso il prior."""
+        weight = min(1.0, self.samples / MIN_SAMPLES)
+        if self.samples:
+            weight *= 0.5 ** ((now - self.last_sample) / STATS_HALF_LIFE)
+        latency = weight * self.latency + (1 - weight) * PRIOR_LATENCY
+        return latency + weight * self.failure_rate * timeout
+
+    def snapshot(self, now: float) -> dict:
+        self._refresh(now)
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "retry_in": max(0.0, round(self.opened_until - now, 1)) if self.state == STATE_OPEN else 0.0,
+            "latency_ms": round(self.latency * 1000) if self.samples else None,
+            "success_rate": round(1 - self.failure_rate, 3) if self.samples else None,
+            "samples": self.samples,
+            "last_error": self.last_error,
+        }
+
+
+_providers: dict[str, ProviderHealth] = {}
+_lock = threading.Lock()
+_last_publish = 0.0
+
+
+def _get(name: str) -> ProviderHealth:
+    health = _providers.get(name)
+    if health is None:
+        health = _providers[name] = ProviderHealth(name)
+    return health
+
+
+def order(providers, timeout: float) -> list[str]:
+    """
+    Provider utilizzabili (breaker non aperto), dal costo atteso più basso;
+    a parità, nell'ordine configurato.
+    """
+    now = time.monotonic()
+    with _lock:
+        ranked = [
+            (_get(name).cost(timeout, now), index, name)
+            for index, name in enumerate(providers)
+            if _get(name).available(now)
+        ]
+    return [name for _cost, _index, name in sorted(ranked)]
+
+
+def acquire(name: str) -> None:
+    """
+    Da chiamare prima di ogni richiesta al provider.
+
+    Raises:
+        ProviderUnavailable: breaker aperto, o prova half-open già in corso
+    """
+    with _lock:
+        if not _get(name).acquire(time.monotonic()):
+            raise ProviderUnavailable(name)
+
+
+def record_success(name: str, latency: float) -> None:
+    with _lock:
+        changed = _get(name).success(latency, time.monotonic())
+    if changed:
+        logger.info(f"[{name}] circuit breaker chiuso")
+    _publish(force=changed)
+
+
+def record_failure(name: str, error: str) -> None:
+    with _lock:
+        health = _get(name)
+        opened = health.failure(error, time.monotonic())
+        open_seconds = health.open_seconds
+    if opened:
+        logger.warning(f"[{name}] circuit breaker aperto per {open_seconds}s: {error[:80]}")
+    _publish(force=opened)
+
+
+def snapshot() -> dict[str, dict]:
+    """Stato di ogni provider osservato in questo processo."""
+    now = time.monotonic()
+    with _lock:
+        return {name: health.snapshot(now) for name, health in _providers.items()}
+
+
+def _publish(force: bool = False) -> None:
+    """Copia lo snapshot del processo in cache (al massimo ogni pochi secondi)."""
+    global _last_publish
+    now = time.monotonic()
+    if not force and now - _last_publish < _PUBLISH_INTERVAL:
+        return
+    _last_publish = now
+    try:
+        published = cache.get(_CACHE_KEY) or {}
+        wall = time.time()
+        published = {pid: entry for pid, entry in published.items() if wall - entry["updated"] < _STALE_SECONDS}
+        published[os.getpid()] = {"updated": wall, "providers": snapshot()}
+        cache.set(_CACHE_KEY, published, _STALE_SECONDS)
+    except Exception:  # noqa: BLE001 - il monitoraggio non deve bloccare la traduzione
+        logger.debug("provider_health: pubblicazione fallita", exc_info=True)
+
+
+def get_published() -> dict:
+    """Snapshot pubblicati dai processi worker: {pid: {updated, providers}}."""
+    return cache.get(_CACHE_KEY) or {}
+
+
+def reset() -> None:
+    """Azzera breaker e statistiche del processo (test)."""
+    global _last_publish
+    with _lock:
+        _providers.clear()
+    _last_publish = 0.0
@@ -0,0 +1,342 @@
+"""
+MC Castellazzo - Rendition Pre-generation
+=========================================
+Genera in background le rendition usate dai template, così il primo
+visitatore di una galleria nuova non aspetta centinaia di resize Pillow
+dentro un worker Gunicorn.
+
+Registry: ogni modello pagina dichiara ``rendition_specs``, le filter spec
+usate dal proprio template e dal JSON-LD (accanto a ``query_budget``).
+``get_registered_filter_specs()`` ne fa l'unione.
+
+Pipeline:
+- il caricamento massivo (``process_bulk_upload``, upload a pezzi) accoda
+  dopo il commit le immagini salvate con le sole rendition della
+  GalleryPage, che mostra le collezioni (``get_gallery_filter_specs()``):
+  le altre pagine usano poche immagini scelte a mano, generate al primo
+  render. ``"original"`` (copia a piena risoluzione) non è mai pre-generata;
+- un ``ThreadPoolExecutor`` per processo (``RENDITION_WORKERS`` thread)
+  genera solo le rendition mancanti (``find_existing_renditions`` +
+  ``create_renditions``, un'apertura del file per immagine);
+- la coda è limitata (``RENDITION_QUEUE_MAX``): oltre il limite l'immagine
+  viene saltata e la rendition sarà generata al primo render, come prima.
+
+Lo stato per immagine (in coda / in corso / completata / errore) è salvato
+nella cache condivisa e mostrato nella vista admin "Rendition", che conta
+le rendition presenti a DB e permette di rimettere in coda le mancanti.
+
+Per disabilitare: ``RENDITION_PREGENERATE_ENABLED = False`` nei settings
+(default nei test).
+
+Liste: ``prefetch_renditions_for(objects, specs)`` carica le immagini FK di
+una lista di oggetti (pagine evento, articoli...) e tutte le loro rendition
+con una query ciascuna, creando in blocco le mancanti. Il global Jinja2
+``image()`` chiama ``get_rendition``, che legge ``prefetched_renditions``
+senza altre query: le card di una lista costano un numero costante di query
+indipendente dal numero di elementi.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from wagtail.images import get_image_model
+from wagtail.images.models import Filter, SourceImageIOError
+
+logger = logging.getLogger(__name__)
+
+Image = get_image_model()
+
+_STATUS_KEY_PREFIX = "renditions:status"
+_STATUS_TTL_SECONDS = 24 * 3600
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+# Filter spec lasciate al render: "original" è una copia del file a piena
+# risoluzione, usata solo dal JSON-LD
+SKIP_PREGENERATE = frozenset({"original"})
+# Pagina che mostra le immagini delle collezioni (blocchi collection_gallery)
+GALLERY_PAGE_MODEL = "website.GalleryPage"
+
+_executor: ThreadPoolExecutor | None = None
+_lock = threading.Lock()
+# Id immagine in coda o in lavorazione in questo processo
+_pending: set[int] = set()
+
+
+# ---------------------------------------------------------------------------
+# Registry
+# ---------------------------------------------------------------------------
+
+def get_rendition_registry() -> dict[str, tuple[str, ...]]:
+    """
+    Filter spec dichiarate dai modelli pagina.
+
+    Returns:
+        ``{"website.GalleryPage": ("fill-400x400|...", ...), ...}``
+    """
+    from wagtail.models import get_page_models
+
+    return {
+        model._meta.label: tuple(model.rendition_specs)
+        for model in get_page_models()
+        if getattr(model, "rendition_specs", None)
+    }
+
+
+def get_registered_filter_specs() -> tuple[str, ...]:
+    """Unione delle filter spec del registry, senza duplicati."""
+    specs = {}
+    for model_specs in get_rendition_registry().values():
+        specs.update(dict.fromkeys(model_specs))
+    return tuple(specs)
+
+
+def get_gallery_filter_specs() -> tuple[str, ...]:
+    """Filter spec pre-generate per le immagini caricate nelle collezioni."""
+    return pregenerate_specs(get_rendition_registry().get(GALLERY_PAGE_MODEL, ()))
+
+
+def pregenerate_specs(specs) -> tuple[str, ...]:
+    """``specs`` senza duplicati e senza quelle lasciate al render."""
+    return tuple(spec for spec in dict.fromkeys(specs) if spec not in SKIP_PREGENERATE)
+
+
+# ---------------------------------------------------------------------------
+# Stato
+# ---------------------------------------------------------------------------
+
+def _status_key(image_id) -> str:
+    return f"{_STATUS_KEY_PREFIX}:{image_id}"
+
+
+def _set_status(image_id, state: str, **extra) -> None:
+    status = {"state": state, "updated": timezone.now().isoformat(), **extra}
+    cache.set(_status_key(image_id), status, timeout=_STATUS_TTL_SECONDS)
+
+
+def get_statuses(image_ids) -> dict[int, dict]:
+    """Ultimo stato noto per immagine (solo quelle passate dalla pipeline)."""
+    image_ids = list(image_ids)
+    found = cache.get_many([_status_key(image_id) for image_id in image_ids])
+    return {
+        image_id: found[_status_key(image_id)]
+        for image_id in image_ids
+        if _status_key(image_id) in found
+    }
+
+
+def get_pending_count() -> int:
+    """Immagini in coda o in lavorazione in questo processo."""
+    with _lock:
+        return len(_pending)
+
+
+# ---------------------------------------------------------------------------
+# Prefetch per le liste
+# ---------------------------------------------------------------------------
+
+def _has_prefetched(image, filters) -> bool:
+    prefetched = image._get_prefetched_renditions()
+    if prefetched is None:
+        return False
+    return {f.spec for f in filters} <= {rendition.filter_spec for rendition in prefetched}
+
+
+def attach_renditions(images, specs) -> None:
+    """
+    Collega a ogni immagine le rendition ``specs`` (``prefetched_renditions``)
+    con un'unica query, creando quelle mancanti.
+
+    Args:
+        images: istanze Image (None e duplicati ammessi)
+        specs: filter spec usate dal template
+    """
+    images = [image for image in images if image is not None]
+    if not images or not specs:
+        return
+    # Lista e non dict: istanze distinte della stessa immagine hanno lo stesso hash
+    filters_by_image = [
+        (image, list(dict.fromkeys(image.clean_filter_for_svg(Filter(spec=spec)) for spec in specs)))
+        for image in images
+    ]
+    # Già collegate (es. helper chiamato sia dal template sia dal JSON-LD)
+    filters_by_image = [
+        (image, filters) for image, filters in filters_by_image
+        if not _has_prefetched(image, filters)
+    ]
+    if not filters_by_image:
+        return
+    all_specs = {f.spec for _image, filters in filters_by_image for f in filters}
+
+    found = defaultdict(list)
+    for rendition in Image.get_rendition_model().objects.filter(
+        image_id__in={image.pk for image in images},
+        filter_spec__in=all_specs,
+    ):
+        found[rendition.image_id].append(rendition)
+
+    for image, filters in filters_by_image:
+        # Mantiene le rendition già caricate (es. prefetch_renditions)
+        previous = image._get_prefetched_renditions() or []
+        image.prefetched_renditions = list({r.pk: r for r in [*previous, *found[image.pk]]}.values())
+        getattr(image, "_prefetched_objects_cache", {}).pop("renditions", None)
+
+        existing = image.find_existing_renditions(*filters)
+        missing = [f for f in filters if f not in existing]
+        if missing:
+            try:
+                image.prefetched_renditions.extend(image.create_renditions(*missing).values())
+            except SourceImageIOError:
+                # File mancante: il template mostrerà il fallback di get_rendition
+                logger.warning("Renditions[%s]: file sorgente non leggibile", image.pk)
+
+
+def prefetch_renditions_for(objects, specs, fields=("image",)) -> list:
+    """
+    Carica le immagini FK ``fields`` di una lista di oggetti (una query) e le
+    loro rendition ``specs`` (una query).
+
+    Args:
+        objects: iterabile di istanze (anche di modelli diversi)
+        specs: filter spec usate dal template
+        fields: nomi dei ForeignKey a Image (es. ``("cover_image", "image")``)
+
+    Returns:
+        Gli oggetti come lista (i queryset vengono valutati).
+    """
+    objects = list(objects)
+    to_load = []
+    images = []
+    for obj in objects:
+        for field_name in fields:
+            try:
+                field = obj._meta.get_field(field_name)
+            except FieldDoesNotExist:
+                continue
+            if field.is_cached(obj):
+                images.append(getattr(obj, field_name))
+            elif getattr(obj, field.attname) is not None:
+                to_load.append((obj, field_name, getattr(obj, field.attname)))
+
+    if to_load:
+        loaded = Image.objects.in_bulk({image_id for _obj, _field, image_id in to_load})
+        for obj, field_name, image_id in to_load:
+            image = loaded.get(image_id)
+            setattr(obj, field_name, image)
+            images.append(image)
+
+    attach_renditions(images, specs)
+    return objects
+
+
+# ---------------------------------------------------------------------------
+# Generazione
+# ---------------------------------------------------------------------------
+
+def generate_renditions(image_id, specs) -> int:
+    """
+    Genera le rendition mancanti di un'immagine.
+
+    Args:
+        image_id: pk dell'immagine
+        specs: filter spec da generare
+
+    Returns:
+        Numero di rendition create (0 se erano già tutte presenti).
+    """
+    image = Image.objects.filter(pk=image_id).first()
+    if image is None:
+        return 0
+    filters = [image.clean_filter_for_svg(Filter(spec=spec)) for spec in specs]
+    filters = list(dict.fromkeys(filters))
+    existing = image.find_existing_renditions(*filters)
+    missing = [f for f in filters if f not in existing]
+    if missing:
+        image.create_renditions(*missing)
+    return len(missing)
+
+
+def _run(image_id, specs) -> None:
+    """Job del pool: isolato da errori, con connessione DB propria del thread."""
+    close_old_connections()
+    _set_status(image_id, STATUS_RUNNING)
+    try:
+        created = generate_renditions(image_id, specs)
+        _set_status(image_id, STATUS_DONE, created=created)
+        logger.debug("Renditions[%s]: %s create", image_id, created)
+    except SourceImageIOError as exc:
+        _set_status(image_id, STATUS_FAILED, error=str(exc))
+        logger.warning("Renditions[%s]: file sorgente non leggibile (%s)", image_id, exc)
+    except Exception as exc:  # noqa: BLE001
+        _set_status(image_id, STATUS_FAILED, error=str(exc))
+        logger.exception("Renditions[%s] failed", image_id)
+    finally:
+        with _lock:
+            _pending.discard(image_id)
+        close_old_connections()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, "RENDITION_WORKERS", 2),
+            thread_name_prefix="renditions",
+        )
+    return _executor
+
+
+def enqueue_renditions(image_ids, specs) -> int:
+    """
+    Mette in coda la generazione delle rendition ``specs`` delle immagini
+    (escluse ``SKIP_PREGENERATE``).
+
+    Le immagini già in coda vengono ignorate; oltre ``RENDITION_QUEUE_MAX``
+    le restanti vengono saltate (generate al primo render).
+
+    Returns:
+        Numero di immagini accodate.
+    """
+    if not getattr(settings, "RENDITION_PREGENERATE_ENABLED", True):
+        return 0
+    specs = pregenerate_specs(specs)
+    if not specs:
+        return 0
+    queue_max = getattr(settings, "RENDITION_QUEUE_MAX", 500)
+
+    queued = []
+    with _lock:
+        executor = _get_executor()
+        for image_id in image_ids:
+            if image_id in _pending:
+                continue
+            if len(_pending) >= queue_max:
+                logger.warning("Renditions: coda piena (%s), immagine %s saltata", queue_max, image_id)
+                continue
+            _pending.add(image_id)
+            queued.append(image_id)
+
+    for image_id in queued:
+        _set_status(image_id, STATUS_QUEUED)
+        executor.submit(_run, image_id, specs)
+    return len(queued)
+
+
+def enqueue_gallery_renditions(image_ids) -> None:
+    """Dopo il commit, accoda le rendition della galleria delle immagini caricate."""
+    image_ids = list(image_ids)
+    if image_ids:
+        # Il thread deve vedere l'immagine (e il file) a DB
+        transaction.on_commit(partial(enqueue_renditions, image_ids, get_gallery_filter_specs()))
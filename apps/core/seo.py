@@ -137,10 +137,17 @@ def get_social_urls(page) -> list:
     Returns:
         Lista di URL social per sameAs
     """
+    try:
+        return _social_urls_for_site(page.get_site())
+    except Exception:
+        return []
+
+
+def _social_urls_for_site(site) -> list:
+    """URL social (sameAs) da SiteSettings del site."""
     from apps.website.models import SiteSettings
     
     try:
-        site = page.get_site()
         settings = SiteSettings.for_site(site)
         
         urls = []
@@ -165,6 +172,11 @@ def get_organization_data(
     Ottiene i dati completi dell'organizzazione da SeoSettings.
     FONTE UNICA per tutti i dati organizzazione nel sito.
     
+    I dati vengono da uno snapshot per site in cache (vedi
+    apps.core.organization_cache): settings e rendition vengono letti una
+    volta sola, non ad ogni chiamata. Il dict restituito è una copia e può
+    essere modificato liberamente.
+    
     Args:
         page: Pagina Wagtail (per ottenere Site)
         include_social: Include sameAs con URL social
@@ -181,8 +193,25 @@ def get_organization_data(
         - struct_org_geo_lat/lng
         - struct_org_hours, struct_org_actions
     """
-    seo = get_seo_settings(page)
-    site = page.get_site()
+    from apps.core.organization_cache import get_organization_snapshot
+    
+    # Site id dalle site root path in cache: il Site si carica solo su miss
+    url_parts = page.get_url_parts()
+    site_id = url_parts[0] if url_parts else None
+    org_data = get_organization_snapshot(site_id, resolve_site=page.get_site)
+    if not include_social:
+        org_data.pop("sameAs", None)
+    if not include_geo:
+        org_data.pop("geo", None)
+    return org_data
+
+
+def build_organization_data(site) -> dict:
+    """
+    Costruisce (senza cache) i dati Organization completi di un site,
+    inclusi ``geo`` e ``sameAs``.
+    """
+    seo = get_seo_settings(site)
     
     # Tipo org - default SportsClub per un motoclub
     org_type = seo.struct_org_type or "SportsClub"
@@ -233,7 +262,7 @@ def get_organization_data(
             org_data["address"]["addressCountry"] = seo.struct_org_address_country
     
     # Coordinate geografiche
-    if include_geo and seo.struct_org_geo_lat and seo.struct_org_geo_lng:
+    if seo.struct_org_geo_lat and seo.struct_org_geo_lng:
         org_data["geo"] = {
             "@type": "GeoCoordinates",
             "latitude": float(seo.struct_org_geo_lat),
@@ -285,10 +314,9 @@ def get_organization_data(
         pass
     
     # URL social (sameAs)
-    if include_social:
-        same_as = get_social_urls(page)
-        if same_as:
-            org_data["sameAs"] = same_as
+    same_as = _social_urls_for_site(site)
+    if same_as:
+        org_data["sameAs"] = same_as
     
     return org_data
 
@@ -327,8 +355,19 @@ class JsonLdMixin:
     {% if page.get_json_ld is defined %}
     <script type="application/ld+json">{{ page.get_json_ld() }}</script>
     {% endif %}
+    
+    Cache:
+    ------
+    Il JSON-LD serializzato è in cache per revisione live e locale (vedi
+    apps.core.json_ld_cache). Le pagine il cui JSON-LD dipende da altro
+    lo dichiarano:
+    - json_ld_vary_on_date: dipende dalla data odierna
+    - json_ld_vary_on_params: parametri GET usati (es. ("q", "tag"))
     """
     
+    json_ld_vary_on_date: bool = False
+    json_ld_vary_on_params: tuple[str, ...] = ()
+    
     def get_json_ld_type(self) -> str:
         """
         Ritorna il tipo schema.org primario.
@@ -360,13 +399,10 @@ class JsonLdMixin:
         Returns:
             String JSON-LD (safe per template)
         """
+        from apps.core.json_ld_cache import get_cached_json_ld
+        
         try:
-            data = {
-                "@context": "https://schema.org",
-                "@type": self.get_json_ld_type(),
-                **self.get_json_ld_data(request),
-            }
-            return mark_safe(json.dumps(data, cls=SchemaEncoder, ensure_ascii=False, indent=2))
+            return mark_safe(get_cached_json_ld(self, request, lambda: self._build_json_ld(request)))
         except Exception as e:
             # Log errore per debug
             import logging
@@ -374,6 +410,15 @@ class JsonLdMixin:
             logger.error(f"JSON-LD generation error: {e}", exc_info=True)
             # In caso di errore, ritorna JSON vuoto invece di rompere la pagina
             return mark_safe('{}')
+    
+    def _build_json_ld(self, request=None) -> str:
+        """Serializza il JSON-LD senza cache."""
+        data = {
+            "@context": "https://schema.org",
+            "@type": self.get_json_ld_type(),
+            **self.get_json_ld_data(request),
+        }
+        return json.dumps(data, cls=SchemaEncoder, ensure_ascii=False, indent=2)
 
 
 # ============================================================================
@@ -0,0 +1,79 @@
+"""
+MC Castellazzo - Request-scoped Site Context
+============================================
+Bundle per-richiesta dei valori condivisi da context processor e template
+tag: lingua attiva, ``Site``, ``Locale``, snapshot di navigazione e
+traduzioni della pagina corrente.
+
+Ogni valore viene risolto al primo accesso e memorizzato sull'oggetto
+request, quindi:
+- il Locale della lingua corrente viene letto al massimo una volta per
+  richiesta (prima lo cercavano separatamente ``navigation``,
+  ``main_pages``, ``page_translations`` e ``website_tags``);
+- ``Site.find_for_request`` viene chiamato una sola volta;
+- un template che non usa ``main_pages`` o ``page_translations`` non paga
+  nulla (i context processor restituiscono proxy lazy).
+
+Uso:
+    from apps.core.site_context import get_site_context
+    ctx = get_site_context(request)
+    ctx.locale, ctx.site, ctx.navigation["main_pages"]
+"""
+from __future__ import annotations
+
+from django.utils.functional import cached_property
+from django.utils.translation import get_language
+from wagtail.models import Locale, Site
+
+_REQUEST_ATTR = "_mcc_site_context"
+
+
+class SiteContext:
+    """Valori per-richiesta calcolati pigramente e memorizzati."""
+
+    def __init__(self, request):
+        self.request = request
+
+    @cached_property
+    def lang_code(self) -> str:
+        return get_language() or "it"
+
+    @cached_property
+    def site(self) -> Site | None:
+        return Site.find_for_request(self.request)
+
+    @cached_property
+    def locale(self) -> Locale | None:
+        """Locale della lingua corrente, con fallback su italiano (o None)."""
+        try:
+            return Locale.objects.get(language_code=self.lang_code)
+        except Locale.DoesNotExist:
+            try:
+                return Locale.objects.get(language_code="it")
+            except Locale.DoesNotExist:
+                return None
+
+    @cached_property
+    def navigation(self) -> dict:
+        """Snapshot navbar/footer/main_pages (vedi apps.core.navigation_cache)."""
+        from apps.core.navigation_cache import get_navigation_snapshot
+
+        return get_navigation_snapshot(self.site, self.lang_code, resolve_locale=lambda: self.locale)
+
+    @cached_property
+    def translations(self) -> dict[str, str]:
+        """Traduzioni live della pagina corrente (vedi apps.core.translation_index)."""
+        from apps.core.translation_index import find_translations
+
+        if self.site is None:
+            return {}
+        return find_translations(self.site, self.request.path)
+
+
+def get_site_context(request) -> SiteContext:
+    """Restituisce il SiteContext della richiesta, creandolo al primo uso."""
+    site_context = getattr(request, _REQUEST_ATTR, None)
+    if site_context is None:
+        site_context = SiteContext(request)
+        setattr(request, _REQUEST_ATTR, site_context)
+    return site_context
@@ -0,0 +1,152 @@
+"""
+MC Castellazzo - Translation Link Index
+=======================================
+Indice precalcolato per il language switcher, per site:
+
+- ``paths``: URL servito della pagina (es. ``/it/chi-siamo/``) → translation_key
+- ``urls``:  translation_key → {lingua: URL}
+
+Sostituisce il route-walking di ``page_translations`` (Locale per lingua,
+tutte le root di depth 2, ``route()``, ``get_translations()`` e ``.url`` per
+traduzione) con una lettura di cache e qualche lookup su dizionario.
+
+L'indice viene costruito con UNA query su tutte le pagine live e salvato
+nella cache condivisa; viene invalidato su publish/unpublish, spostamento e
+cancellazione di pagine (e modifica dei Site), e ricostruito alla richiesta
+successiva.
+
+Chiave: ``translation_index:<site_id>``.
+"""
+from __future__ import annotations
+
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from wagtail.models import Page, Site
+from wagtail.signals import page_published, page_unpublished, post_page_move
+
+logger = logging.getLogger(__name__)
+
+_CACHE_KEY_PREFIX = "translation_index"
+# Rete di sicurezza: anche senza segnali l'indice non vive oltre 24h
+_INDEX_TTL_SECONDS = 24 * 3600
+
+
+def _cache_key(site_id) -> str:
+    return f"{_CACHE_KEY_PREFIX}:{site_id}"
+
+
+def _language_codes() -> list[str]:
+    return [code for code, _name in settings.LANGUAGES]
+
+
+def build_translation_index(site) -> dict:
+    """
+    Costruisce (senza cache) l'indice delle traduzioni per un site.
+
+    Le URL sono relative per le pagine del site corrente e assolute per
+    quelle di altri site, come ``Page.get_url(current_site=site)``.
+    """
+    languages = set(_language_codes())
+    site_root_paths = Site.get_site_root_paths()
+    paths: dict[str, str] = {}
+    urls: dict[str, dict[str, str]] = {}
+
+    pages = (
+        Page.objects.live()
+        .filter(depth__gt=1)
+        .select_related("locale")
+        .only("id", "url_path", "depth", "translation_key", "locale__language_code")
+    )
+    for page in pages:
+        lang = page.locale.language_code
+        if lang not in languages:
+            continue
+        # Stessa cache che Page usa internamente: evita un Site.get_site_root_paths() per pagina
+        page._wagtail_cached_site_root_paths = site_root_paths
+        url_parts = page.get_url_parts()
+        if not url_parts or url_parts[2] is None:
+            continue
+        site_id, root_url, page_path = url_parts
+        key = str(page.translation_key)
+        if site_id == site.pk:
+            paths[page_path] = key
+            urls.setdefault(key, {})[lang] = page_path
+        else:
+            urls.setdefault(key, {})[lang] = root_url + page_path
+
+    return {"paths": paths, "urls": urls}
+
+
+def get_translation_index(site) -> dict:
+    """Indice dalla cache condivisa, ricostruito solo in caso di miss."""
+    key = _cache_key(site.pk)
+    index = cache.get(key)
+    if index is None:
+        index = build_translation_index(site)
+        cache.set(key, index, timeout=_INDEX_TTL_SECONDS)
+    return index
+
+
+def _candidate_paths(path: str):
+    """
+    Path da cercare nell'indice, dal più specifico al meno specifico.
+
+    - il path richiesto e i suoi "genitori" (sottopagine di RoutablePage,
+      es. ``/it/eventi/2025/`` → ``/it/eventi/``);
+    - lo stesso path con gli altri prefissi lingua (pagina servita in
+      fallback dalla homepage di un'altra lingua).
+    """
+    languages = _language_codes()
+    parts = [part for part in path.strip("/").split("/") if part]
+    if parts and parts[0] in languages:
+        prefix, rest = parts[0], parts[1:]
+    else:
+        prefix, rest = None, parts
+
+    prefixes = [prefix] if prefix else []
+    prefixes += [lang for lang in languages if lang != prefix]
+    for end in range(len(rest), -1, -1):
+        for lang in prefixes:
+            yield "/" + "/".join([lang, *rest[:end]]) + "/"
+
+
+def find_translations(site, path: str) -> dict[str, str]:
+    """
+    Traduzioni live della pagina servita a ``path``: {lingua: URL}.
+
+    Restituisce un dict vuoto se il path non corrisponde a nessuna pagina.
+    """
+    index = get_translation_index(site)
+    paths = index["paths"]
+    for candidate in _candidate_paths(path):
+        key = paths.get(candidate)
+        if key is not None:
+            return dict(index["urls"].get(key, {}))
+    return {}
+
+
+def invalidate_translation_index() -> None:
+    """Elimina l'indice di tutti i site."""
+    cache.delete_many([_cache_key(site_id) for site_id in Site.objects.values_list("pk", flat=True)])
+    logger.debug("Translation index invalidated")
+
+
+# ---------------------------------------------------------------------------
+# Signal receivers
+# ---------------------------------------------------------------------------
+
+@receiver(page_published)
+@receiver(page_unpublished)
+@receiver(post_page_move)
+def _on_page_tree_change(sender, instance, **kwargs):
+    invalidate_translation_index()
+
+
+@receiver(post_delete, sender=Page)
+@receiver(post_save, sender=Site)
+def _on_page_delete_or_site_change(sender, instance, **kwargs):
+    invalidate_translation_index()
@@ -0,0 +1,157 @@
+"""
+MC Castellazzo - Translation Memory
+===================================
+Memoria di traduzione condivisa da tutti i percorsi di traduzione automatica
+(``DeepTranslatorMachineTranslator``: ``translate()``, ``_translate_html``,
+``translate_pending_segments``, la traduzione delle pagine ``translate_page``,
+``translate_po``, ``traduci`` e ``force_translate``).
+
+- chiave: SHA-256 del testo normalizzato (spazi compressi, NFC) + lingua
+  sorgente + lingua destinazione, in ISO (``it``, ``en``...) qualunque sia
+  il codice usato dal chiamante (``italian``, ``en-GB``...);
+- davanti al DB un LRU in-process (``TRANSLATION_MEMORY_CACHE_SIZE`` voci):
+  etichette, nome del club e testi ricorrenti non toccano nemmeno il DB;
+- il traduttore divide i paragrafi in frasi prima di consultarla, quindi
+  una pagina ritoccata ritraduce solo le frasi nuove;
+- vengono salvate solo le traduzioni riuscite, con il provider che le ha
+  prodotte.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+
+from django.conf import settings
+
+from apps.core.models import TranslationMemory
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_SIZE = 4096
+
+# Codici usati dai vari chiamanti → ISO
+_LANG_ALIASES = {
+    "italian": "it",
+    "english": "en",
+    "german": "de",
+    "french": "fr",
+    "spanish": "es",
+}
+
+_lru: OrderedDict[tuple, str] = OrderedDict()
+_lru_lock = threading.Lock()
+
+
+def _cache_size() -> int:
+    return getattr(settings, "TRANSLATION_MEMORY_CACHE_SIZE", DEFAULT_CACHE_SIZE)
+
+
+def normalize(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(normalize(text).encode("utf-8")).hexdigest()
+
+
+def language(code: str) -> str:
+    """``italian``/``it-IT``/``it`` → ``it``."""
+    code = code.lower()
+    return _LANG_ALIASES.get(code, code.split("-")[0])
+
+
+def _lru_get(key: tuple) -> str | None:
+    with _lru_lock:
+        value = _lru.get(key)
+        if value is not None:
+            _lru.move_to_end(key)
+        return value
+
+
+def _lru_set(key: tuple, value: str) -> None:
+    with _lru_lock:
+        _lru[key] = value
+        _lru.move_to_end(key)
+        while len(_lru) > _cache_size():
+            _lru.popitem(last=False)
+
+
+def clear_cache() -> None:
+    """Svuota l'LRU in-process (il DB resta)."""
+    with _lru_lock:
+        _lru.clear()
+
+
+def lookup(texts, source_lang: str, target_lang: str) -> dict[str, str]:
+    """
+    Traduzioni già note per i testi dati: prima l'LRU, poi una sola query
+    per quelli mancanti.
+
+    Returns:
+        {testo: traduzione} solo per i testi trovati.
+    """
+    source_lang, target_lang = language(source_lang), language(target_lang)
+    found = {}
+    missing = {}
+    for text in texts:
+        digest = text_hash(text)
+        value = _lru_get((digest, source_lang, target_lang))
+        if value is not None:
+            found[text] = value
+        else:
+            missing.setdefault(digest, []).append(text)
+    if not missing:
+        return found
+
+    try:
+        rows = TranslationMemory.objects.filter(
+            source_hash__in=list(missing), source_lang=source_lang, target_lang=target_lang,
+        ).values_list("source_hash", "translated_text")
+        for digest, translated in rows:
+            _lru_set((digest, source_lang, target_lang), translated)
+            for text in missing[digest]:
+                found[text] = translated
+    except Exception:  # noqa: BLE001 - la memoria non deve mai bloccare la traduzione
+        logger.warning("TranslationMemory: lettura fallita", exc_info=True)
+    return found
+
+
+def store(entries, source_lang: str, target_lang: str) -> None:
+    """
+    Salva le traduzioni riuscite.
+
+    Args:
+        entries: iterabile di (testo sorgente, traduzione, provider)
+    """
+    source_lang, target_lang = language(source_lang), language(target_lang)
+    records = {}
+    for text, translated, provider in entries:
+        if not text or not text.strip() or not translated or not translated.strip():
+            continue
+        digest = text_hash(text)
+        records[digest] = TranslationMemory(
+            source_hash=digest,
+            source_lang=source_lang,
+            target_lang=target_lang,
+            source_text=normalize(text),
+            translated_text=translated,
+            provider=provider or "",
+        )
+    if not records:
+        return
+
+    try:
+        TranslationMemory.objects.bulk_create(
+            records.values(),
+            update_conflicts=True,
+            unique_fields=["source_hash", "source_lang", "target_lang"],
+            update_fields=["translated_text", "provider", "updated_at"],
+        )
+    except Exception:  # noqa: BLE001
+        logger.warning("TranslationMemory: scrittura fallita", exc_info=True)
+        return
+    for digest, record in records.items():
+        _lru_set((digest, source_lang, target_lang), record.translated_text)
@@ -0,0 +1,349 @@
+"""
+MC Castellazzo - Translation Queue
+==================================
+Coda persistente (tabella ``TranslationJob``) per le traduzioni in
+background, eseguita da ``manage.py translation_worker`` invece che da
+thread avviati dalle richieste: il lavoro sopravvive al riciclo dei worker
+Gunicorn e non compete con le richieste per il GIL.
+
+- accodamento idempotente: un solo lavoro in coda per chiave (vincolo
+  unico parziale); il servizio delle pagine accoda al massimo una volta
+  ogni ``TRANSLATION_ENQUEUE_INTERVAL`` secondi per lingua (``request_pending``);
+- lease: il worker prende un lavoro con un update condizionato e lo tiene
+  per ``TRANSLATION_QUEUE_LEASE_SECONDS``; un lease scaduto (worker morto)
+  rende il lavoro di nuovo eseguibile;
+- retry: un errore rimette il lavoro in coda con attesa esponenziale
+  (``TRANSLATION_QUEUE_BACKOFF_SECONDS`` × 2^(tentativi-1), max un'ora) fino a
+  ``TRANSLATION_QUEUE_MAX_ATTEMPTS`` tentativi;
+- concorrenza: al massimo ``TRANSLATION_QUEUE_CONCURRENCY`` lavori in
+  esecuzione fra tutti i worker e uno solo per chiave. Default 1: rate limit
+  e circuit breaker dei provider sono per processo, più worker in parallelo
+  supererebbero la quota dei provider.
+
+Nuovi tipi di lavoro si registrano con ``@register("nome")``; durante
+l'esecuzione ``report_progress()`` salva l'avanzamento sul lavoro (letto
+dagli endpoint di stato) e rinnova il lease.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import random
+import socket
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from apps.core.models import TranslationJob
+
+logger = logging.getLogger(__name__)
+
+TASK_PENDING = "translate_pending"
+TASK_PAGE = "translate_page"
+
+DEFAULT_CONCURRENCY = 1
+DEFAULT_LEASE_SECONDS = 600
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_BACKOFF_SECONDS = 30
+MAX_BACKOFF_SECONDS = 3600
+DEFAULT_ENQUEUE_INTERVAL = 60
+
+_tasks = {}
+# Lavoro in esecuzione nel thread corrente (report_progress)
+_current = threading.local()
+
+
+class TranslationJobError(Exception):
+    """Lavoro non riuscito: va ritentato più tardi."""
+
+
+def register(name: str):
+    """Registra la funzione che esegue i lavori ``name`` (riceve il payload come kwargs)."""
+
+    def decorator(func):
+        _tasks[name] = func
+        return func
+
+    return decorator
+
+
+def _concurrency() -> int:
+    return getattr(settings, "TRANSLATION_QUEUE_CONCURRENCY", DEFAULT_CONCURRENCY)
+
+
+def _lease() -> timedelta:
+    return timedelta(seconds=getattr(settings, "TRANSLATION_QUEUE_LEASE_SECONDS", DEFAULT_LEASE_SECONDS))
+
+
+def _max_attempts() -> int:
+    return getattr(settings, "TRANSLATION_QUEUE_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS)
+
+
+def _backoff(attempts: int) -> timedelta:
+    base = getattr(settings, "TRANSLATION_QUEUE_BACKOFF_SECONDS", DEFAULT_BACKOFF_SECONDS)
+    seconds = min(base * 2 ** max(0, attempts - 1), MAX_BACKOFF_SECONDS)
+    # Jitter: i lavori falliti insieme non ripartono tutti nello stesso istante
+    return timedelta(seconds=seconds * random.uniform(0.8, 1.2))
+
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+# ---------------------------------------------------------------------------
+# Accodamento
+# ---------------------------------------------------------------------------
+
+def enqueue(task: str, key: str, payload: dict | None = None, delay: float = 0) -> TranslationJob:
+    """
+    Accoda un lavoro, o restituisce quello già in coda con la stessa chiave.
+    """
+    for _attempt in range(3):
+        existing = TranslationJob.objects.filter(key=key, status=TranslationJob.STATUS_QUEUED).first()
+        if existing is not None:
+            return existing
+        try:
+            with transaction.atomic():
+                return TranslationJob.objects.create(
+                    task=task,
+                    key=key,
+                    payload=payload or {},
+                    run_after=timezone.now() + timedelta(seconds=delay),
+                )
+        except IntegrityError:
+            continue  # accodato nel frattempo da un'altra richiesta
+    return TranslationJob.objects.filter(key=key, status=TranslationJob.STATUS_QUEUED).first()
+
+
+def _pending_strings(locale_code: str | None):
+    from wagtail_localize.models import StringTranslation
+
+    qs = StringTranslation.objects.filter(data="")
+    if locale_code:
+        qs = qs.filter(locale__language_code=locale_code)
+    return qs
+
+
+def enqueue_pending(locale_code: str | None = None, max_strings: int = 200) -> TranslationJob:
+    """Accoda la traduzione delle stringhe pendenti di una lingua (None = tutte)."""
+    return enqueue(
+        TASK_PENDING,
+        f"pending:{locale_code or '*'}",
+        {"locale_code": locale_code, "max_strings": max_strings},
+    )
+
+
+def enqueue_page(page_id: int, user_id: int | None) -> TranslationJob:
+    """Accoda la traduzione automatica di una pagina dalla versione italiana."""
+    return enqueue(TASK_PAGE, f"page:{page_id}", {"page_id": page_id, "user_id": user_id})
+
+
+def page_job(page_id: int) -> TranslationJob | None:
+    """Ultimo lavoro di traduzione della pagina (per l'endpoint di stato)."""
+    return TranslationJob.objects.filter(key=f"page:{page_id}").order_by("-pk").first()
+
+
+def request_pending(locale_code: str) -> TranslationJob | None:
+    """
+    Dal servizio delle pagine: accoda la traduzione delle stringhe pendenti
+    di ``locale_code`` se ce ne sono, al massimo una volta per intervallo
+    (flag in cache condivisa, niente query a ogni richiesta).
+    """
+    interval = getattr(settings, "TRANSLATION_ENQUEUE_INTERVAL", DEFAULT_ENQUEUE_INTERVAL)
+    if not cache.add(f"translation_queue:pending:{locale_code}", True, interval):
+        return None
+    if not _pending_strings(locale_code).exists():
+        return None
+    return enqueue_pending(locale_code)
+
+
+# ---------------------------------------------------------------------------
+# Esecuzione
+# ---------------------------------------------------------------------------
+
+def _active(now):
+    return TranslationJob.objects.filter(status=TranslationJob.STATUS_RUNNING, locked_until__gt=now)
+
+
+def _release(job: TranslationJob, previous: dict) -> None:
+    """Annulla una presa che supera i limiti di concorrenza."""
+    try:
+        with transaction.atomic():
+            TranslationJob.objects.filter(pk=job.pk, locked_by=job.locked_by, attempts=job.attempts).update(
+                **previous
+            )
+    except IntegrityError:
+        # Nel frattempo è stato accodato lo stesso lavoro: basta quello
+        TranslationJob.objects.filter(pk=job.pk, locked_by=job.locked_by).delete()
+
+
+def claim(worker: str) -> TranslationJob | None:
+    """
+    Prende in lease il prossimo lavoro eseguibile, rispettando i limiti di
+    concorrenza; None se non ce ne sono o i limiti sono raggiunti.
+    """
+    now = timezone.now()
+    active = list(_active(now).values_list("key", flat=True))
+    if len(active) >= _concurrency():
+        return None
+    candidates = (
+        TranslationJob.objects.filter(
+            Q(status=TranslationJob.STATUS_QUEUED, run_after__lte=now)
+            | Q(status=TranslationJob.STATUS_RUNNING, locked_until__lte=now)
+        )
+        .exclude(key__in=active)
+        .order_by("run_after", "pk")[:20]
+    )
+    for job in candidates:
+        previous = {
+            "status": job.status,
+            "locked_by": job.locked_by,
+            "locked_until": job.locked_until,
+            "attempts": job.attempts,
+        }
+        if job.status == TranslationJob.STATUS_RUNNING and job.attempts >= _max_attempts():
+            # Lease scaduto all'ultimo tentativo: il worker è morto durante il lavoro
+            TranslationJob.objects.filter(pk=job.pk, **previous).update(
+                status=TranslationJob.STATUS_FAILED,
+                locked_until=None,
+                last_error=job.last_error or "lease scaduto",
+            )
+            continue
+        claimed = TranslationJob.objects.filter(pk=job.pk, **previous).update(
+            status=TranslationJob.STATUS_RUNNING,
+            locked_by=worker,
+            locked_until=now + _lease(),
+            attempts=F("attempts") + 1,
+            updated_at=now,
+        )
+        if not claimed:
+            continue  # preso da un altro worker
+        job.refresh_from_db()
+        # Verifica dopo la presa: fra lavori attivi (e fra quelli con la
+        # stessa chiave) vincono i più vecchi, gli altri worker rilasciano
+        winners = list(_active(now).order_by("pk").values_list("pk", "key"))
+        same_key = [pk for pk, key in winners if key == job.key]
+        if job.pk not in [pk for pk, _key in winners[:_concurrency()]] or same_key[0] != job.pk:
+            _release(job, previous)
+            return None
+        return job
+    return None
+
+
+def _finish(job: TranslationJob, **fields) -> None:
+    TranslationJob.objects.filter(pk=job.pk, locked_by=job.locked_by, attempts=job.attempts).update(
+        locked_until=None, updated_at=timezone.now(), **fields
+    )
+
+
+def _retry_or_fail(job: TranslationJob, error: str) -> None:
+    if job.attempts >= _max_attempts():
+        logger.error(f"Lavoro {job.key} fallito dopo {job.attempts} tentativi: {error}")
+        _finish(job, status=TranslationJob.STATUS_FAILED, last_error=error)
+        return
+    delay = _backoff(job.attempts)
+    logger.warning(f"Lavoro {job.key} tentativo {job.attempts} fallito, riprovo fra {int(delay.total_seconds())}s: {error}")
+    try:
+        with transaction.atomic():
+            _finish(
+                job,
+                status=TranslationJob.STATUS_QUEUED,
+                run_after=timezone.now() + delay,
+                last_error=error,
+            )
+    except IntegrityError:
+        # Lo stesso lavoro è già di nuovo in coda: ci pensa quello
+        _finish(job, status=TranslationJob.STATUS_FAILED, last_error=f"{error} (sostituito dal lavoro in coda)")
+
+
+def run_job(job: TranslationJob) -> None:
+    """Esegue un lavoro preso con ``claim()`` e ne registra l'esito."""
+    handler = _tasks.get(job.task)
+    if handler is None:
+        _finish(job, status=TranslationJob.STATUS_FAILED, last_error=f"tipo di lavoro sconosciuto: {job.task}")
+        return
+    _current.job = job
+    try:
+        result = handler(**job.payload)
+    except Exception as e:
+        logger.exception(f"Lavoro {job.key} errore: {e}")
+        _retry_or_fail(job, f"{type(e).__name__}: {e}"[:1000])
+    else:
+        _finish(job, status=TranslationJob.STATUS_DONE, result=result, last_error="")
+    finally:
+        _current.job = None
+
+
+def report_progress(progress: dict) -> None:
+    """
+    Salva l'avanzamento del lavoro in esecuzione e ne rinnova il lease;
+    fuori da un lavoro non fa niente.
+    """
+    job = getattr(_current, "job", None)
+    if job is None:
+        return
+    TranslationJob.objects.filter(pk=job.pk, locked_by=job.locked_by, attempts=job.attempts).update(
+        progress=progress, locked_until=timezone.now() + _lease()
+    )
+
+
+def run_next(worker: str) -> TranslationJob | None:
+    """Prende ed esegue un lavoro; None se non c'era niente da fare."""
+    job = claim(worker)
+    if job is not None:
+        run_job(job)
+    return job
+
+
+def prune(days: int = 7) -> int:
+    """Cancella i lavori conclusi da più di ``days`` giorni."""
+    deleted, _details = TranslationJob.objects.filter(
+        status__in=[TranslationJob.STATUS_DONE, TranslationJob.STATUS_FAILED],
+        updated_at__lt=timezone.now() - timedelta(days=days),
+    ).delete()
+    return deleted
+
+
+def get_counts() -> dict[str, int]:
+    """Numero di lavori per stato (monitoraggio)."""
+    from django.db.models import Count
+
+    return dict(TranslationJob.objects.values_list("status").annotate(count=Count("pk")).order_by())
+
+
+# ---------------------------------------------------------------------------
+# Tipi di lavoro
+# ---------------------------------------------------------------------------
+
+@register(TASK_PENDING)
+def translate_pending(locale_code=None, max_strings=200):
+    """
+    Traduce le stringhe pendenti; se ne restano dopo un giro riuscito,
+    accoda il giro successivo. Con tutti i provider in errore (o i loro
+    circuit breaker aperti) solleva ``TranslationJobError`` per il retry.
+    """
+    from apps.core import provider_health
+    from apps.core.machine_translator import translate_pending_segments
+
+    stats = translate_pending_segments(locale_code=locale_code, max_strings=max_strings)
+    if not stats["done"]:
+        mt_settings = getattr(settings, "WAGTAILLOCALIZE_MACHINE_TRANSLATOR", {})
+        providers = mt_settings.get("OPTIONS", {}).get("PROVIDERS", ["google", "mymemory"])
+        if stats["errors"] or not provider_health.order(providers, 0):
+            raise TranslationJobError(f"nessuna stringa tradotta ({stats['errors']} errori)")
+    elif _pending_strings(locale_code).exists():
+        enqueue_pending(locale_code, max_strings)
+    return stats
+
+
+@register(TASK_PAGE)
+def translate_page(page_id, user_id=None):
+    """Traduce i campi della pagina e salva una revisione (apps.core.views)."""
+    from apps.core.views import translate_page as run
+
+    return run(page_id, user_id, progress=report_progress)
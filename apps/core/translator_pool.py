@@ -0,0 +1,193 @@
+"""
+MC Castellazzo - Translator Pool
+================================
+Risorse a lunga vita del traduttore automatico, condivise da tutte le
+chiamate di un processo worker:
+
+- un ``ThreadPoolExecutor`` per le chiamate ai provider con timeout (prima
+  ne veniva creato e distrutto uno per ogni stringa);
+- per (provider, lingua sorgente, lingua destinazione) un client
+  deep-translator e una ``requests.Session`` keep-alive, tenuti per thread
+  del pool: i client modificano ``_url_params`` a ogni chiamata e le
+  sessioni non sono garantite thread-safe;
+- deep-translator chiama ``requests.get`` (nuova connessione TCP/TLS a ogni
+  stringa): nei suoi moduli ``requests`` viene sostituito da un proxy il cui
+  ``get`` usa la sessione della chiamata in corso, con timeout di socket pari
+  al timeout della chiamata, così un thread bloccato si libera da solo.
+
+Il timeout per chiamata resta rigido: ``call()`` smette di attendere dopo
+``timeout`` secondi anche se il thread del pool è ancora occupato.
+
+Rate limiting: un ``TokenBucket`` per provider (``throttle()``), condiviso
+da tutti i thread del processo; sostituisce le pause fisse fra le stringhe
+e fa sì che più lingue tradotte in parallelo restino entro la quota del
+provider.
+
+Configurazione: ``MACHINE_TRANSLATION_THREADS`` (default 8).
+"""
+from __future__ import annotations
+
+import concurrent.futures
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THREADS = 8
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+_local = threading.local()
+# Generazione delle risorse per thread: reset() invalida client e sessioni
+# già creati nei thread del pool senza doverli raggiungere
+_generation = 0
+_installed = False
+_buckets: dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+class TokenBucket:
+    """
+    ``rate`` richieste al secondo, con burst fino a ``capacity`` (default:
+    un secondo di richieste). Thread-safe.
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = max(1.0, capacity if capacity is not None else rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Prende un token, attendendo se serve. Restituisce i secondi attesi."""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+
+class _PooledRequests:
+    """Al posto del modulo ``requests`` in deep-translator."""
+
+    def __getattr__(self, name):
+        return getattr(requests, name)
+
+    def get(self, url, **kwargs):
+        session = getattr(_local, "session", None)
+        if session is None:
+            return requests.get(url, **kwargs)
+        kwargs.setdefault("timeout", _local.timeout)
+        return session.get(url, **kwargs)
+
+
+def _install() -> None:
+    global _installed
+    if _installed:
+        return
+    from deep_translator import deepl, google, mymemory
+
+    proxy = _PooledRequests()
+    for module in (google, mymemory, deepl):
+        module.requests = proxy
+    _installed = True
+
+
+def _threads() -> int:
+    return getattr(settings, "MACHINE_TRANSLATION_THREADS", DEFAULT_THREADS)
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Executor del processo corrente (ricreato dopo un fork)."""
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=_threads(), thread_name_prefix="translator")
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def reset() -> None:
+    """Chiude l'executor, scarta client, sessioni e bucket (test, benchmark)."""
+    global _executor, _generation
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+        _generation += 1
+    with _buckets_lock:
+        _buckets.clear()
+
+
+def throttle(provider: str, rate: float | None) -> float:
+    """
+    Attende il turno per una richiesta a ``provider`` (``rate`` richieste al
+    secondo; 0/None = nessun limite).
+
+    Returns:
+        Secondi di attesa
+    """
+    if not rate:
+        return 0.0
+    with _buckets_lock:
+        bucket = _buckets.get(provider)
+        if bucket is None or bucket.rate != rate:
+            bucket = _buckets[provider] = TokenBucket(rate)
+    return bucket.acquire()
+
+
+def _resources(key, factory):
+    resources = getattr(_local, "resources", None)
+    if resources is None or _local.generation != _generation:
+        for _client, session in (resources or {}).values():
+            session.close()
+        resources = _local.resources = {}
+        _local.generation = _generation
+    if key not in resources:
+        resources[key] = (factory(), requests.Session())
+    return resources[key]
+
+
+def _run(key, factory, text, timeout):
+    client, session = _resources(key, factory)
+    _local.session, _local.timeout = session, timeout
+    try:
+        return client.translate(text)
+    finally:
+        _local.session = None
+
+
+def call(key, factory, text: str, timeout: float):
+    """
+    ``client.translate(text)`` sul pool, con il client e la sessione di ``key``.
+
+    Args:
+        key: tupla hashable (provider, lingue, opzioni del client)
+        factory: crea il client deep-translator se il thread non lo ha
+        timeout: secondi massimi di attesa (anche timeout di socket)
+
+    Raises:
+        concurrent.futures.TimeoutError: oltre ``timeout``
+    """
+    _install()
+    future = get_executor().submit(_run, key, factory, text, timeout)
+    try:
+        return future.result(timeout=timeout)
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        raise
@@ -1,13 +1,15 @@
 """
 MC Castellazzo - Views per traduzione automatica
 =================================================
-View per tradurre automaticamente una pagina dalla lingua sorgente (IT).
+View per tradurre automaticamente una pagina dalla lingua sorgente (IT):
+la traduzione gira nella coda di lavori (apps.core.translation_queue), la
+view la accoda e un endpoint JSON ne espone l'avanzamento.
 """
 import logging
-import time
 from django.shortcuts import get_object_or_404, redirect
 from django.contrib import messages
 from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
 from django_ratelimit.decorators import ratelimit
 from wagtail.models import Page, Locale
 from wagtail.fields import RichTextField, StreamField
@@ -44,7 +46,7 @@ def translate_value(translator, value, source_lang, target_lang):
     
     if isinstance(value, str):
         if value.strip():
-            time.sleep(0.2)  # Rate limiting
+            # Rate limiting nel traduttore (token bucket per provider)
             return translate_text(translator, value, source_lang, target_lang)
         return value
     
@@ -99,16 +101,142 @@ def translate_stream_data(translator, stream_data, source_lang, target_lang):
     return translated
 
 
+# Campi tradotti, nell'ordine
+SIMPLE_TEXT_FIELDS = [
+    'title', 'seo_title', 'search_description',
+    'organization_name', 'hero_title', 'hero_subtitle',
+    'intro', 'subtitle', 'summary', 'excerpt',
+    'welcome_title', 'welcome_text',
+    'cta_text', 'cta_button_text',
+    'event_title', 'event_description',
+    'page_title', 'page_subtitle',
+]
+RICH_TEXT_FIELDS = ['description', 'intro', 'body', 'content']
+STREAM_FIELD_NAMES = ['body', 'content', 'blocks', 'gallery_blocks', 'articles',
+                      'slides', 'stats', 'cards', 'members', 'documents', 'timeline']
+
+
+def get_translation_plan(it_page, page):
+    """
+    Campi da tradurre: [(nome, tipo)] con tipo 'text' (testo semplice o
+    RichTextField) o 'stream' (StreamField).
+    """
+    plan = []
+    
+    # === 1. Campi di testo semplici ===
+    for field_name in SIMPLE_TEXT_FIELDS:
+        if hasattr(it_page, field_name) and hasattr(page, field_name):
+            it_value = getattr(it_page, field_name)
+            if it_value and isinstance(it_value, str) and it_value.strip():
+                plan.append((field_name, "text"))
+    
+    # === 2. RichTextField (description, body se è RichText, ecc.) ===
+    planned = {name for name, _kind in plan}
+    for field_name in RICH_TEXT_FIELDS:
+        if hasattr(it_page, field_name) and field_name not in planned:
+            it_value = getattr(it_page, field_name)
+            if isinstance(it_value, str) and it_value.strip():
+                plan.append((field_name, "text"))
+    
+    # === 3. StreamField ===
+    for field_name in STREAM_FIELD_NAMES:
+        if not hasattr(it_page, field_name):
+            continue
+        it_field = getattr(it_page, field_name)
+        if hasattr(it_field, 'raw_data') or hasattr(it_field, 'stream_data'):
+            plan.append((field_name, "stream"))
+    
+    return plan
+
+
+def translate_page(page_id, user_id=None, progress=None):
+    """
+    Traduce tutti i campi di una pagina dalla versione italiana e salva il
+    risultato come bozza (nuova revisione). Eseguita dal worker della coda
+    (apps.core.translation_queue), non nella richiesta.
+    
+    Args:
+        progress: chiamata con {fields: [{name, state}], done, total} a ogni
+            campo tradotto (state: pending, done, error)
+    
+    Returns:
+        dict con campi tradotti, numero di errori e id della revisione
+    """
+    page = Page.objects.get(id=page_id).specific
+    target_lang = page.locale.language_code
+    it_page = page.get_translation(Locale.objects.get(language_code="it")).specific
+    
+    plan = get_translation_plan(it_page, page)
+    state = {
+        "fields": [{"name": field_name, "state": "pending"} for field_name, _kind in plan],
+        "done": 0,
+        "total": len(plan),
+    }
+    report = progress or (lambda state: None)
+    report(state)
+    
+    translator = get_translator()
+    translated_fields = []
+    errors = []
+    
+    for entry, (field_name, kind) in zip(state["fields"], plan, strict=True):
+        it_value = getattr(it_page, field_name)
+        try:
+            if kind == "stream":
+                translated_data = translate_stream_data(translator, it_value, "it", target_lang)
+                if translated_data:
+                    setattr(page, field_name, translated_data)
+                    translated_fields.append(f"{field_name} (StreamField)")
+            else:
+                setattr(page, field_name, translate_text(translator, it_value, "it", target_lang))
+                translated_fields.append(field_name)
+            entry["state"] = "done"
+            logger.info(f"Tradotto {field_name}")
+        except Exception as e:
+            errors.append(f"{field_name}: {e}")
+            entry["state"] = "error"
+            logger.error(f"Errore traduzione {field_name}: {e}")
+        state["done"] += 1
+        report(state)
+    
+    # === 4. Salva come bozza ===
+    revision = None
+    if translated_fields:
+        from django.contrib.auth import get_user_model
+
+        from apps.core.audit import log_security_event
+        
+        user = get_user_model().objects.filter(pk=user_id).first() if user_id else None
+        revision = page.save_revision(user=user)
+        # V2-019 — audit dell'operazione sensibile
+        log_security_event(
+            None,
+            "auto_translate.completed",
+            user_id=user_id,
+            page_id=page.id,
+            target_lang=target_lang,
+            fields_count=len(translated_fields),
+            errors_count=len(errors),
+        )
+    
+    return {
+        "fields": translated_fields,
+        "errors": len(errors),
+        "revision_id": revision.pk if revision else None,
+    }
+
+
 @staff_member_required
 @ratelimit(key="user", rate="20/h", block=True)
 def auto_translate_page_view(request, page_id):
     """
-    View che traduce automaticamente una pagina dalla versione italiana.
+    View che avvia la traduzione automatica di una pagina dalla versione
+    italiana e torna subito all'editor.
     
-    Traduce TUTTI i campi:
-    - Campi di testo semplici (CharField, TextField)
-    - RichTextField
-    - StreamField con tutti i blocchi nidificati
+    La traduzione (tutti i campi: testo semplice, RichTextField, StreamField
+    con tutti i blocchi nidificati) gira nel worker della coda
+    (``translate_page``) e viene salvata come bozza; l'avanzamento per
+    campo è esposto da ``auto_translate_status_view``.
     """
     page = get_object_or_404(Page, id=page_id).specific
     current_locale = page.locale
@@ -124,122 +252,56 @@ def auto_translate_page_view(request, page_id):
         messages.warning(request, "Questa pagina è già in italiano, non serve tradurla.")
         return redirect("wagtailadmin_pages:edit", page.id)
     
-    # Trova la versione italiana
+    # Verifica che esista la versione italiana
     try:
         it_locale = Locale.objects.get(language_code="it")
-        it_page = page.get_translation(it_locale).specific
+        page.get_translation(it_locale)
     except (Locale.DoesNotExist, Page.DoesNotExist):
         messages.error(request, "Impossibile trovare la versione italiana di questa pagina.")
         return redirect("wagtailadmin_pages:edit", page.id)
     
-    translator = get_translator()
-    translated_fields = []
-    errors = []
-    
-    # === 1. Campi di testo semplici ===
-    simple_text_fields = [
-        'title', 'seo_title', 'search_description',
-        'organization_name', 'hero_title', 'hero_subtitle',
-        'intro', 'subtitle', 'summary', 'excerpt',
-        'welcome_title', 'welcome_text',
-        'cta_text', 'cta_button_text',
-        'event_title', 'event_description',
-        'page_title', 'page_subtitle',
-    ]
-    
-    for field_name in simple_text_fields:
-        if hasattr(it_page, field_name) and hasattr(page, field_name):
-            it_value = getattr(it_page, field_name)
-            if it_value and isinstance(it_value, str) and it_value.strip():
-                try:
-                    translated = translate_text(translator, it_value, "it", target_lang)
-                    setattr(page, field_name, translated)
-                    translated_fields.append(field_name)
-                    logger.info(f"Tradotto {field_name}")
-                except Exception as e:
-                    errors.append(f"{field_name}: {e}")
-    
-    # === 2. RichTextField (description, body se è RichText, ecc.) ===
-    rich_text_fields = ['description', 'intro', 'body', 'content']
-    
-    for field_name in rich_text_fields:
-        if hasattr(it_page, field_name):
-            field = it_page._meta.get_field(field_name) if hasattr(it_page._meta, 'get_field') else None
-            it_value = getattr(it_page, field_name)
-            
-            # Se è una stringa (RichTextField), traducila
-            if isinstance(it_value, str) and it_value.strip():
-                if field_name not in translated_fields:
-                    try:
-                        translated = translate_text(translator, it_value, "it", target_lang)
-                        setattr(page, field_name, translated)
-                        translated_fields.append(field_name)
-                        logger.info(f"Tradotto RichText {field_name}")
-                    except Exception as e:
-                        errors.append(f"{field_name}: {e}")
-    
-    # === 3. StreamField ===
-    stream_field_names = ['body', 'content', 'blocks', 'gallery_blocks', 'articles', 
-                          'slides', 'stats', 'cards', 'members', 'documents', 'timeline']
+    from apps.core.audit import log_security_event
+    from apps.core.translation_queue import enqueue_page
     
-    for field_name in stream_field_names:
-        if not hasattr(it_page, field_name):
-            continue
-        
-        it_field = getattr(it_page, field_name)
-        
-        # Verifica se è uno StreamField
-        if not (hasattr(it_field, 'raw_data') or hasattr(it_field, 'stream_data')):
-            continue
-        
-        try:
-            translated_data = translate_stream_data(translator, it_field, "it", target_lang)
-            
-            if translated_data:
-                setattr(page, field_name, translated_data)
-                if field_name not in translated_fields:
-                    translated_fields.append(f"{field_name} (StreamField)")
-                logger.info(f"Tradotto StreamField {field_name}")
-        except Exception as e:
-            errors.append(f"StreamField {field_name}: {e}")
-            logger.error(f"Errore StreamField {field_name}: {e}")
+    job = enqueue_page(page.id, request.user.pk)
+    log_security_event(
+        request,
+        "auto_translate.queued",
+        page_id=page.id,
+        target_lang=target_lang,
+        job_id=job.pk,
+    )
+    messages.info(
+        request,
+        "⏳ Traduzione avviata in background: l'avanzamento è indicato sul pulsante "
+        "«Traduci Automaticamente». Al termine viene salvata una bozza.",
+    )
+    return redirect("wagtailadmin_pages:edit", page.id)
+
+
+@staff_member_required
+def auto_translate_status_view(request, page_id):
+    """
+    Stato JSON dell'ultima traduzione automatica della pagina: stato del
+    lavoro, avanzamento per campo e, al termine, la revisione salvata.
+    """
+    page = Page.objects.filter(id=page_id).first()
+    if page is None or not page.permissions_for_user(request.user).can_edit():
+        return JsonResponse({"success": False, "error": "Pagina non accessibile."}, status=403)
     
-    # === 4. Salva come bozza ===
-    if translated_fields:
-        try:
-            page.save_revision(user=request.user)
-            # V2-019 — audit dell'operazione sensibile
-            from apps.core.audit import log_security_event
-            log_security_event(
-                request,
-                "auto_translate.completed",
-                page_id=page.id,
-                target_lang=target_lang,
-                fields_count=len(translated_fields),
-                errors_count=len(errors),
-            )
-            success_msg = f"✅ Traduzione completata! Campi tradotti: {', '.join(translated_fields)}."
-            if errors:
-                success_msg += f" Errori: {len(errors)}"
-            messages.success(request, success_msg)
-        except Exception as e:
-            # V2-013: non esporre il testo dell'eccezione nel messaggio flash;
-            # logga il dettaglio per il sysadmin.
-            logger.exception("Errore salvataggio revisione pagina %s", page.id)
-            messages.error(
-                request,
-                "Errore nel salvataggio della revisione. Controlla i log del server.",
-            )
-    else:
-        if errors:
-            # Numero, non dettagli, per evitare leak di stack trace.
-            messages.warning(
-                request,
-                f"Nessun campo tradotto. {len(errors)} errori (vedi log server).",
-            )
-            for err in errors:
-                logger.warning("Auto-translate error: %s", err)
-        else:
-            messages.info(request, "Nessun campo da tradurre trovato.")
+    from apps.core.translation_queue import page_job
     
-    return redirect("wagtailadmin_pages:edit", page.id)
+    job = page_job(page.id)
+    if job is None:
+        return JsonResponse({"success": True, "data": None})
+    # V2-013: niente testo delle eccezioni, solo lo stato
+    return JsonResponse({
+        "success": True,
+        "data": {
+            "status": job.status,
+            "attempts": job.attempts,
+            "progress": job.progress,
+            "result": job.result,
+            "updated_at": job.updated_at.isoformat(),
+        },
+    })
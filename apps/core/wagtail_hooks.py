@@ -4,6 +4,7 @@ MC Castellazzo - Wagtail Hooks
 Hooks per aggiungere funzionalità custom al backend Wagtail.
 Include il pulsante "Traduci Automaticamente" nel menu azioni delle pagine.
 Include il menu "Caricamento Massivo" per le immagini.
+Include il menu "Rendition" con lo stato della pre-generazione.
 Include lo script di geocoding automatico per gli indirizzi.
 """
 from django.urls import path, reverse
@@ -17,12 +18,22 @@ from wagtail.admin.menu import MenuItem
 class TranslateMenuItem(ActionMenuItem):
     """
     Voce di menu per tradurre automaticamente una pagina.
-    Appare solo per pagine non in italiano.
+    Appare solo per pagine non in italiano. La traduzione gira in
+    background: il template interroga l'endpoint di stato e mostra
+    l'avanzamento sul pulsante.
     """
     name = "action-translate"
     label = "🌍 Traduci Automaticamente"
     icon_name = "globe"
     order = 100  # Dopo le azioni standard
+    template_name = "wagtailadmin/pages/action_menu/auto_translate.html"
+    
+    def get_context_data(self, parent_context):
+        context = super().get_context_data(parent_context)
+        page = parent_context.get("page")
+        if page:
+            context["status_url"] = reverse("auto_translate_status", args=[page.id])
+        return context
     
     def get_url(self, context):
         page = context.get("page")
@@ -40,8 +51,8 @@ class TranslateMenuItem(ActionMenuItem):
 
 @hooks.register("register_admin_urls")
 def register_translate_url():
-    """Registra l'URL per la traduzione automatica."""
-    from apps.core.views import auto_translate_page_view
+    """Registra gli URL per la traduzione automatica e il suo stato."""
+    from apps.core.views import auto_translate_page_view, auto_translate_status_view
     
     return [
         path(
@@ -49,13 +60,24 @@ def register_translate_url():
             auto_translate_page_view,
             name="auto_translate_page",
         ),
+        path(
+            "translate-page/<int:page_id>/status/",
+            auto_translate_status_view,
+            name="auto_translate_status",
+        ),
     ]
 
 
 @hooks.register("register_admin_urls")
 def register_bulk_upload_url():
     """Registra l'URL per il caricamento massivo immagini."""
-    from apps.core.admin_views import BulkUploadView, get_image_metadata
+    from apps.core.admin_views import (
+        BulkUploadBatchStatusView,
+        BulkUploadBatchView,
+        BulkUploadChunkView,
+        BulkUploadView,
+        get_image_metadata,
+    )
     
     return [
         path(
@@ -63,6 +85,21 @@ def register_bulk_upload_url():
             BulkUploadView.as_view(),
             name="bulk_upload",
         ),
+        path(
+            "bulk-upload/batches/",
+            BulkUploadBatchView.as_view(),
+            name="bulk_upload_batch",
+        ),
+        path(
+            "bulk-upload/batches/<str:batch_id>/",
+            BulkUploadBatchStatusView.as_view(),
+            name="bulk_upload_batch_status",
+        ),
+        path(
+            "bulk-upload/batches/<str:batch_id>/files/<int:index>/",
+            BulkUploadChunkView.as_view(),
+            name="bulk_upload_chunk",
+        ),
         path(
             "api/image-metadata/<int:image_id>/",
             get_image_metadata,
@@ -82,6 +119,45 @@ def register_bulk_upload_menu_item():
     )
 
 
+@hooks.register("register_admin_urls")
+def register_rendition_status_url():
+    """Registra l'URL per lo stato della pre-generazione rendition."""
+    from apps.core.admin_views import RenditionStatusView
+    
+    return [
+        path(
+            "renditions/",
+            RenditionStatusView.as_view(),
+            name="rendition_status",
+        ),
+    ]
+
+
+@hooks.register("register_admin_urls")
+def register_translator_status_url():
+    """Registra l'URL JSON con lo stato dei provider di traduzione."""
+    from apps.core.admin_views import TranslatorStatusView
+    
+    return [
+        path(
+            "translator-status/",
+            TranslatorStatusView.as_view(),
+            name="translator_status",
+        ),
+    ]
+
+
+@hooks.register("register_admin_menu_item")
+def register_rendition_status_menu_item():
+    """Aggiunge voce menu per lo stato delle rendition."""
+    return MenuItem(
+        _("Rendition"),
+        reverse("rendition_status"),
+        icon_name="image",
+        order=360,  # Dopo Caricamento Massivo (350)
+    )
+
+
 @hooks.register("register_page_action_menu_item")
 def register_translate_action():
     """Registra la voce di menu per la traduzione automatica."""
@@ -99,52 +175,40 @@ def global_admin_js():
     )
 
 
+@hooks.register("before_serve_page")
+def tag_served_page_class(page, request, serve_args, serve_kwargs):
+    """Etichetta la richiesta con la classe della pagina (QueryStatsMiddleware)."""
+    from apps.core.middleware import SERVED_PAGE_ATTR
+
+    setattr(request, SERVED_PAGE_ATTR, type(page))
+
+
 # ---------------------------------------------------------------------------
 # Traduzione in background al primo caricamento di una pagina tradotta
 # ---------------------------------------------------------------------------
-import threading
-
-# Tiene traccia delle (locale_code) già avviate in questa sessione del processo
-# per non spammare thread ad ogni visita
-_bg_translate_started: set = set()
-_bg_translate_lock = threading.Lock()
-
 
 @hooks.register("before_serve_page")
 def trigger_background_translation(page, request, serve_args, serve_kwargs):
     """
     Quando una pagina viene servita in una lingua diversa dall'italiano,
-    controlla se ci sono stringhe pendenti e avvia la traduzione in background.
+    accoda la traduzione delle stringhe pendenti di quella lingua.
 
-    Il thread parte al massimo UNA volta per lingua per ciclo di vita del
-    worker Gunicorn (evita avvii ripetuti ad ogni richiesta).
-    Usa il lock globale di translate_pending_segments: se è già in corso,
-    il nuovo thread esce subito.
+    La richiesta non traduce niente: il lavoro va nella coda persistente
+    (apps.core.translation_queue) ed è eseguito da
+    ``manage.py translation_worker``. L'accodamento è idempotente e al
+    massimo uno per lingua ogni ``TRANSLATION_ENQUEUE_INTERVAL`` secondi.
     """
     locale_code = page.locale.language_code
     if locale_code == "it":
         return  # Niente da fare per la lingua sorgente
 
-    with _bg_translate_lock:
-        if locale_code in _bg_translate_started:
-            return  # Questo worker ha già avviato un thread per questa lingua
-        _bg_translate_started.add(locale_code)
-
-    def _run():
-        try:
-            import django
-            from apps.core.machine_translator import translate_pending_segments
-            translate_pending_segments(locale_code=locale_code)
-        except Exception as exc:
-            import logging
-            logging.getLogger(__name__).error(
-                f"Background translation [{locale_code}] errore: {exc}"
-            )
-        finally:
-            # Rimuovi dal set per permettere un nuovo ciclo dopo il completamento
-            with _bg_translate_lock:
-                _bg_translate_started.discard(locale_code)
-
-    t = threading.Thread(target=_run, daemon=True, name=f"bg-translate-{locale_code}")
-    t.start()
+    from apps.core.translation_queue import request_pending
+
+    try:
+        request_pending(locale_code)
+    except Exception as exc:
+        import logging
+        logging.getLogger(__name__).error(
+            f"Background translation [{locale_code}] errore accodamento: {exc}"
+        )
 
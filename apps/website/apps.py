@@ -35,3 +35,6 @@ class WebsiteConfig(AppConfig):
             ]
         except ImportError:
             pass  # CodeRedCMS non è installato
+
+        # Registra i signal receiver che invalidano il manifest delle gallerie
+        from apps.website.services import gallery_manifest  # noqa: F401
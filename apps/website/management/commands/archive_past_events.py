@@ -9,12 +9,13 @@ Uso manuale (DRY-RUN di default, mostra cosa farebbe senza modificare nulla):
     python manage.py archive_past_events                # anteprima
     python manage.py archive_past_events --execute      # esegui davvero
     python manage.py archive_past_events --execute --days-grace 0
+    python manage.py archive_past_events --execute --batch-size 20
 """
 from __future__ import annotations
 
 from django.core.management.base import BaseCommand
 
-from apps.website.services.archive import archive_past_events
+from apps.website.services.archive import DEFAULT_BATCH_SIZE, archive_past_events
 
 
 class Command(BaseCommand):
@@ -30,6 +31,12 @@ class Command(BaseCommand):
             help="Applica le modifiche. Senza questo flag il comando è solo un'anteprima.",
         )
         parser.add_argument("--days-grace", type=int, default=1)
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help="Eventi spostati per transazione.",
+        )
 
     def handle(self, *args, **options):
         execute = options["execute"]
@@ -37,17 +44,21 @@ class Command(BaseCommand):
         result = archive_past_events(
             dry_run=dry_run,
             grace_days=options["days_grace"],
+            batch_size=options["batch_size"],
         )
         if dry_run:
             self.stdout.write(self.style.WARNING(
                 f"[DRY-RUN] Da spostare: {result.candidates} | "
                 f"già archiviati: {result.skipped_already_archived} | "
-                f"senza archivio per locale: {result.skipped_no_archive}\n"
+                f"senza archivio per locale: {result.skipped_no_archive} | "
+                f"selezione: {result.select_seconds:.3f}s\n"
                 f"Per applicare davvero, rilanciare con --execute."
             ))
         else:
             self.stdout.write(self.style.SUCCESS(
                 f"Spostati: {result.moved} | "
                 f"già archiviati: {result.skipped_already_archived} | "
-                f"senza archivio per locale: {result.skipped_no_archive}"
+                f"senza archivio per locale: {result.skipped_no_archive} | "
+                f"batch: {result.batches} | "
+                f"selezione: {result.select_seconds:.3f}s | spostamento: {result.move_seconds:.3f}s"
             ))
@@ -117,6 +117,8 @@ class AboutPage(JsonLdMixin, Page):
     
     # === Wagtail Config ===
     template = "website/pages/about_page.jinja2"
+    query_budget = 15  # query SQL max a cache calde (tests/test_query_budgets.py)
+    rendition_specs = ("max-800x600", "original")  # apps.core.renditions
     subpage_types = ["website.BoardPage", "website.TransparencyPage", "website.ContactPage"]
     
     content_panels = Page.content_panels + [
@@ -183,6 +185,8 @@ class BoardPage(JsonLdMixin, Page):
     
     # === Wagtail Config ===
     template = "website/pages/board_page.jinja2"
+    query_budget = 15  # query SQL max a cache calde (tests/test_query_budgets.py)
+    rendition_specs = ("fill-600x400", "fill-300x300")  # apps.core.renditions
     parent_page_types = ["website.AboutPage"]
     
     content_panels = Page.content_panels + [
@@ -243,6 +247,7 @@ class TransparencyPage(JsonLdMixin, Page):
     
     # === Wagtail Config ===
     template = "website/pages/transparency_page.jinja2"
+    query_budget = 15  # query SQL max a cache calde (tests/test_query_budgets.py)
     parent_page_types = ["website.AboutPage"]
     
     content_panels = Page.content_panels + [
@@ -418,6 +423,7 @@ class ContactPage(JsonLdMixin, Page):
     
     # === Wagtail Config ===
     template = "website/pages/contact_page.jinja2"
+    query_budget = 15  # query SQL max a cache calde (tests/test_query_budgets.py)
     parent_page_types = ["website.AboutPage"]
     
     content_panels = Page.content_panels + [
@@ -13,7 +13,10 @@ from datetime import date
 
 import qrcode
 import qrcode.image.svg
+from django.core.paginator import Paginator
 from django.db import models
+from django.db.models import Count
+from django.db.models.functions import ExtractYear
 from django.http import HttpResponse
 from django.utils.html import strip_tags
 from django.utils.translation import gettext_lazy as _
@@ -26,6 +29,8 @@ from wagtail.contrib.routable_page.models import RoutablePageMixin, path as wagt
 from wagtail.fields import RichTextField, StreamField
 from wagtail.models import Page
 
+from apps.core.picture import picture_specs
+from apps.core.renditions import prefetch_renditions_for
 from apps.core.seo import JsonLdMixin, clean_html, get_organization_data, event as schema_event, place
 from apps.website.blocks import (
     EVENT_ATTACHMENT_SCHEMA_MAP,
@@ -149,6 +154,13 @@ class EventDetailPage(RoutablePageMixin, JsonLdMixin, Page):
     
     # === Wagtail Config ===
     template = "website/pages/event_detail_page.jinja2"
+    query_budget = 17  # query SQL max a cache calde (tests/test_query_budgets.py)
+    rendition_specs = (  # apps.core.renditions
+        *picture_specs("width-1280|format-webp"),
+        *picture_specs("fill-400x300"),
+        "width-1200",
+        "original",
+    )
     parent_page_types = ["website.EventsPage", "website.EventsArchivePage"]
     
     content_panels = Page.content_panels + [
@@ -395,6 +407,10 @@ class EventsPage(JsonLdMixin, Page):
     
     # === Wagtail Config ===
     template = "website/pages/events_page.jinja2"
+    query_budget = 16  # query SQL max a cache calde (tests/test_query_budgets.py)
+    # Rendition delle card (lista eventi) e dell'evento in evidenza
+    card_image_filter = "fill-400x300"
+    rendition_specs = (*picture_specs(card_image_filter), "fill-800x600")  # apps.core.renditions
     subpage_types = ["website.EventDetailPage"]
     
     content_panels = Page.content_panels + [
@@ -422,18 +438,23 @@ class EventsPage(JsonLdMixin, Page):
     
     def get_upcoming_events(self):
         """
-        Ritorna gli eventi futuri (da oggi in poi).
+        Ritorna gli eventi futuri (da oggi in poi), con immagini e rendition
+        delle card già caricate.
         """
         today = date.today()
-        return (
+        events = (
             EventDetailPage.objects
             .child_of(self)
             .live()
             .filter(start_date__gte=today)
             .order_by("start_date")
         )
+        return prefetch_renditions_for(events, picture_specs(self.card_image_filter))
     
     # === Schema.org Methods ===
+    # subEvent = eventi dell'anno corrente
+    json_ld_vary_on_date = True
+    
     def get_json_ld_type(self) -> str:
         return "EventSeries"
     
@@ -468,6 +489,7 @@ class EventsArchivePage(JsonLdMixin, Page):
     
     # === Wagtail Config ===
     template = "website/pages/events_archive_page.jinja2"
+    query_budget = 16  # query SQL max a cache calde (tests/test_query_budgets.py)
     subpage_types = ["website.EventDetailPage"]
     
     content_panels = Page.content_panels + [
@@ -478,51 +500,101 @@ class EventsArchivePage(JsonLdMixin, Page):
         verbose_name = _("Archivio Eventi")
         verbose_name_plural = _("Archivio Eventi")
     
-    def get_events_by_year(self):
-        """
-        Ritorna gli eventi passati raggruppati per anno (anno più recente in cima).
-        """
+    # Anni mostrati per pagina (?page=N) e limite dell'ItemList JSON-LD
+    years_per_page = 3
+    json_ld_max_items = 50
+    
+    # Rendition usata dalle card del template
+    card_image_filter = "fill-400x200"
+    rendition_specs = picture_specs(card_image_filter)  # apps.core.renditions
+    
+    def get_past_events(self):
+        """Eventi figli pubblicati con data di inizio passata."""
         today = date.today()
-        events = (
+        return (
             EventDetailPage.objects
             .child_of(self)
             .live()
             .filter(start_date__lt=today)
+        )
+    
+    def get_year_buckets(self) -> list[dict]:
+        """
+        Anni con eventi passati e numero di eventi per anno, calcolati dal
+        database (anno più recente in cima): [{"year": 2024, "count": 12}, ...]
+        """
+        return list(
+            self.get_past_events()
+            .annotate(year=ExtractYear("start_date"))
+            .values("year")
+            .annotate(count=Count("pk"))
+            .order_by("-year")
+        )
+    
+    def get_events_by_year(self, years=None):
+        """
+        Ritorna gli eventi passati raggruppati per anno (anno più recente in cima).
+        
+        Args:
+            years: anni da caricare (default: tutti). Le immagini e le
+                rendition delle card vengono caricate in blocco.
+        """
+        events = (
+            self.get_past_events()
+            .annotate(year=ExtractYear("start_date"))
+            .select_related("image")
             .order_by("-start_date")
         )
+        if years is not None:
+            events = events.filter(year__in=list(years))
         
-        # Raggruppa per anno
+        # Raggruppa per anno (già ordinati per data decrescente)
         by_year = {}
-        for evt in events:
-            year = evt.start_date.year
-            if year not in by_year:
-                by_year[year] = []
-            by_year[year].append(evt)
+        for evt in prefetch_renditions_for(events, picture_specs(self.card_image_filter)):
+            by_year.setdefault(evt.year, []).append(evt)
+        return list(by_year.items())
+    
+    def get_context(self, request, *args, **kwargs):
+        context = super().get_context(request, *args, **kwargs)
+        
+        # Paginazione per anni: conteggi dal DB, eventi solo per gli anni della pagina
+        buckets = self.get_year_buckets()
+        for position, bucket in enumerate(buckets):
+            bucket["page"] = position // self.years_per_page + 1
+        years_page = Paginator(buckets, self.years_per_page).get_page(request.GET.get("page"))
+        events_by_year = dict(self.get_events_by_year(years=[bucket["year"] for bucket in years_page]))
         
-        # Ordina per anno decrescente
-        return sorted(by_year.items(), key=lambda x: x[0], reverse=True)
+        context["year_buckets"] = buckets
+        context["years_page"] = years_page
+        context["events_by_year"] = [
+            (bucket["year"], bucket["count"], events_by_year.get(bucket["year"], []))
+            for bucket in years_page
+        ]
+        return context
     
     # === Schema.org Methods ===
+    # Elenco = eventi con data passata rispetto a oggi
+    json_ld_vary_on_date = True
+    
     def get_json_ld_type(self) -> str:
         return "ItemList"
     
     def get_json_ld_data(self, request=None) -> dict:
+        # Solo gli eventi più recenti: l'archivio completo cresce ogni anno
+        events = self.get_past_events().order_by("-start_date")[: self.json_ld_max_items]
         items = []
-        position = 1
         
-        for year, events in self.get_events_by_year():
-            for evt in events:
-                items.append({
-                    "@type": "ListItem",
-                    "position": position,
-                    "item": {
-                        "@type": "Event",
-                        "name": evt.event_name,
-                        "startDate": evt.start_date.isoformat(),
-                        "url": evt.full_url,
-                    },
-                })
-                position += 1
+        for position, evt in enumerate(events, start=1):
+            items.append({
+                "@type": "ListItem",
+                "position": position,
+                "item": {
+                    "@type": "Event",
+                    "name": evt.event_name,
+                    "startDate": evt.start_date.isoformat(),
+                    "url": evt.full_url,
+                },
+            })
         
         return {
             "name": self.title,
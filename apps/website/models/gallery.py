@@ -11,6 +11,7 @@ from wagtail.admin.panels import FieldPanel, InlinePanel, MultiFieldPanel
 from wagtail.fields import RichTextField, StreamField
 from wagtail.models import Page, Orderable
 
+from apps.core.picture import picture_specs
 from apps.core.seo import JsonLdMixin, clean_html, image_object
 from apps.website.blocks import GalleryBlock, CollectionGalleryBlock
 
@@ -108,6 +109,16 @@ class GalleryPage(JsonLdMixin, Page):
     
     # === Wagtail Config ===
     template = "website/pages/gallery_page.jinja2"
+    query_budget = 15  # query SQL max a cache calde (tests/test_query_budgets.py)
+    # Rendition del template e del JSON-LD (apps.core.renditions), caricate
+    # insieme alle immagini del manifest
+    rendition_specs = (
+        *picture_specs("fill-400x400|format-webp|webpquality-85"),
+        "width-1600|format-webp|webpquality-85",
+        "original",
+    )
+    _gallery_manifest = None
+    _is_gallery_preview = False
     
     content_panels = Page.content_panels + [
         FieldPanel("intro"),
@@ -151,6 +162,32 @@ class GalleryPage(JsonLdMixin, Page):
         
         return self.gallery
     
+    def _get_gallery_manifest(self):
+        """
+        Manifest della galleria (sezioni, categorie, tag) con gli oggetti già
+        caricati. Memoizzato sull'istanza: i quattro helper usati dal template
+        condividono lo stesso manifest e le stesse query.
+        """
+        if self._gallery_manifest is None:
+            from apps.website.services.gallery_manifest import (
+                build_gallery_manifest,
+                get_gallery_manifest,
+                hydrate_gallery_manifest,
+            )
+
+            # Le anteprime mostrano una revisione non pubblicata: niente cache
+            if self._is_gallery_preview:
+                manifest = build_gallery_manifest(self)
+            else:
+                manifest = get_gallery_manifest(self)
+            self._gallery_manifest = hydrate_gallery_manifest(manifest, self.rendition_specs)
+        return self._gallery_manifest
+
+    def serve_preview(self, request, mode_name):
+        self._is_gallery_preview = True
+        self._gallery_manifest = None
+        return super().serve_preview(request, mode_name)
+
     def get_gallery_sections(self):
         """
         Restituisce le sezioni della galleria con titoli e immagini.
@@ -158,104 +195,12 @@ class GalleryPage(JsonLdMixin, Page):
         Ogni sezione ha:
         - id: slug univoco per anchor links
         - title: titolo della sezione (o nome collezione)
-        - images: lista di immagini
+        - images: lista di immagini (image, title, caption, category, tags)
         
         Returns:
             list[dict]: Lista di sezioni con id, title, images
         """
-        from django.utils.text import slugify
-        from wagtail.images import get_image_model
-        Image = get_image_model()
-        
-        sections = []
-        seen_image_ids = set()
-        
-        # 1. Sezione InlinePanel (se ha immagini)
-        inline_images = []
-        for img in self.gallery_images.all():
-            inline_images.append({
-                "image": img.image,
-                "title": img.title or img.image.title or "",
-                "caption": img.caption or "",
-                "category": img.category,
-            })
-            seen_image_ids.add(img.image.id)
-        
-        if inline_images:
-            sections.append({
-                "id": "galleria-principale",
-                "title": _("Galleria Principale"),
-                "images": inline_images,
-            })
-        
-        # 2. Sezioni da StreamField (usa sorgente se traduzione è vuota)
-        gallery_blocks = self._get_source_gallery_blocks()
-        for idx, block in enumerate(gallery_blocks):
-            if block.block_type == "collection_gallery":
-                collection_value = block.value.get("collection")
-                block_category = block.value.get("category")
-                block_title = block.value.get("title") or ""
-                
-                if collection_value:
-                    # collection_value può essere un ID (int) o un oggetto Collection
-                    from wagtail.models import Collection as WagtailCollection
-                    if isinstance(collection_value, int):
-                        try:
-                            collection = WagtailCollection.objects.get(id=collection_value)
-                        except WagtailCollection.DoesNotExist:
-                            continue
-                    else:
-                        collection = collection_value
-                    
-                    section_images = []
-                    collection_images = Image.objects.filter(
-                        collection=collection
-                    ).order_by("created_at")
-                    
-                    for img in collection_images:
-                        if img.id in seen_image_ids:
-                            continue
-                        
-                        tag_names = [tag.name for tag in img.tags.all()]
-                        caption = ", ".join(tag_names) if tag_names else ""
-                        
-                        section_images.append({
-                            "image": img,
-                            "title": img.title or "",
-                            "caption": caption,
-                            "category": block_category,
-                        })
-                        seen_image_ids.add(img.id)
-                    
-                    if section_images:
-                        # Usa il titolo del blocco, o il nome della collezione
-                        title = block_title or collection.name
-                        sections.append({
-                            "id": slugify(title) or f"sezione-{idx}",
-                            "title": title,
-                            "images": section_images,
-                        })
-                        
-            elif block.block_type == "gallery":
-                section_images = []
-                for img in block.value.get("images", []):
-                    if img.get("image") and img["image"].id not in seen_image_ids:
-                        section_images.append({
-                            "image": img["image"],
-                            "title": img.get("title") or "",
-                            "caption": img.get("caption") or "",
-                            "category": img.get("category"),
-                        })
-                        seen_image_ids.add(img["image"].id)
-                
-                if section_images:
-                    sections.append({
-                        "id": f"galleria-{idx}",
-                        "title": _("Galleria"),
-                        "images": section_images,
-                    })
-        
-        return sections
+        return self._get_gallery_manifest()["sections"]
     
     def get_all_images(self):
         """
@@ -267,98 +212,16 @@ class GalleryPage(JsonLdMixin, Page):
         
         Le immagini già presenti in InlinePanel non vengono duplicate.
         """
-        from wagtail.images import get_image_model
-        Image = get_image_model()
-        
-        images = []
-        seen_image_ids = set()  # Per evitare duplicati
-        
-        # 1. Immagini da InlinePanel (priorità alta)
-        for img in self.gallery_images.all():
-            images.append({
-                "image": img.image,
-                "title": img.title or img.image.title or "",
-                "caption": img.caption or "",
-                "category": img.category,
-            })
-            seen_image_ids.add(img.image.id)
-        
-        # 2. Immagini da StreamField (usa sorgente se traduzione è vuota)
-        gallery_blocks = self._get_source_gallery_blocks()
-        for block in gallery_blocks:
-            if block.block_type == "collection_gallery":
-                # Blocco collezione: carica tutte le immagini dalla collection
-                collection_value = block.value.get("collection")
-                block_category = block.value.get("category")
-                
-                if collection_value:
-                    # collection_value può essere un ID (int) o un oggetto Collection
-                    from wagtail.models import Collection as WagtailCollection
-                    if isinstance(collection_value, int):
-                        try:
-                            collection = WagtailCollection.objects.get(id=collection_value)
-                        except WagtailCollection.DoesNotExist:
-                            continue
-                    else:
-                        collection = collection_value
-                    
-                    collection_images = Image.objects.filter(
-                        collection=collection
-                    ).order_by("created_at")
-                    
-                    for img in collection_images:
-                        # Salta se già presente
-                        if img.id in seen_image_ids:
-                            continue
-                        
-                        # Costruisci caption dai tag
-                        tag_names = [tag.name for tag in img.tags.all()]
-                        caption = ", ".join(tag_names) if tag_names else ""
-                        
-                        images.append({
-                            "image": img,
-                            "title": img.title or "",
-                            "caption": caption,
-                            "category": block_category,
-                        })
-                        seen_image_ids.add(img.id)
-                        
-            elif block.block_type == "gallery":
-                # Blocco galleria legacy: immagini singole
-                for img in block.value.get("images", []):
-                    if img.get("image") and img["image"].id not in seen_image_ids:
-                        images.append({
-                            "image": img["image"],
-                            "title": img.get("title") or "",
-                            "caption": img.get("caption") or "",
-                            "category": img.get("category"),
-                        })
-                        seen_image_ids.add(img["image"].id)
-        
-        return images
+        return self._get_gallery_manifest()["images"]
     
     def get_categories(self):
         """Restituisce le categorie uniche presenti nelle immagini."""
-        categories = {}
-        for img in self.get_all_images():
-            cat = img.get("category")
-            if cat and hasattr(cat, 'slug'):
-                categories[cat.slug] = cat
-        return sorted(categories.values(), key=lambda x: x.sort_order)
+        return self._get_gallery_manifest()["categories"]
     
     def get_all_tags(self):
         """Restituisce tutti i tag unici dalle immagini della galleria."""
-        from collections import Counter
-        tag_counter = Counter()
-        
-        for img in self.get_all_images():
-            image_obj = img.get("image")
-            if image_obj and hasattr(image_obj, 'tags'):
-                for tag in image_obj.tags.all():
-                    tag_counter[tag.name] += 1
-        
-        # Restituisce lista di tuple (tag_name, count) ordinata per frequenza
-        return tag_counter.most_common()
+        # Lista di tuple (tag_name, count) ordinata per frequenza
+        return self._get_gallery_manifest()["tags"]
     
     # === Schema.org Methods ===
     def get_json_ld_type(self) -> str:
@@ -142,6 +142,8 @@ class HomePage(JsonLdMixin, Page):
     
     # === Wagtail Config ===
     template = "website/pages/home_page.jinja2"
+    query_budget = 12  # query SQL max a cache calde (tests/test_query_budgets.py)
+    rendition_specs = ("fill-1280x720|format-webp",)  # apps.core.renditions
     max_count = 1
     
     content_panels = Page.content_panels + [
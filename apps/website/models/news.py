@@ -19,6 +19,8 @@ from wagtail.search import index
 from coderedcms.blocks import CONTENT_STREAMBLOCKS
 from coderedcms.models import CoderedArticleIndexPage, CoderedArticlePage
 
+from apps.core.picture import picture_specs
+from apps.core.renditions import prefetch_renditions_for
 from apps.core.seo import JsonLdMixin, get_organization_data, clean_html
 from apps.website.blocks import GalleryImageBlock
 
@@ -74,10 +76,18 @@ class NewsIndexPage(JsonLdMixin, CoderedArticleIndexPage):
         verbose_name_plural = _("Indici Novità")
     
     template = "website/pages/news_index_page.jinja2"
+    query_budget = 26  # query SQL max a cache calde (tests/test_query_budgets.py)
+    # Rendition delle card (articoli, in evidenza, risultati di ricerca)
+    card_image_filter = "fill-600x400"
+    rendition_specs = (card_image_filter, "fill-400x300")  # apps.core.renditions
     
     # Solo NewsPage come figli
     subpage_types = ["website.NewsPage"]
     
+    # Query dei figli sul modello concreto: l'ordinamento di default
+    # (-date_display) non esiste su CoderedPage
+    index_query_pagemodel = "website.NewsPage"
+    
     # Può stare sotto HomePage
     parent_page_types = ["website.HomePage"]
     
@@ -93,6 +103,9 @@ class NewsIndexPage(JsonLdMixin, CoderedArticleIndexPage):
     # Schema.org CollectionPage + ItemList
     # =========================================================================
     
+    # Con ?tag= o ?q= l'ItemList contiene i risultati della ricerca
+    json_ld_vary_on_params = ("tag", "q")
+    
     def get_json_ld_type(self) -> str:
         return "CollectionPage"
     
@@ -518,6 +531,14 @@ class NewsIndexPage(JsonLdMixin, CoderedArticleIndexPage):
             ]
             context["is_search"] = False
         
+        # Immagini e rendition delle card caricate in blocco per ogni lista
+        card_specs = [self.card_image_filter]
+        for key in ("index_children", "featured_pages", "global_search_results"):
+            if context.get(key) is not None:
+                context[key] = prefetch_renditions_for(
+                    context[key], card_specs, fields=("cover_image", "image"),
+                )
+        
         return context
 
 
@@ -581,6 +602,13 @@ class NewsPage(JsonLdMixin, CoderedArticlePage):
         verbose_name_plural = _("Articoli")
     
     template = "website/pages/news_page.jinja2"
+    query_budget = 24  # query SQL max a cache calde (tests/test_query_budgets.py)
+    rendition_specs = (  # apps.core.renditions
+        *picture_specs("width-1280|format-webp"),
+        "fill-400x300",
+        "width-1200",
+        "fill-80x60",
+    )
     
     # Solo sotto NewsIndexPage
     parent_page_types = ["website.NewsIndexPage"]
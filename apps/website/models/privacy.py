@@ -29,6 +29,7 @@ class PrivacyPage(JsonLdMixin, Page):
     
     # === Wagtail Config ===
     template = "website/pages/privacy_page.jinja2"
+    query_budget = 15  # query SQL max a cache calde (tests/test_query_budgets.py)
     
     content_panels = Page.content_panels + [
         FieldPanel("intro"),
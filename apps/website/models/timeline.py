@@ -9,6 +9,7 @@ from wagtail.admin.panels import FieldPanel
 from wagtail.fields import StreamField
 from wagtail.models import Page
 
+from apps.core.renditions import attach_renditions
 from apps.core.seo import JsonLdMixin, article
 from apps.website.blocks import ArticleBlock
 
@@ -38,6 +39,8 @@ class TimelinePage(JsonLdMixin, Page):
     
     # === Wagtail Config ===
     template = "website/pages/timeline_page.jinja2"
+    query_budget = 15  # query SQL max a cache calde (tests/test_query_budgets.py)
+    rendition_specs = ("fill-400x300", "fill-800x600")  # apps.core.renditions
     
     content_panels = Page.content_panels + [
         FieldPanel("intro"),
@@ -55,6 +58,10 @@ class TimelinePage(JsonLdMixin, Page):
             if block.block_type == "article":
                 articles_list.append(block.value)
         
+        # Rendition di template e JSON-LD in blocco (le immagini dei blocchi
+        # sono già caricate insieme dallo StreamField)
+        attach_renditions([art.get("image") for art in articles_list], self.rendition_specs)
+        
         # Ordina per data decrescente
         return sorted(
             articles_list,
@@ -7,13 +7,21 @@ che dal middleware "lazy daily" (apps.core.daily_tasks).
 from __future__ import annotations
 
 import logging
+import time
 from dataclasses import dataclass
+from functools import reduce
+from operator import or_
 
 from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
 
 logger = logging.getLogger(__name__)
 
+# Spostamenti per transazione: un errore non annulla i batch già committati
+# e i lock sull'albero delle pagine restano brevi.
+DEFAULT_BATCH_SIZE = 50
+
 
 @dataclass
 class ArchiveResult:
@@ -21,9 +29,22 @@ class ArchiveResult:
     candidates: int = 0
     skipped_no_archive: int = 0
     skipped_already_archived: int = 0
+    batches: int = 0
+    select_seconds: float = 0.0
+    move_seconds: float = 0.0
+
+
+def _batched(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
 
 
-def archive_past_events(*, dry_run: bool = True, grace_days: int = 1) -> ArchiveResult:
+def archive_past_events(
+    *,
+    dry_run: bool = True,
+    grace_days: int = 1,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> ArchiveResult:
     """
     Sposta sotto la rispettiva EventsArchivePage del locale tutti gli
     EventDetailPage la cui end_date (o start_date se end_date è None)
@@ -33,29 +54,36 @@ def archive_past_events(*, dry_run: bool = True, grace_days: int = 1) -> Archive
     spostamenti, passare esplicitamente ``dry_run=False``.
 
     Idempotente: salta gli eventi già figli di un EventsArchivePage.
+
+    La selezione è fatta dal database: gli eventi "già archiviati" sono
+    quelli con path treebeard che inizia col path di un archivio e depth
+    pari a quella dell'archivio + 1 (figli diretti), senza ``get_parent()``
+    per evento. Gli spostamenti avvengono a blocchi di ``batch_size``, ognuno
+    nella propria transazione.
     """
     # Import locale per evitare AppRegistryNotReady
     from apps.website.models.events import EventDetailPage, EventsArchivePage
 
+    started = time.monotonic()
     now = timezone.now()
     cutoff = now - timezone.timedelta(days=grace_days)
     result = ArchiveResult()
 
-    archives = {a.locale_id: a for a in EventsArchivePage.objects.all()}
+    archive_list = list(EventsArchivePage.objects.all())
+    archives = {a.locale_id: a for a in archive_list}
     if not archives:
         logger.warning("archive_past_events: nessuna EventsArchivePage configurata")
         return result
 
-    archive_ids = {a.id for a in archives.values()}
-    candidates: list[tuple] = []
+    past = EventDetailPage.objects.filter(
+        Q(end_date__lt=cutoff) | Q(end_date__isnull=True, start_date__lt=cutoff)
+    )
+    in_archive = reduce(or_, (Q(path__startswith=a.path, depth=a.depth + 1) for a in archive_list))
 
-    for evt in EventDetailPage.objects.all().select_related("locale"):
-        ref = evt.end_date or evt.start_date
-        if ref is None or ref >= cutoff:
-            continue
-        if evt.get_parent().id in archive_ids:
-            result.skipped_already_archived += 1
-            continue
+    result.skipped_already_archived = past.filter(in_archive).count()
+
+    candidates: list[tuple] = []
+    for evt in past.exclude(in_archive).select_related("locale").order_by("path"):
         archive = archives.get(evt.locale_id)
         if archive is None:
             result.skipped_no_archive += 1
@@ -63,17 +91,22 @@ def archive_past_events(*, dry_run: bool = True, grace_days: int = 1) -> Archive
         candidates.append((evt, archive))
 
     result.candidates = len(candidates)
+    result.select_seconds = time.monotonic() - started
 
     if dry_run or not candidates:
         return result
 
-    with transaction.atomic():
-        for evt, archive in candidates:
-            evt.move(archive, pos="last-child")
-            result.moved += 1
-            logger.info(
-                "archive_past_events: moved id=%s '%s' (loc=%s) → archive id=%s",
-                evt.id, evt.title, evt.locale.language_code, archive.id,
-            )
+    move_started = time.monotonic()
+    for batch in _batched(candidates, batch_size):
+        with transaction.atomic():
+            for evt, archive in batch:
+                evt.move(archive, pos="last-child")
+                result.moved += 1
+                logger.info(
+                    "archive_past_events: moved id=%s '%s' (loc=%s) → archive id=%s",
+                    evt.id, evt.title, evt.locale.language_code, archive.id,
+                )
+        result.batches += 1
+    result.move_seconds = time.monotonic() - move_started
 
     return result
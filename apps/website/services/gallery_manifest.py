@@ -0,0 +1,328 @@
+"""
+MC Castellazzo - Gallery Manifest
+=================================
+Un unico elenco di sezioni/immagini condiviso da ``get_gallery_sections``,
+``get_all_images``, ``get_categories`` e ``get_all_tags`` (prima ognuno
+ricostruiva tutto da capo, con una query ``img.tags.all()`` per immagine).
+
+Il manifest contiene solo dati semplici (id immagini e categorie, titoli,
+caption, nomi dei tag) ed è salvato nella cache condivisa per
+(pagina, revisione live, lingua). Insieme al manifest vengono salvati i
+token di versione delle sue dipendenze:
+
+- ``collection:<id>``: rigenerato quando un'immagine della collezione viene
+  salvata/cancellata, spostata di collezione o cambia tag;
+- ``categories``: rigenerato su save/delete di GalleryCategory;
+- ``pages``: rigenerato su publish/unpublish di GalleryPage e su modifica
+  delle GalleryImage (le traduzioni vuote usano i blocchi della sorgente).
+
+Se un token non corrisponde più il manifest viene ricostruito. L'idratazione
+(oggetti Image con le rendition del template, GalleryCategory) costa un
+numero fisso di query, indipendente dal numero di foto.
+"""
+from __future__ import annotations
+
+import logging
+import uuid
+from collections import Counter
+
+from django.core.cache import cache
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils.text import slugify
+from django.utils.translation import get_language
+from django.utils.translation import gettext as _
+from wagtail.images import get_image_model
+from wagtail.models import Collection
+from wagtail.signals import page_published, page_unpublished
+
+from apps.core.renditions import attach_renditions
+
+logger = logging.getLogger(__name__)
+
+Image = get_image_model()
+
+_CACHE_KEY_PREFIX = "gallery_manifest"
+_TOKEN_KEY_PREFIX = "gallery_manifest:token"
+# Rete di sicurezza: anche senza segnali il manifest non vive oltre 24h
+_MANIFEST_TTL_SECONDS = 24 * 3600
+
+
+def _cache_key(page) -> str:
+    return f"{_CACHE_KEY_PREFIX}:{page.pk}:{page.live_revision_id}:{get_language() or 'it'}"
+
+
+def _token_key(name: str) -> str:
+    return f"{_TOKEN_KEY_PREFIX}:{name}"
+
+
+def _current_tokens(names) -> dict[str, str]:
+    """Token attuali delle dipendenze, creandoli se mancano."""
+    keys = {name: _token_key(name) for name in names}
+    found = cache.get_many(list(keys.values()))
+    tokens = {}
+    for name, key in keys.items():
+        token = found.get(key)
+        if token is None:
+            token = uuid.uuid4().hex
+            cache.set(key, token, timeout=None)
+        tokens[name] = token
+    return tokens
+
+
+def bump_token(name: str) -> None:
+    cache.set(_token_key(name), uuid.uuid4().hex, timeout=None)
+
+
+def _entry(image, title, caption, category_id, tags) -> dict:
+    return {
+        "image_id": image.id,
+        "title": title or "",
+        "caption": caption or "",
+        "category_id": category_id,
+        "tags": tags,
+    }
+
+
+def build_gallery_manifest(page) -> dict:
+    """
+    Costruisce (senza cache) il manifest di una GalleryPage.
+
+    Returns:
+        dict con ``sections`` (id, title, images), ``tags`` [(nome, conteggio)]
+        e ``dependencies`` (nomi dei token da cui dipende).
+    """
+    sections = []
+    seen_image_ids = set()
+    collection_ids = set()
+
+    # 1. Sezione InlinePanel (se ha immagini)
+    inline_images = []
+    inline_rows = (
+        page.gallery_images.all()
+        .select_related("image")
+        .prefetch_related("image__tags")
+    )
+    for row in inline_rows:
+        inline_images.append(_entry(
+            row.image,
+            row.title or row.image.title,
+            row.caption,
+            row.category_id,
+            [tag.name for tag in row.image.tags.all()],
+        ))
+        seen_image_ids.add(row.image.id)
+        collection_ids.add(row.image.collection_id)
+
+    if inline_images:
+        sections.append({
+            "id": "galleria-principale",
+            "title": _("Galleria Principale"),
+            "images": inline_images,
+        })
+
+    # 2. Sezioni da StreamField (usa sorgente se traduzione è vuota)
+    gallery_blocks = page._get_source_gallery_blocks()
+    block_collection_ids = {
+        block.value.get("collection") for block in gallery_blocks
+        if block.block_type == "collection_gallery" and isinstance(block.value.get("collection"), int)
+    }
+    collections = Collection.objects.in_bulk(block_collection_ids) if block_collection_ids else {}
+
+    for idx, block in enumerate(gallery_blocks):
+        if block.block_type == "collection_gallery":
+            collection_value = block.value.get("collection")
+            if not collection_value:
+                continue
+            # collection_value può essere un ID (int) o un oggetto Collection
+            if isinstance(collection_value, int):
+                collection = collections.get(collection_value)
+                if collection is None:
+                    continue
+            else:
+                collection = collection_value
+            collection_ids.add(collection.id)
+
+            block_category = block.value.get("category")
+            block_title = block.value.get("title") or ""
+            section_images = []
+            collection_images = (
+                Image.objects.filter(collection=collection)
+                .order_by("created_at")
+                .prefetch_related("tags")
+            )
+            for img in collection_images:
+                if img.id in seen_image_ids:
+                    continue
+                tag_names = [tag.name for tag in img.tags.all()]
+                section_images.append(_entry(
+                    img,
+                    img.title,
+                    ", ".join(tag_names),
+                    getattr(block_category, "pk", block_category),
+                    tag_names,
+                ))
+                seen_image_ids.add(img.id)
+
+            if section_images:
+                # Usa il titolo del blocco, o il nome della collezione
+                title = block_title or collection.name
+                sections.append({
+                    "id": slugify(title) or f"sezione-{idx}",
+                    "title": title,
+                    "images": section_images,
+                })
+
+        elif block.block_type == "gallery":
+            section_images = []
+            block_images = [img for img in block.value.get("images", []) if img.get("image")]
+            tags_by_image = {
+                img.id: [tag.name for tag in img.tags.all()]
+                for img in Image.objects.filter(
+                    id__in=[item["image"].id for item in block_images]
+                ).prefetch_related("tags")
+            } if block_images else {}
+            for item in block_images:
+                image = item["image"]
+                if image.id in seen_image_ids:
+                    continue
+                category = item.get("category")
+                section_images.append(_entry(
+                    image,
+                    item.get("title"),
+                    item.get("caption"),
+                    getattr(category, "pk", category),
+                    tags_by_image.get(image.id, []),
+                ))
+                seen_image_ids.add(image.id)
+                collection_ids.add(image.collection_id)
+
+            if section_images:
+                sections.append({
+                    "id": f"galleria-{idx}",
+                    "title": _("Galleria"),
+                    "images": section_images,
+                })
+
+    tag_counter = Counter(
+        tag for section in sections for entry in section["images"] for tag in entry["tags"]
+    )
+    dependencies = ["pages", "categories", *(f"collection:{cid}" for cid in sorted(collection_ids))]
+    return {
+        "sections": sections,
+        "tags": tag_counter.most_common(),
+        "dependencies": dependencies,
+    }
+
+
+def get_gallery_manifest(page) -> dict:
+    """Manifest dalla cache condivisa, ricostruito se una dipendenza è cambiata."""
+    key = _cache_key(page)
+    cached = cache.get(key)
+    if cached is not None:
+        manifest, tokens = cached
+        if _current_tokens(manifest["dependencies"]) == tokens:
+            return manifest
+
+    manifest = build_gallery_manifest(page)
+    tokens = _current_tokens(manifest["dependencies"])
+    cache.set(key, (manifest, tokens), timeout=_MANIFEST_TTL_SECONDS)
+    return manifest
+
+
+def hydrate_gallery_manifest(manifest: dict, filter_specs=()) -> dict:
+    """
+    Sostituisce gli id con gli oggetti: Image (con le rendition ``filter_specs``
+    già caricate, vedi ``apps.core.renditions.attach_renditions``) e
+    GalleryCategory. Le immagini cancellate nel frattempo
+    vengono saltate.
+
+    Returns:
+        dict con ``sections``, ``images`` (tutte, in ordine), ``categories``
+        (ordinate per sort_order) e ``tags``.
+    """
+    from apps.website.models import GalleryCategory
+
+    entries = [entry for section in manifest["sections"] for entry in section["images"]]
+    images_by_id = Image.objects.in_bulk({entry["image_id"] for entry in entries})
+    # Rendition in una query, le mancanti create in blocco
+    attach_renditions(images_by_id.values(), filter_specs)
+    category_ids = {entry["category_id"] for entry in entries if entry["category_id"]}
+    categories_by_id = GalleryCategory.objects.in_bulk(category_ids) if category_ids else {}
+
+    sections = []
+    all_images = []
+    for section in manifest["sections"]:
+        section_images = []
+        for entry in section["images"]:
+            image = images_by_id.get(entry["image_id"])
+            if image is None:
+                continue
+            section_images.append({
+                "image": image,
+                "title": entry["title"],
+                "caption": entry["caption"],
+                "category": categories_by_id.get(entry["category_id"]),
+                "tags": entry["tags"],
+            })
+        if section_images:
+            sections.append({**section, "images": section_images})
+            all_images.extend(section_images)
+
+    categories = {}
+    for item in all_images:
+        category = item["category"]
+        if category is not None:
+            categories[category.slug] = category
+
+    return {
+        "sections": sections,
+        "images": all_images,
+        "categories": sorted(categories.values(), key=lambda category: category.sort_order),
+        "tags": manifest["tags"],
+    }
+
+
+# ---------------------------------------------------------------------------
+# Signal receivers
+# ---------------------------------------------------------------------------
+
+@receiver(pre_save, sender=Image)
+def _on_image_pre_save(sender, instance, **kwargs):
+    # Immagine spostata di collezione: invalida anche quella di origine
+    if instance.pk:
+        previous = sender.objects.filter(pk=instance.pk).values_list("collection_id", flat=True).first()
+        if previous is not None and previous != instance.collection_id:
+            bump_token(f"collection:{previous}")
+
+
+@receiver(post_save, sender=Image)
+@receiver(post_delete, sender=Image)
+def _on_image_change(sender, instance, **kwargs):
+    bump_token(f"collection:{instance.collection_id}")
+
+
+@receiver(m2m_changed)
+def _on_image_tags_change(sender, instance, action, **kwargs):
+    if isinstance(instance, Image) and action in ("post_add", "post_remove", "post_clear"):
+        bump_token(f"collection:{instance.collection_id}")
+
+
+@receiver(page_published)
+@receiver(page_unpublished)
+def _on_gallery_publish(sender, instance, **kwargs):
+    from apps.website.models import GalleryPage
+
+    if issubclass(sender, GalleryPage):
+        bump_token("pages")
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def _on_gallery_content_change(sender, instance, **kwargs):
+    from apps.website.models import GalleryCategory, GalleryImage
+
+    if sender is GalleryCategory:
+        bump_token("categories")
+    elif sender is GalleryImage:
+        bump_token("pages")
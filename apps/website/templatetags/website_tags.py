@@ -9,13 +9,21 @@ from django import template
 from django.utils.translation import get_language
 from wagtail.models import Locale
 
+from apps.core.site_context import get_site_context
 from apps.website.models import Navbar, Footer
 
 register = template.Library()
 
 
-def get_current_locale():
-    """Get the current Wagtail locale based on Django language."""
+def get_current_locale(request=None):
+    """
+    Get the current Wagtail locale based on Django language.
+
+    Con una request il Locale viene letto una sola volta e riusato
+    (apps.core.site_context).
+    """
+    if request is not None:
+        return get_site_context(request).locale
     lang_code = get_language() or "it"
     try:
         return Locale.objects.get(language_code=lang_code)
@@ -23,49 +31,49 @@ def get_current_locale():
         return Locale.objects.get(language_code="it")
 
 
-@register.simple_tag
-def get_navbar():
+@register.simple_tag(takes_context=True)
+def get_navbar(context):
     """
     Restituisce la navbar attiva per la lingua corrente.
 
     Returns:
         Navbar object or None
     """
-    locale = get_current_locale()
+    locale = get_current_locale(context.get("request"))
     return Navbar.objects.filter(is_active=True, locale=locale).first()
 
 
-@register.simple_tag
-def get_footer():
+@register.simple_tag(takes_context=True)
+def get_footer(context):
     """
     Restituisce il footer attivo per la lingua corrente.
 
     Returns:
         Footer object or None
     """
-    locale = get_current_locale()
+    locale = get_current_locale(context.get("request"))
     return Footer.objects.filter(is_active=True, locale=locale).first()
 
 
-@register.inclusion_tag("website/tags/navbar.html")
-def render_navbar():
+@register.inclusion_tag("website/tags/navbar.html", takes_context=True)
+def render_navbar(context):
     """
     Renderizza la navbar principale.
 
     Returns:
         Contesto per il template navbar.html.
     """
-    navbar = get_navbar()
+    navbar = get_navbar(context)
     return {"navbar": navbar}
 
 
-@register.inclusion_tag("website/tags/footer.html")
-def render_footer():
+@register.inclusion_tag("website/tags/footer.html", takes_context=True)
+def render_footer(context):
     """
     Renderizza il footer principale.
 
     Returns:
         Contesto per il template footer.html.
     """
-    footer = get_footer()
+    footer = get_footer(context)
     return {"footer": footer}
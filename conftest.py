@@ -15,6 +15,25 @@ def django_db_setup():
     }
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Svuota le cache: snapshot e pagine non devono sopravvivere al rollback del DB."""
+    from django.core.cache import caches
+
+    for backend in caches.all(initialized_only=False):
+        backend.clear()
+    yield
+    for backend in caches.all(initialized_only=False):
+        backend.clear()
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    """File caricati e rendition in una cartella temporanea, non in media/ del repo."""
+    settings.MEDIA_ROOT = tmp_path / "media"
+    return settings.MEDIA_ROOT
+
+
 @pytest.fixture
 def site(db):
     """Get or create Wagtail Site."""
@@ -65,6 +84,27 @@ def site(db):
     return site
 
 
+@pytest.fixture
+def seo_site(site):
+    """Site con SeoSettings compilati (base.jinja2 li usa nel <title>)."""
+    from wagtailseo.models import SeoSettings
+
+    seo = SeoSettings.for_site(site)
+    seo.struct_org_name = "MC Castellazzo"
+    seo.save()
+    return site
+
+
+@pytest.fixture
+def it_request(site):
+    """Richiesta GET a /it/ sull'host del site (locale italiano presente)."""
+    from django.test import RequestFactory
+    from wagtail.models import Locale
+
+    Locale.objects.get_or_create(language_code="it")
+    return RequestFactory().get("/it/", HTTP_HOST=site.hostname)
+
+
 @pytest.fixture
 def user(db):
     """Create test user."""
@@ -74,6 +74,10 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
+    # Query SQL / tempo DB per richiesta e per tipo di pagina (header per staff + log)
+    "apps.core.middleware.QueryStatsMiddleware",
+    # Full-page cache (salvataggio): vedi apps.core.page_cache
+    "apps.core.page_cache.PageCacheUpdateMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.locale.LocaleMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -87,6 +91,8 @@ MIDDLEWARE = [
     "allauth.account.middleware.AccountMiddleware",
     # Daily lazy tasks (es. archiviazione eventi passati)
     "apps.core.daily_tasks.DailyTasksMiddleware",
+    # Full-page cache (lettura): ultimo, dopo lingua/auth e dopo i daily tasks
+    "wagtailcache.cache.FetchFromCacheMiddleware",
 ]
 
 ROOT_URLCONF = "mccastellazzob.urls"
@@ -131,6 +137,7 @@ TEMPLATES = [
             "globals": {
                 "now": "django.utils.timezone.now",
                 "localtime": "django.utils.timezone.localtime",
+                "picture": "apps.core.picture.picture",
             },
             "autoescape": True,
             "auto_reload": DEBUG,
@@ -166,6 +173,69 @@ DATABASES = {
     }
 }
 
+# ======================
+# CACHE
+# ======================
+# Cache condivisa fra i worker Gunicorn (file system): usata dallo snapshot di
+# navigazione (apps.core.navigation_cache) e dai lock dei daily tasks.
+# Con LocMemCache ogni worker avrebbe la propria copia e le invalidazioni su
+# publish non raggiungerebbero gli altri processi.
+#
+# "pagecache" è riservata alla full-page cache di wagtailcache
+# (apps.core.page_cache): il purge su publish la svuota per intero senza
+# toccare le altre chiavi.
+_CACHE_DIR = os.environ.get("DJANGO_CACHE_DIR", str(BASE_DIR / "cache"))
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": _CACHE_DIR,
+        "KEY_PREFIX": "mccastellazzob",
+        "TIMEOUT": 4 * 3600,
+    },
+    "pagecache": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.path.join(_CACHE_DIR, "pages"),
+        "KEY_PREFIX": "mccastellazzob",
+        "TIMEOUT": 4 * 3600,
+    },
+}
+
+# Full-page cache per visitatori anonimi (apps.core.page_cache)
+WAGTAIL_CACHE = os.environ.get("WAGTAIL_CACHE", "True").lower() == "true"
+WAGTAIL_CACHE_BACKEND = "pagecache"
+
+# Pre-generazione in background delle rendition della galleria dopo il
+# caricamento massivo (apps.core.renditions): thread per processo e limite della coda
+RENDITION_PREGENERATE_ENABLED = True
+RENDITION_WORKERS = 2
+RENDITION_QUEUE_MAX = 500
+
+# <picture> responsive (apps.core.picture): larghezze delle varianti srcset e
+# sorgente AVIF (usata solo se Pillow ha un encoder AVIF)
+PICTURE_WIDTHS = (320, 640, 960, 1280, 1600)
+PICTURE_AVIF_ENABLED = True
+
+# Bulk upload (apps.core.admin_views): processi per l'ottimizzazione
+# (None = core disponibili, 0/1 = nel processo della richiesta) e immagini
+# in lavorazione contemporaneamente (None = 2 per worker), per limitare la RSS
+BULK_UPLOAD_WORKERS = None
+BULK_UPLOAD_MAX_IN_FLIGHT = None
+# Effort dell'encoder WebP dell'ottimizzazione (0-6): 4 è circa un quarto più
+# veloce di 6 con file ~5% più grandi (manage.py benchmark_image_optimizer)
+BULK_UPLOAD_WEBP_METHOD = 6
+
+# Bulk upload a pezzi (apps.core.chunked_upload): dimensione dei chunk (sotto
+# DATA_UPLOAD_MAX_MEMORY_SIZE), cartella dei file parziali e durata dei batch
+BULK_UPLOAD_CHUNK_SIZE = 1024 * 1024
+BULK_UPLOAD_CHUNK_DIR = os.path.join(_CACHE_DIR, "bulk_upload")
+BULK_UPLOAD_BATCH_TTL = 24 * 3600
+
+# Quasi-duplicati nel bulk upload (apps.core.image_dedup): "link" non ricarica
+# e aggiunge i tag all'immagine esistente, "skip" salta, "upload" non controlla;
+# distanza di Hamming massima fra gli hash percettivi (max 7)
+BULK_UPLOAD_DUPLICATES = "link"
+IMAGE_DUPLICATE_MAX_DISTANCE = 6
+
 # Auth
 AUTH_USER_MODEL = "custom_user.User"
 
@@ -245,17 +315,51 @@ WAGTAILIMAGES_MAX_UPLOAD_SIZE = 10 * 1024 * 1024  # 10MB
 WAGTAILLOCALIZE_MACHINE_TRANSLATOR = {
     "CLASS": "apps.core.machine_translator.DeepTranslatorMachineTranslator",
     "OPTIONS": {
-        # Secondi di ritardo tra le stringhe (rate limiting)
-        "DELAY": 0.3,
+        # Richieste al secondo per provider (token bucket per processo): le
+        # lingue tradotte in parallelo condividono questo budget
+        "RATE_LIMITS": {"google": 5, "mymemory": 2},
         # Timeout per ogni singola chiamata HTTP (evita worker TIMEOUT)
         "HTTP_TIMEOUT": 8,
-        # Provider in ordine di priorità: Google primo (più veloce e affidabile)
+        # Provider in ordine di priorità: Google primo (più veloce e affidabile);
+        # riordinati a runtime per latenza e tasso di successo osservati
         "PROVIDERS": ["google", "mymemory"],
+        # Più segmenti per richiesta (entro il limite di caratteri del provider);
+        # pacchetti falliti ritradotti segmento per segmento
+        "BATCH": True,
+        # Memoria di traduzione condivisa (DB + LRU): frasi già tradotte non
+        # vanno in rete (apps.core.translation_memory)
+        "MEMORY": True,
         # Email MyMemory opzionale: 10000 req/giorno invece di 1000
         # "MYMEMORY_EMAIL": "mccastellazzob@gmail.com",
     },
 }
 
+# Voci della memoria di traduzione tenute in RAM da ogni processo
+TRANSLATION_MEMORY_CACHE_SIZE = 4096
+# Thread del pool per le chiamate ai provider (client e sessioni keep-alive
+# riutilizzati per thread, apps.core.translator_pool)
+MACHINE_TRANSLATION_THREADS = 8
+# Circuit breaker per provider (apps.core.provider_health): dopo N errori o
+# timeout consecutivi il provider viene saltato per N secondi, poi riprovato
+# con una sola richiesta. Stato in /admin/translator-status/
+MACHINE_TRANSLATION_BREAKER_FAILURES = 3
+MACHINE_TRANSLATION_BREAKER_SECONDS = 30
+
+# Coda dei lavori di traduzione in background (apps.core.translation_queue),
+# eseguita da `manage.py translation_worker`
+# Lavori in esecuzione contemporaneamente fra tutti i worker (i rate limit dei
+# provider sono per processo: con più di 1 si moltiplica la quota usata)
+TRANSLATION_QUEUE_CONCURRENCY = 1
+# Durata del lease: oltre, un lavoro di un worker morto torna eseguibile
+TRANSLATION_QUEUE_LEASE_SECONDS = 600
+# Tentativi massimi, con attesa esponenziale a partire da BACKOFF secondi
+TRANSLATION_QUEUE_MAX_ATTEMPTS = 5
+TRANSLATION_QUEUE_BACKOFF_SECONDS = 30
+# Giorni di conservazione dei lavori conclusi
+TRANSLATION_QUEUE_KEEP_DAYS = 7
+# Le pagine servite accodano le stringhe pendenti al massimo ogni N secondi per lingua
+TRANSLATION_ENQUEUE_INTERVAL = 60
+
 # CodeRedCMS
 CODERED_PROTECTED_MEDIA_URL = "/protected/"
 CODERED_PROTECTED_MEDIA_ROOT = BASE_DIR / "protected"
@@ -19,6 +19,9 @@ INSTALLED_APPS += ["debug_toolbar"]  # noqa: F405
 MIDDLEWARE.insert(0, "debug_toolbar.middleware.DebugToolbarMiddleware")  # noqa: F405
 INTERNAL_IPS = ["127.0.0.1"]
 
+# Full-page cache disattivata: le modifiche ai template si vedono subito
+WAGTAIL_CACHE = False
+
 # Email to console
 EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
 
@@ -15,6 +15,17 @@ DATABASES = {
     }
 }
 
+# Cache in memoria, svuotata fra un test e l'altro (vedi conftest.py)
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "pagecache": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "pagecache",
+    },
+}
+
 # Faster password hashing for tests
 PASSWORD_HASHERS = [
     "django.contrib.auth.hashers.MD5PasswordHasher",
@@ -36,3 +47,12 @@ RATELIMIT_ENABLE = False
 
 # Disabilita i daily lazy tasks durante i test
 DAILY_TASKS_ENABLED = False
+
+# Niente thread di pre-generazione rendition durante i test
+RENDITION_PREGENERATE_ENABLED = False
+
+# Ottimizzazione bulk upload nel processo dei test (niente pool di processi)
+BULK_UPLOAD_WORKERS = 0
+# Le immagini dei test sono tinte unite (stesso hash percettivo): il controllo
+# duplicati si attiva nei test dedicati
+BULK_UPLOAD_DUPLICATES = "upload"
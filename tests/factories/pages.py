@@ -15,6 +15,10 @@ from apps.website.models import (
     EventsPage,
     EventDetailPage,
     EventsArchivePage,
+    GalleryPage,
+    NewsIndexPage,
+    NewsPage,
+    PrivacyPage,
 )
 
 
@@ -24,18 +28,10 @@ class HomePageFactory(DjangoModelFactory):
     class Meta:
         model = HomePage
     
+    # NOTE: organization_name, city, etc. are now in wagtailseo.SeoSettings
     title = "MC Castellazzo"
     slug = factory.Sequence(lambda n: f"home-{n}")
-    organization_name = "MC Castellazzo"
     description = "<p>Motoclub dal 1975</p>"
-    street_address = "Via Roma 1"
-    city = "Torino"
-    region = "Piedmont"
-    country = "IT"
-    postal_code = "10100"
-    telephone = "+39 011 1234567"
-    email = "info@mccastellazzob.com"
-    founding_date = factory.Faker("date_this_century")
     hero_title = "Benvenuti al MC Castellazzo"
     hero_subtitle = "Passione per le moto dal 1975"
     
@@ -220,3 +216,79 @@ class EventsArchivePageFactory(DjangoModelFactory):
         if parent:
             parent.add_child(instance=instance)
         return instance
+
+
+class GalleryPageFactory(DjangoModelFactory):
+    """Factory for GalleryPage."""
+    
+    class Meta:
+        model = GalleryPage
+    
+    title = "Galleria"
+    slug = factory.Sequence(lambda n: f"galleria-{n}")
+    intro = "<p>Le nostre foto</p>"
+    
+    @classmethod
+    def _create(cls, model_class, *args, **kwargs):
+        parent = kwargs.pop("parent", None)
+        instance = model_class(**kwargs)
+        if parent:
+            parent.add_child(instance=instance)
+        return instance
+
+
+class NewsIndexPageFactory(DjangoModelFactory):
+    """Factory for NewsIndexPage."""
+    
+    class Meta:
+        model = NewsIndexPage
+    
+    title = "Articoli"
+    slug = factory.Sequence(lambda n: f"articoli-{n}")
+    
+    @classmethod
+    def _create(cls, model_class, *args, **kwargs):
+        parent = kwargs.pop("parent", None)
+        instance = model_class(**kwargs)
+        if parent:
+            parent.add_child(instance=instance)
+        return instance
+
+
+class NewsPageFactory(DjangoModelFactory):
+    """Factory for NewsPage."""
+    
+    class Meta:
+        model = NewsPage
+    
+    title = factory.Sequence(lambda n: f"Articolo {n}")
+    slug = factory.Sequence(lambda n: f"articolo-{n}")
+    author_display = "Mario Rossi"
+    date_display = factory.Faker("date_this_year")
+    
+    @classmethod
+    def _create(cls, model_class, *args, **kwargs):
+        parent = kwargs.pop("parent", None)
+        instance = model_class(**kwargs)
+        if parent:
+            parent.add_child(instance=instance)
+        return instance
+
+
+class PrivacyPageFactory(DjangoModelFactory):
+    """Factory for PrivacyPage."""
+    
+    class Meta:
+        model = PrivacyPage
+    
+    title = "Privacy Policy"
+    slug = factory.Sequence(lambda n: f"privacy-{n}")
+    intro = "<p>Informativa sulla privacy</p>"
+    
+    @classmethod
+    def _create(cls, model_class, *args, **kwargs):
+        parent = kwargs.pop("parent", None)
+        instance = model_class(**kwargs)
+        if parent:
+            parent.add_child(instance=instance)
+        return instance
@@ -161,3 +161,48 @@ def test_archive_past_events_grace_days(events_tree):
     result = archive_past_events(dry_run=False, grace_days=0)
     just_ended.refresh_from_db()
     assert just_ended.get_parent().id == archive_page.id
+
+
+def _past_event(parent, EventDetailPage, name, days_ago):
+    now = timezone.now()
+    s = uuid.uuid4().hex[:6]
+    evt = EventDetailPage(
+        title=f"{name}-{s}",
+        slug=f"{name.lower()}-{s}",
+        event_name=name,
+        start_date=now - timedelta(days=days_ago + 1),
+        end_date=now - timedelta(days=days_ago),
+        location_name="X",
+    )
+    parent.add_child(instance=evt)
+    return evt
+
+
+@pytest.mark.django_db
+def test_archive_past_events_selection_queries_do_not_scale(events_tree, django_assert_max_num_queries):
+    events_page, archive_page, EventDetailPage = events_tree
+    for n in range(4):
+        _past_event(events_page, EventDetailPage, f"Sel{n}", days_ago=10 + n)
+    _past_event(archive_page, EventDetailPage, "Archived", days_ago=100)
+
+    # Archivi + conteggio già archiviati + candidati, senza get_parent() per evento
+    with django_assert_max_num_queries(3):
+        result = archive_past_events(dry_run=True)
+
+    assert result.candidates == 4
+    assert result.skipped_already_archived == 1
+
+
+@pytest.mark.django_db
+def test_archive_past_events_moves_in_batches(events_tree):
+    events_page, archive_page, EventDetailPage = events_tree
+    events = [_past_event(events_page, EventDetailPage, f"Batch{n}", days_ago=10 + n) for n in range(3)]
+
+    result = archive_past_events(dry_run=False, batch_size=2)
+
+    assert result.moved == 3
+    assert result.batches == 2
+    assert result.move_seconds >= 0
+    for evt in events:
+        evt.refresh_from_db()
+        assert evt.get_parent().id == archive_page.id
@@ -200,6 +200,46 @@ class TestImageOptimization:
         
         assert abs(original_ratio - new_ratio) < 0.01
 
+    def test_jpeg_decoded_at_reduced_scale(self):
+        """I JPEG grandi vengono decodificati ridotti, mai sotto 1.5x il target."""
+        from apps.core.image_optimizer import REDUCING_GAP, open_for_resize
+        
+        img, target = open_for_resize(create_test_image(6000, 4000))
+        
+        assert target == (1280, 853)
+        assert img.size == (3000, 2000)
+        assert img.width >= target[0] * REDUCING_GAP
+        
+        full, _target = open_for_resize(create_test_image(6000, 4000), fast_decode=False)
+        assert full.size == (6000, 4000)
+
+    @pytest.mark.parametrize("format", ["JPEG", "PNG"])
+    def test_fast_decode_quality_parity(self, format):
+        """Il percorso rapido è visivamente equivalente alla decodifica completa."""
+        from apps.core.image_optimizer import optimize_image
+        from apps.core.management.commands.benchmark_image_optimizer import psnr
+        
+        texture = Image.merge("RGB", [Image.effect_noise((3000, 2000), sigma) for sigma in (20, 40, 60)])
+        texture = Image.blend(texture, Image.linear_gradient("L").resize((3000, 2000)).convert("RGB"), 0.5)
+        buffer = io.BytesIO()
+        texture.save(buffer, format=format)
+        
+        fast = optimize_image(buffer).getvalue()
+        full = optimize_image(buffer, fast_decode=False).getvalue()
+        
+        assert Image.open(io.BytesIO(fast)).size == Image.open(io.BytesIO(full)).size == (1280, 853)
+        assert psnr(full, fast) > 38
+
+    def test_webp_method_configurable(self):
+        """L'effort dell'encoder WebP è configurabile."""
+        from apps.core.image_optimizer import optimize_image
+        
+        buffer = create_test_image(2000, 1500)
+        
+        fast = optimize_image(buffer, webp_method=0)
+        
+        assert Image.open(fast).format == "WEBP"
+
 
 # ============================================
 # Test Rinomina File
@@ -351,6 +391,55 @@ class TestBulkUploadProcessing:
         assert "raduno-primavera-001" in created[1].file.name
 
 
+# ============================================
+# Test Ottimizzazione Parallela
+# ============================================
+@pytest.mark.django_db
+class TestParallelOptimization:
+    """Test per il pool di processi dell'ottimizzazione."""
+
+    def test_pool_keeps_upload_order(self, settings):
+        """Con più worker titoli, filename e contenuti restano nell'ordine di upload."""
+        from apps.core.admin_views import process_bulk_upload
+        
+        settings.BULK_UPLOAD_WORKERS = 2
+        settings.BULK_UPLOAD_MAX_IN_FLIGHT = 2
+        sizes = [(2000, 1000), (300, 600), (800, 800)]
+        images = [create_uploaded_image(f"{n}.jpg", *size) for n, size in enumerate(sizes)]
+        
+        created = process_bulk_upload(
+            images=images,
+            title_prefix="Raduno Parallelo",
+            tags=[],
+            collection=None
+        )
+        
+        assert [img.title for img in created] == [
+            "Raduno Parallelo - 001", "Raduno Parallelo - 002", "Raduno Parallelo - 003",
+        ]
+        assert "raduno-parallelo-000" in created[0].file.name
+        assert "raduno-parallelo-002" in created[2].file.name
+        assert [(img.width, img.height) for img in created] == [(1280, 640), (300, 600), (800, 800)]
+
+    def test_in_flight_images_bounded(self):
+        """Le sorgenti oltre la finestra non vengono lette prima del primo risultato."""
+        from apps.core.image_optimizer import optimize_images
+        
+        read = []
+        
+        def sources():
+            for n in range(5):
+                read.append(n)
+                yield create_test_image(400, 300).getvalue()
+        
+        results = optimize_images(sources(), workers=2, max_in_flight=2)
+        first = next(results)
+        
+        assert len(read) == 2
+        assert Image.open(io.BytesIO(first)).format == "WEBP"
+        assert len(list(results)) == 4
+
+
 # ============================================
 # Test Multilingua
 # ============================================
@@ -0,0 +1,150 @@
+"""
+Test per l'upload a pezzi e riprendibile del caricamento massivo
+(apps.core.chunked_upload + API sotto /admin/bulk-upload/batches/).
+"""
+import io
+import json
+
+import pytest
+from django.contrib.auth import get_user_model
+from PIL import Image as PILImage
+from wagtail.images import get_image_model
+
+User = get_user_model()
+Image = get_image_model()
+
+BATCH_URL = "/admin/bulk-upload/batches/"
+
+
+def _jpeg(width=1600, height=1200):
+    buffer = io.BytesIO()
+    PILImage.new("RGB", (width, height), color="blue").save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+@pytest.fixture(autouse=True)
+def chunk_dir(settings, tmp_path):
+    settings.BULK_UPLOAD_CHUNK_DIR = str(tmp_path / "chunks")
+    settings.BULK_UPLOAD_CHUNK_SIZE = 1024
+    return tmp_path / "chunks"
+
+
+def _create_batch(client, contents, prefix="Raduno Pezzi"):
+    response = client.post(
+        BATCH_URL,
+        data=json.dumps({
+            "title_prefix": prefix,
+            "tags": "raduno, pezzi",
+            "collection": None,
+            "files": [{"name": f"{n}.jpg", "size": len(data), "type": "image/jpeg"} for n, data in enumerate(contents)],
+        }),
+        content_type="application/json",
+    )
+    assert response.status_code == 201
+    return response.json()["data"]
+
+
+def _send(client, batch_id, index, data, start, total):
+    return client.post(
+        f"{BATCH_URL}{batch_id}/files/{index}/",
+        data=data,
+        content_type="application/octet-stream",
+        HTTP_CONTENT_RANGE=f"bytes {start}-{start + len(data) - 1}/{total}",
+    )
+
+
+def _upload(client, batch_id, index, data, chunk_size=1024):
+    for start in range(0, len(data), chunk_size):
+        response = _send(client, batch_id, index, data[start:start + chunk_size], start, len(data))
+        assert response.status_code == 200
+    return response.json()["data"]
+
+
+@pytest.mark.django_db
+class TestChunkedUpload:
+
+    def test_requires_login(self, client):
+        response = client.post(BATCH_URL, data="{}", content_type="application/json")
+
+        assert response.status_code in [302, 403]
+
+    def test_file_saved_when_complete(self, admin_client, chunk_dir):
+        data = _jpeg()
+        batch = _create_batch(admin_client, [data])
+
+        status = _upload(admin_client, batch["batch"], 0, data)
+
+        entry = status["files"][0]
+        assert entry["state"] == "done"
+        image = Image.objects.get(pk=entry["image_id"])
+        assert image.title == "Raduno Pezzi - 001"
+        assert "raduno-pezzi-000" in image.file.name
+        assert image.width == 1280
+        assert set(image.tags.names()) == {"raduno", "pezzi"}
+        assert not (chunk_dir / batch["batch"]).exists()
+
+    def test_sequence_follows_selection_not_arrival(self, admin_client):
+        first, second = _jpeg(), _jpeg(800, 600)
+        batch = _create_batch(admin_client, [first, second])
+
+        _upload(admin_client, batch["batch"], 1, second)
+        status = _upload(admin_client, batch["batch"], 0, first)
+
+        titles = dict(Image.objects.filter(pk__in=[f["image_id"] for f in status["files"]]).values_list("pk", "title"))
+        assert [titles[f["image_id"]] for f in status["files"]] == ["Raduno Pezzi - 001", "Raduno Pezzi - 002"]
+        assert status["done"] == 2
+
+    def test_resume_from_received_offset(self, admin_client):
+        data = _jpeg()
+        batch = _create_batch(admin_client, [data])
+        _send(admin_client, batch["batch"], 0, data[:1024], 0, len(data))
+
+        # Connessione caduta: il client chiede lo stato e riprende da lì
+        status = admin_client.get(f"{BATCH_URL}{batch['batch']}/").json()["data"]
+        assert status["files"][0]["received"] == 1024
+        assert status["received_bytes"] == 1024
+
+        stale = _send(admin_client, batch["batch"], 0, data[:1024], 0, len(data))
+        assert stale.status_code == 409
+        assert stale.json()["received"] == 1024
+
+        for start in range(1024, len(data), 1024):
+            _send(admin_client, batch["batch"], 0, data[start:start + 1024], start, len(data))
+        assert Image.objects.filter(title="Raduno Pezzi - 001").count() == 1
+
+    def test_last_chunk_retry_is_idempotent(self, admin_client):
+        data = _jpeg(200, 200)
+        batch = _create_batch(admin_client, [data])
+        _upload(admin_client, batch["batch"], 0, data, chunk_size=len(data))
+
+        retry = _send(admin_client, batch["batch"], 0, data, 0, len(data))
+
+        assert retry.status_code == 200
+        assert Image.objects.filter(title="Raduno Pezzi - 001").count() == 1
+
+    def test_invalid_image_marked_failed(self, admin_client):
+        data = b"not an image" * 10
+        batch = _create_batch(admin_client, [data])
+
+        status = _upload(admin_client, batch["batch"], 0, data)
+
+        assert status["files"][0]["state"] == "failed"
+        assert status["failed"] == 1
+
+    def test_unsupported_type_rejected(self, admin_client):
+        response = admin_client.post(
+            BATCH_URL,
+            data=json.dumps({"title_prefix": "X", "files": [{"name": "a.pdf", "size": 10, "type": "application/pdf"}]}),
+            content_type="application/json",
+        )
+
+        assert response.status_code == 400
+
+    def test_batch_private_to_user(self, admin_client, client):
+        batch = _create_batch(admin_client, [_jpeg()])
+        other = User.objects.create_superuser(username="altro", email="altro@test.com", password="x")
+        client.force_login(other)
+
+        response = client.get(f"{BATCH_URL}{batch['batch']}/")
+
+        assert response.status_code == 410
@@ -0,0 +1,68 @@
+"""
+Test per EventsArchivePage: anni calcolati dal DB, paginazione per anni e
+JSON-LD limitato.
+"""
+from datetime import datetime
+
+import pytest
+from django.test import RequestFactory
+from django.utils import timezone
+
+from tests.factories.pages import EventDetailPageFactory, EventsArchivePageFactory
+
+# Eventi per anno creati dal fixture
+EVENTS_PER_YEAR = {2019: 1, 2021: 2, 2022: 1, 2023: 3}
+
+
+@pytest.fixture
+def archive(site):
+    archive = EventsArchivePageFactory(parent=site.root_page)
+    for year, count in EVENTS_PER_YEAR.items():
+        for n in range(count):
+            EventDetailPageFactory(
+                parent=archive,
+                start_date=timezone.make_aware(datetime(year, 6, 10 + n, 10, 0)),
+            )
+    return archive
+
+
+@pytest.mark.django_db
+class TestEventsArchivePage:
+
+    def test_year_buckets_come_from_database(self, archive, django_assert_num_queries):
+        with django_assert_num_queries(1):
+            buckets = archive.get_year_buckets()
+
+        assert buckets == [
+            {"year": 2023, "count": 3},
+            {"year": 2022, "count": 1},
+            {"year": 2021, "count": 2},
+            {"year": 2019, "count": 1},
+        ]
+
+    def test_events_by_year_loads_only_requested_years(self, archive):
+        by_year = archive.get_events_by_year(years=[2021])
+
+        assert [year for year, _events in by_year] == [2021]
+        assert len(by_year[0][1]) == 2
+        assert by_year[0][1][0].start_date > by_year[0][1][1].start_date
+
+    def test_context_paginates_years(self, archive):
+        request = RequestFactory().get(archive.url)
+        first = archive.get_context(request)
+
+        assert [year for year, _count, _events in first["events_by_year"]] == [2023, 2022, 2021]
+        assert first["year_buckets"][-1]["page"] == 2
+
+        request = RequestFactory().get(archive.url, {"page": 2})
+        second = archive.get_context(request)
+
+        assert second["events_by_year"][0][:2] == (2019, 1)
+
+    def test_json_ld_is_bounded(self, archive, monkeypatch):
+        monkeypatch.setattr(type(archive), "json_ld_max_items", 2)
+
+        data = archive.get_json_ld_data()
+
+        assert data["numberOfItems"] == 2
+        assert data["itemListElement"][0]["item"]["startDate"].startswith("2023-06-12")
@@ -0,0 +1,124 @@
+"""
+Test per il manifest della galleria (apps.website.services.gallery_manifest).
+Helper della GalleryPage condivisi, cache fra richieste e invalidazione.
+"""
+import io
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from PIL import Image as PILImage
+from wagtail.images import get_image_model
+from wagtail.models import Collection, Page
+
+from apps.website.models import GalleryPage
+
+Image = get_image_model()
+
+
+def _make_image(collection, name, tags=()):
+    buffer = io.BytesIO()
+    PILImage.new("RGB", (60, 40), color="green").save(buffer, format="PNG")
+    image = Image(
+        title=name,
+        collection=collection,
+        file=SimpleUploadedFile(name=f"{name}.png", content=buffer.getvalue(), content_type="image/png"),
+    )
+    image.save()
+    if tags:
+        image.tags.add(*tags)
+    return image
+
+
+@pytest.fixture
+def collection(db):
+    return Collection.get_first_root_node().add_child(name="Raduno manifest")
+
+
+@pytest.fixture
+def gallery(db, collection):
+    root = Page.objects.get(depth=1)
+    page = GalleryPage(
+        title="Galleria manifest",
+        slug="galleria-manifest",
+        gallery=[
+            {"type": "collection_gallery", "value": {"title": "Raduno", "collection": collection.id, "category": None}},
+        ],
+    )
+    root.add_child(instance=page)
+    return page
+
+
+def _fresh(page):
+    """Nuova istanza, come in una nuova richiesta."""
+    return GalleryPage.objects.get(pk=page.pk)
+
+
+def _count_queries(page):
+    with CaptureQueriesContext(connection) as queries:
+        page.get_gallery_sections()
+        page.get_all_images()
+        page.get_categories()
+        page.get_all_tags()
+    return len(queries.captured_queries)
+
+
+@pytest.mark.django_db
+class TestGalleryManifest:
+
+    def test_helpers_share_one_manifest(self, gallery, collection):
+        _make_image(collection, "a", tags=("raduno",))
+        _make_image(collection, "b", tags=("raduno", "moto"))
+        page = _fresh(gallery)
+
+        sections = page.get_gallery_sections()
+
+        assert [img["image"] for img in page.get_all_images()] == [img["image"] for img in sections[0]["images"]]
+        assert page.get_all_tags() == [("raduno", 2), ("moto", 1)]
+        assert sections[0]["images"][1]["tags"] == ["raduno", "moto"]
+
+    def test_query_count_independent_of_image_count(self, gallery, collection):
+        _make_image(collection, "a", tags=("raduno",))
+        _count_queries(_fresh(gallery))  # genera le rendition
+        few = _count_queries(_fresh(gallery))
+        for n in range(5):
+            _make_image(collection, f"extra-{n}", tags=("raduno", f"tag-{n}"))
+        _count_queries(_fresh(gallery))
+
+        many = _count_queries(_fresh(gallery))
+
+        assert many == few
+
+    def test_manifest_reused_across_requests(self, gallery, collection):
+        _make_image(collection, "a", tags=("raduno",))
+        cold = _count_queries(_fresh(gallery))
+
+        warm = _count_queries(_fresh(gallery))
+
+        assert warm < cold
+
+    def test_new_collection_image_invalidates(self, gallery, collection):
+        _make_image(collection, "a")
+        assert len(_fresh(gallery).get_all_images()) == 1
+
+        _make_image(collection, "b")
+
+        assert len(_fresh(gallery).get_all_images()) == 2
+
+    def test_tag_change_invalidates(self, gallery, collection):
+        image = _make_image(collection, "a", tags=("raduno",))
+        assert _fresh(gallery).get_all_tags() == [("raduno", 1)]
+
+        image.tags.add("moto")
+
+        assert dict(_fresh(gallery).get_all_tags()) == {"raduno": 1, "moto": 1}
+
+    def test_image_moved_out_of_collection_invalidates(self, gallery, collection):
+        image = _make_image(collection, "a")
+        assert len(_fresh(gallery).get_all_images()) == 1
+
+        image.collection = Collection.get_first_root_node()
+        image.save()
+
+        assert _fresh(gallery).get_all_images() == []
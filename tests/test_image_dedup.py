@@ -0,0 +1,201 @@
+"""
+Test per il rilevamento dei duplicati (apps.core.image_dedup): hash
+percettivo, indice a bande e integrazione con il bulk upload.
+"""
+import io
+import json
+import random
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from PIL import Image as PILImage
+from PIL import ImageDraw
+from wagtail.images import get_image_model
+
+from apps.core import image_dedup
+from apps.core.admin_views import process_bulk_upload
+from apps.core.image_optimizer import optimize_image, perceptual_hash
+from apps.core.models import ImageHash
+
+Image = get_image_model()
+
+
+def _photo(seed=0, size=(1600, 1200), quality=90):
+    """Immagine con struttura (non tinta unita né simmetrica), diversa per ogni seed."""
+    rng = random.Random(seed)
+    img = PILImage.radial_gradient("L").resize(size).convert("RGB")
+    draw = ImageDraw.Draw(img)
+    for _ in range(12):
+        x, y = rng.randrange(size[0]), rng.randrange(size[1])
+        w, h = rng.randrange(size[0] // 8, size[0] // 2), rng.randrange(size[1] // 8, size[1] // 2)
+        draw.rectangle((x, y, x + w, y + h), fill=tuple(rng.randrange(256) for _ in range(3)))
+    buffer = io.BytesIO()
+    img.save(buffer, format="JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+def _variant(data, scale=0.5, quality=70):
+    """La stessa immagine ridotta e ricompressa (es. copia da WhatsApp)."""
+    with PILImage.open(io.BytesIO(data)) as img:
+        img = img.resize((int(img.width * scale), int(img.height * scale)))
+    buffer = io.BytesIO()
+    img.save(buffer, format="JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+def _upload(data, name="foto.jpg"):
+    return SimpleUploadedFile(name=name, content=data, content_type="image/jpeg")
+
+
+@pytest.fixture
+def dedup(settings):
+    settings.BULK_UPLOAD_DUPLICATES = "link"
+
+
+class TestPerceptualHash:
+
+    def test_robust_to_resize_and_recompression(self):
+        original = _photo(1)
+        optimized = optimize_image(io.BytesIO(original)).getvalue()
+        recompressed = _variant(original, scale=0.4, quality=60)
+
+        assert image_dedup.hamming(perceptual_hash(original), perceptual_hash(optimized)) <= 2
+        assert image_dedup.hamming(perceptual_hash(original), perceptual_hash(recompressed)) <= 4
+
+    def test_different_photos_far_apart(self):
+        hashes = [perceptual_hash(_photo(seed)) for seed in range(4)]
+
+        distances = [image_dedup.hamming(a, b) for n, a in enumerate(hashes) for b in hashes[n + 1:]]
+        assert min(distances) > image_dedup.get_max_distance()
+
+    def test_bands_cover_hash(self):
+        value = 0xFEDCBA9876543210
+
+        assert image_dedup.bands(value) == [0x10, 0x32, 0x54, 0x76, 0x98, 0xBA, 0xDC, 0xFE]
+
+
+@pytest.mark.django_db
+class TestDuplicateIndex:
+
+    def test_near_duplicate_found_through_bands(self, dedup):
+        image = process_bulk_upload([_upload(_photo(1))], "Raduno", [], None)[0]
+        stored = image_dedup._to_unsigned(image.perceptual_hash.phash)
+
+        near = stored ^ 0b101  # 2 bit diversi
+        far = stored ^ 0xFF00FF00FF00FF00
+
+        assert image_dedup.find_duplicate(near) == image
+        assert image_dedup.find_duplicate(far) is None
+
+    def test_batch_compares_only_hashes_sharing_a_band(self, dedup, django_assert_num_queries):
+        rng = random.Random(7)
+        stored = [rng.getrandbits(64) & ~0xFF for _ in range(5)]  # band0 comune a tutti
+        images = []
+        for n, phash in enumerate(stored):
+            images.append(Image.objects.create(title=f"x{n}", file=_upload(_photo(n, size=(64, 48)))))
+            image_dedup.store_hash(images[-1], phash)
+        near = stored[2] ^ 0b11
+        unrelated = stored[0] ^ 0xFFFFFFFFFFFFFF00  # solo band0 in comune
+
+        with django_assert_num_queries(2):
+            matches = image_dedup.find_duplicates([near, unrelated])
+
+        assert matches == {near: (images[2], 2)}
+
+    def test_high_bit_hash_roundtrip(self, dedup):
+        image = Image.objects.create(title="x", file=_upload(_photo(3)))
+        record = image_dedup.store_hash(image, 0xF000000000000001)
+
+        record.refresh_from_db()
+        assert image_dedup._to_unsigned(record.phash) == 0xF000000000000001
+        assert image_dedup.find_duplicate(0xF000000000000001) == image
+
+
+@pytest.mark.django_db
+class TestBulkUploadDuplicates:
+
+    def test_existing_duplicate_linked_not_uploaded(self, dedup):
+        first = process_bulk_upload([_upload(_photo(1))], "Raduno 2025", ["2025"], None)[0]
+        duplicates = []
+
+        created = process_bulk_upload(
+            [_upload(_variant(_photo(1)), "copia.jpg"), _upload(_photo(2))],
+            "Raduno 2026",
+            ["2026"],
+            None,
+            duplicates=duplicates,
+        )
+
+        assert [img.title for img in created] == ["Raduno 2026 - 002"]
+        assert duplicates == [("copia.jpg", first)]
+        assert set(first.tags.names()) == {"2025", "2026"}
+        assert Image.objects.count() == 2
+
+    @pytest.mark.django_db(transaction=True)
+    def test_hash_computed_once_per_upload(self, dedup, monkeypatch):
+        # Senza transazione di test on_commit parte subito, come in produzione
+        calls = []
+        monkeypatch.setattr(image_dedup, "perceptual_hash", lambda data: calls.append(data))
+
+        created = process_bulk_upload([_upload(_photo(1)), _upload(_photo(2))], "Raduno", [], None)
+
+        assert calls == []  # niente rilettura del file nel post_save
+        assert ImageHash.objects.filter(image__in=created).count() == 2
+
+    def test_duplicate_within_same_upload(self, dedup):
+        duplicates = []
+
+        created = process_bulk_upload(
+            [_upload(_photo(5), "a.jpg"), _upload(_photo(5), "b.jpg")], "Raduno", [], None, duplicates=duplicates,
+        )
+
+        assert len(created) == 1
+        assert duplicates == [("b.jpg", created[0])]
+
+    def test_skip_mode_leaves_tags(self, settings):
+        settings.BULK_UPLOAD_DUPLICATES = "skip"
+        first = process_bulk_upload([_upload(_photo(1))], "Raduno", [], None)[0]
+
+        created = process_bulk_upload([_upload(_photo(1))], "Raduno", ["nuovo"], None)
+
+        assert created == []
+        assert list(first.tags.names()) == []
+
+    def test_disabled_uploads_everything(self, settings):
+        settings.BULK_UPLOAD_DUPLICATES = "upload"
+
+        created = process_bulk_upload([_upload(_photo(1)), _upload(_photo(1))], "Raduno", [], None)
+
+        assert len(created) == 2
+
+    def test_chunked_upload_reports_duplicate(self, dedup, admin_client, settings, tmp_path):
+        settings.BULK_UPLOAD_CHUNK_DIR = str(tmp_path)
+        existing = process_bulk_upload([_upload(_photo(1))], "Raduno", [], None)[0]
+        data = _variant(_photo(1), scale=0.8, quality=75)
+        batch = admin_client.post(
+            "/admin/bulk-upload/batches/",
+            data=json.dumps({"title_prefix": "Copia", "files": [{"name": "c.jpg", "size": len(data), "type": "image/jpeg"}]}),
+            content_type="application/json",
+        ).json()["data"]
+
+        status = admin_client.post(
+            f"/admin/bulk-upload/batches/{batch['batch']}/files/0/",
+            data=data,
+            content_type="application/octet-stream",
+            HTTP_CONTENT_RANGE=f"bytes 0-{len(data) - 1}/{len(data)}",
+        ).json()["data"]
+
+        assert status["files"][0]["state"] == "duplicate"
+        assert status["files"][0]["image_id"] == existing.pk
+        assert status["duplicates"] == 1
+
+
+@pytest.mark.django_db
+def test_index_command_backfills_missing_hashes():
+    image = Image.objects.create(title="Vecchia", file=_upload(_photo(4)))
+    assert not ImageHash.objects.filter(image=image).exists()
+
+    call_command("index_image_hashes", stdout=io.StringIO())
+
+    assert ImageHash.objects.filter(image=image).exists()
@@ -0,0 +1,83 @@
+"""
+Test per la cache del JSON-LD (apps.core.json_ld_cache).
+"""
+import json
+
+import pytest
+from django.test import RequestFactory
+from wagtailseo.models import SeoSettings
+
+from apps.core.json_ld_cache import json_ld_cache_key
+from tests.factories.pages import AboutPageFactory, EventsPageFactory, NewsIndexPageFactory
+
+
+@pytest.fixture
+def rf():
+    return RequestFactory()
+
+
+@pytest.mark.django_db
+class TestJsonLdCache:
+
+    def test_warm_cache_costs_zero_queries(self, seo_site, rf, django_assert_num_queries):
+        index = NewsIndexPageFactory(parent=seo_site.root_page)
+        request = rf.get(index.url)
+        first = index.get_json_ld(request)
+
+        with django_assert_num_queries(0):
+            second = index.get_json_ld(request)
+
+        assert second == first
+        assert json.loads(second)["@type"] == "CollectionPage"
+
+    def test_publish_invalidates(self, seo_site, rf):
+        about = AboutPageFactory(parent=seo_site.root_page)
+        about.get_json_ld(rf.get(about.url))
+
+        about.title = "Chi Siamo (aggiornato)"
+        about.save_revision().publish()
+        about.refresh_from_db()
+
+        assert json.loads(about.get_json_ld(rf.get(about.url)))["name"] == "Chi Siamo (aggiornato)"
+
+    def test_seo_settings_save_invalidates(self, seo_site, rf):
+        home = seo_site.root_page.specific
+        assert json.loads(home.get_json_ld(rf.get("/")))["name"] == "MC Castellazzo"
+
+        seo = SeoSettings.for_site(seo_site)
+        seo.struct_org_name = "Moto Club Castellazzo Bormida"
+        seo.save()
+
+        assert json.loads(home.get_json_ld(rf.get("/")))["name"] == "Moto Club Castellazzo Bormida"
+
+    def test_declared_params_vary_the_key(self, seo_site, rf):
+        index = NewsIndexPageFactory(parent=seo_site.root_page)
+
+        plain = json_ld_cache_key(index, rf.get(index.url))
+        search = json_ld_cache_key(index, rf.get(index.url, {"q": "raduno"}))
+        ignored = json_ld_cache_key(index, rf.get(index.url, {"utm_source": "x"}))
+
+        assert plain != search
+        assert plain == ignored
+
+    def test_date_dependent_page_varies_on_date(self, seo_site, rf, monkeypatch):
+        events = EventsPageFactory(parent=seo_site.root_page)
+        request = rf.get(events.url)
+        today_key = json_ld_cache_key(events, request)
+
+        class Tomorrow:
+            @staticmethod
+            def today():
+                from datetime import date, timedelta
+                return date.today() + timedelta(days=1)
+
+        monkeypatch.setattr("apps.core.json_ld_cache.date", Tomorrow)
+
+        assert json_ld_cache_key(events, request) != today_key
+
+    def test_preview_is_not_cached(self, seo_site, rf):
+        about = AboutPageFactory(parent=seo_site.root_page)
+        request = rf.get(about.url)
+        request.is_preview = True
+
+        assert json_ld_cache_key(about, request) is None
@@ -0,0 +1,410 @@
+"""
+Test per la modalità batch del traduttore automatico
+(apps.core.machine_translator): impacchettamento dei segmenti, limiti per
+provider, fallback segmento per segmento, tag inline come segnaposto,
+memoria di traduzione (apps.core.translation_memory), pool di thread e
+sessioni (apps.core.translator_pool), circuit breaker e ordine dei provider
+(apps.core.provider_health). I provider sono sostituiti da un traduttore
+finto, nessuna chiamata HTTP esterna.
+"""
+import concurrent.futures
+import io
+import re
+import time
+from types import SimpleNamespace
+
+import pytest
+from django.core.management import call_command
+from wagtail_localize.strings import StringValue
+
+from apps.core import provider_health, translation_memory, translator_pool
+from apps.core.machine_translator import SEGMENT_SEPARATOR, DeepTranslatorMachineTranslator, split_sentences
+from apps.core.models import TranslationMemory
+
+
+class FakeProvider:
+    """Traduce in maiuscolo; registra ogni richiesta."""
+
+    def __init__(self, calls, name, drop_separators=False, fail=False, sleep=0, drop_placeholders=False):
+        self.calls = calls
+        self.name = name
+        self.drop_separators = drop_separators
+        self.drop_placeholders = drop_placeholders
+        self.fail = fail
+        self.sleep = sleep
+
+    def translate(self, text):
+        self.calls.append((self.name, text))
+        if self.sleep:
+            time.sleep(self.sleep)
+        if self.fail:
+            raise RuntimeError("provider non disponibile")
+        if self.drop_separators and SEGMENT_SEPARATOR in text:
+            return text.replace(SEGMENT_SEPARATOR, " ").upper()
+        if self.drop_placeholders:
+            return re.sub(r"\[/?\d+/?\]", "", text).upper()
+        return text.upper()
+
+
+@pytest.fixture
+def calls():
+    return []
+
+
+@pytest.fixture(autouse=True)
+def empty_lru():
+    translation_memory.clear_cache()
+    yield
+    translation_memory.clear_cache()
+
+
+@pytest.fixture(autouse=True)
+def fresh_pool():
+    # I client finti cambiano da un test all'altro: niente riuso fra test,
+    # né breaker o statistiche ereditati
+    translator_pool.reset()
+    provider_health.reset()
+    yield
+    translator_pool.reset()
+    provider_health.reset()
+
+
+def _translator(monkeypatch, calls, providers=("google", "mymemory"), memory=False, **behaviour):
+    translator = DeepTranslatorMachineTranslator(
+        options={
+            "PROVIDERS": list(providers),
+            "MEMORY": memory,
+            "RATE_LIMITS": dict.fromkeys(("google", "mymemory", "deepl"), 0),
+        }
+    )
+    translator.clients_created = 0
+
+    def make_translator(provider, source, target):
+        translator.clients_created += 1
+        return FakeProvider(calls, provider, **behaviour.get(provider, {}))
+
+    monkeypatch.setattr(translator, "_make_translator", make_translator)
+    return translator
+
+
+class TestBatchTranslation:
+
+    def test_segments_packed_in_one_request(self, monkeypatch, calls):
+        translator = _translator(monkeypatch, calls)
+
+        results = translator._translate_many(["Raduno", " in piazza ", "Iscrizioni"], "it", "en")
+
+        assert results == ["RADUNO", " IN PIAZZA ", "ISCRIZIONI"]
+        assert len(calls) == 1
+
+    def test_html_text_nodes_share_the_batch(self, monkeypatch, calls):
+        translator = _translator(monkeypatch, calls)
+
+        results = translator._translate_many(
+            ['<p>Partenza <a href="/it/eventi/">alle nove</a></p>', "Pranzo"], "it", "en"
+        )
+
+        assert results == ['<p>PARTENZA <a href="/it/eventi/">ALLE NOVE</a></p>', "PRANZO"]
+        assert len(calls) == 1
+
+    def test_duplicate_segments_translated_once(self, monkeypatch, calls):
+        translator = _translator(monkeypatch, calls)
+
+        results = translator._translate_many(["Moto", "Moto", "<b>Moto</b>"], "it", "en")
+
+        assert results == ["MOTO", "MOTO", "<b>MOTO</b>"]
+        assert calls[0][1].count("Moto") == 1
+
+    def test_provider_size_limit_splits_batches(self, monkeypatch, calls):
+        translator = _translator(monkeypatch, calls, providers=("mymemory",))
+        texts = [f"Frase numero {n} " + "x" * 80 for n in range(12)]
+
+        results = translator._translate_many(texts, "it", "en")
+
+        assert results == [text.upper() for text in texts]
+        assert 1 < len(calls) < len(texts)
+        assert all(len(text) <= 450 for _provider, text in calls)
+
+    def test_mismatched_split_falls_back_per_segment(self, monkeypatch, calls):
+        translator = _translator(
+            monkeypatch, calls, google={"drop_separators": True}, mymemory={"drop_separators": True},
+        )
+
+        results = translator._translate_many(["Uno", "Due", "Tre"], "it", "en")
+
+        assert results == ["UNO", "DUE", "TRE"]
+        # Un tentativo per provider sul pacchetto, poi una richiesta per segmento
+        assert [text for _provider, text in calls[-3:]] == ["Uno", "Due", "Tre"]
+
+    def test_failed_batch_uses_next_provider(self, monkeypatch, calls):
+        translator = _translator(monkeypatch, calls, google={"fail": True})
+
+        results = translator._translate_many(["Uno", "Due"], "it", "en")
+
+        assert results == ["UNO", "DUE"]
+        assert [provider for provider, _text in calls] == ["google", "mymemory"]
+
+    def test_batch_disabled_sends_one_request_per_segment(self, monkeypatch, calls):
+        translator = _translator(monkeypatch, calls)
+        translator.batch = False
+
+        translator._translate_many(["Uno", "Due", "Tre"], "it", "en")
+
+        assert len(calls) == 3
+
+    def test_translate_maps_results_to_string_values(self, monkeypatch, calls):
+        translator = _translator(monkeypatch, calls)
+        plain = StringValue.from_plaintext("Giro dei colli")
+        html = StringValue.from_translated_html("Iscriviti <b>entro venerdì</b>")
+
+        translations = translator.translate(
+            SimpleNamespace(language_code="it"), SimpleNamespace(language_code="en"), [plain, html],
+        )
+
+        assert translations[plain].render_text() == "GIRO DEI COLLI"
+        assert translations[html].get_translatable_html() == "ISCRIVITI <b>ENTRO VENERDÌ</b>"
+        assert len(calls) == 1
+
+
+class TestInlinePlaceholders:
+
+    PARAGRAPH = '<p>Partenza <a href="/it/eventi/">alle nove</a> da <b>piazza</b> con <i>casco</i>.</p>'
+
+    def test_paragraph_translated_in_one_request(self, monkeypatch, calls):
+        translator = _translator(monkeypatch, calls)
+        translator.batch = False  # prima: una richiesta per nodo di testo (7)
+
+        result = translator._translate_html(self.PARAGRAPH, "it", "en")
+
+        assert result == '<p>PARTENZA <a href="/it/eventi/">ALLE NOVE</a> DA <b>PIAZZA</b> CON <i>CASCO</i>.</p>'
+        assert calls == [("google", "Partenza [1]alle nove[/1] da [2]piazza[/2] con [3]casco[/3].")]
+
+    def test_wrapping_tags_stay_outside_segment(self, monkeypatch, calls):
+        translator = _translator(monkeypatch, calls)
+
+        result = translator._translate_html("<ul><li><b>Iscrizioni</b><br></li></ul>", "it", "en")
+
+        assert result == "<ul><li><b>ISCRIZIONI</b><br></li></ul>"
+        assert calls == [("google", "Iscrizioni")]
+
+    def test_mangled_placeholders_fall_back_per_node(self, monkeypatch, calls):
+        translator = _translator(monkeypatch, calls, providers=("google",), google={"drop_placeholders": True})
+        translator.batch = False
+
+        result = translator._translate_html(self.PARAGRAPH, "it", "en")
+
+        assert result == '<p>PARTENZA <a href="/it/eventi/">ALLE NOVE</a> DA <b>PIAZZA</b> CON <i>CASCO</i>.</p>'
+        assert [text for _provider, text in calls[1:]] == ["Partenza", "alle nove", "da", "piazza", "con", "casco", "."]
+
+    def test_crossed_placeholders_rejected(self, monkeypatch, calls):
+        translator = _translator(monkeypatch, calls, providers=("google",))
+        monkeypatch.setattr(
+            FakeProvider, "translate",
+            lambda self, text: text.replace("[/1]", "§").replace("[/2]", "[/1]").replace("§", "[/2]").upper(),
+        )
+
+        result = translator._translate_html("<p>a <b>b <i>c</i></b> d</p>", "it", "en")
+
+        assert result == "<p>A <b>B <i>C</i></b> D</p>"
+
+
+def test_split_sentences_roundtrip():
+    text = "Partenza alle 9. Pranzo in trattoria!  Rientro previsto per le 18… forse"
+
+    parts = split_sentences(text)
+
+    assert [unit for unit, _sep in parts] == ["Partenza alle 9.", "Pranzo in trattoria!", "Rientro previsto per le 18… forse"]
+    assert "".join(unit + sep for unit, sep in parts) == text
+
+
+@pytest.mark.django_db
+class TestTranslationMemory:
+
+    def test_second_translation_served_from_memory(self, monkeypatch, calls):
+        translator = _translator(monkeypatch, calls, memory=True)
+        translator._translate_many(["Iscriviti", "<b>Moto Club Castellazzo</b>"], "italian", "english")
+        translation_memory.clear_cache()  # nuovo processo: solo il DB
+        calls.clear()
+
+        results = translator._translate_many(["<b>Moto Club Castellazzo</b>", "Iscriviti"], "it", "en")
+
+        assert results == ["<b>MOTO CLUB CASTELLAZZO</b>", "ISCRIVITI"]
+        assert calls == []
+        entry = TranslationMemory.objects.get(source_text="Iscriviti")
+        assert (entry.source_lang, entry.target_lang, entry.provider) == ("it", "en", "google")
+
+    def test_edited_paragraph_translates_only_new_sentence(self, monkeypatch, calls):
+        translator = _translator(monkeypatch, calls, memory=True)
+        translator._translate_text("Ritrovo in piazza alle 8. Partenza alle 9.", "it", "en")
+        calls.clear()
+
+        result = translator._translate_text("Ritrovo in piazza alle 8. Partenza alle 9:30. Casco obbligatorio.", "it", "en")
+
+        assert result == "RITROVO IN PIAZZA ALLE 8. PARTENZA ALLE 9:30. CASCO OBBLIGATORIO."
+        assert "Ritrovo" not in calls[0][1]
+
+    def test_whitespace_variants_share_entry(self, monkeypatch, calls):
+        translator = _translator(monkeypatch, calls, memory=True)
+        translator._translate_text("Giro  dei\ncolli", "it", "en")
+        calls.clear()
+
+        translator._translate_text("Giro dei colli", "it", "en")
+
+        assert calls == []
+        assert TranslationMemory.objects.count() == 1
+
+    def test_failed_translation_not_stored(self, monkeypatch, calls):
+        translator = _translator(monkeypatch, calls, memory=True, google={"fail": True}, mymemory={"fail": True})
+
+        result = translator._translate_text("Iscriviti", "it", "en")
+
+        assert result == "Iscriviti"
+        assert not TranslationMemory.objects.exists()
+
+
+class TestTranslatorPool:
+
+    def test_client_reused_across_calls(self, monkeypatch, calls, settings):
+        settings.MACHINE_TRANSLATION_THREADS = 1
+        translator = _translator(monkeypatch, calls)
+
+        for text in ("Uno", "Due", "Tre"):
+            translator._translate_with_provider(text, "it", "en", "google")
+        translator._translate_with_provider("Uno", "it", "fr", "google")
+
+        assert translator.clients_created == 2  # una per coppia di lingue
+
+    def test_timeout_is_still_hard(self, monkeypatch, calls):
+        translator = _translator(monkeypatch, calls, google={"sleep": 1})
+        translator.http_timeout = 0.1
+
+        start = time.perf_counter()
+        with pytest.raises(concurrent.futures.TimeoutError):
+            translator._translate_with_provider("Uno", "it", "en", "google")
+
+        assert time.perf_counter() - start < 0.5
+
+    def test_benchmark_reuses_one_connection(self):
+        out = io.StringIO()
+
+        call_command("benchmark_machine_translator", "--strings", "5", stdout=out)
+
+        lines = out.getvalue().splitlines()
+        assert "connessioni=5" in lines[1]
+        assert "connessioni=1" in lines[2]
+
+
+class TestRateLimitAndLocales:
+
+    def test_token_bucket_paces_requests(self):
+        bucket = translator_pool.TokenBucket(rate=20)
+
+        start = time.perf_counter()
+        waits = [bucket.acquire() for _ in range(25)]
+
+        # 20 in burst, le altre 5 a 50 ms l'una
+        assert waits[:20] == [0.0] * 20
+        assert time.perf_counter() - start >= 0.2
+
+    def test_locales_translated_concurrently(self, monkeypatch, calls):
+        translator = _translator(monkeypatch, calls, google={"sleep": 0.3})
+        values = ["Raduno di primavera", "<b>Iscrizioni aperte</b>"]
+
+        start = time.perf_counter()
+        results = translator._translate_many_locales(dict.fromkeys(("en", "fr", "de", "es"), values), "it")
+
+        assert time.perf_counter() - start < 0.9  # in sequenza: 1.2 s
+        assert len(calls) == 4
+        assert results["de"] == ["RADUNO DI PRIMAVERA", "<b>ISCRIZIONI APERTE</b>"]
+
+    @pytest.mark.django_db
+    def test_locales_stored_in_memory(self, monkeypatch, calls):
+        translator = _translator(monkeypatch, calls, memory=True)
+
+        translator._translate_many_locales({"en": ["Iscriviti"], "fr": ["Iscriviti", "Contatti"]}, "it")
+
+        assert sorted(TranslationMemory.objects.values_list("target_lang", "source_text")) == [
+            ("en", "Iscriviti"), ("fr", "Contatti"), ("fr", "Iscriviti"),
+        ]
+
+
+class TestCircuitBreaker:
+
+    def test_failing_provider_skipped_after_threshold(self, monkeypatch, calls):
+        translator = _translator(monkeypatch, calls, providers=("google",), google={"fail": True})
+
+        results = [translator._translate_single(text, "it", "en") for text in ("Uno", "Due", "Tre", "Quattro", "Cinque")]
+
+        assert results[-1] == ("Cinque", None)
+        assert len(calls) == 3
+        assert provider_health.snapshot()["google"]["state"] == provider_health.STATE_OPEN
+
+    def test_failing_provider_moved_after_fallback(self, monkeypatch, calls):
+        translator = _translator(monkeypatch, calls, google={"fail": True})
+
+        results = [translator._translate_single(text, "it", "en") for text in ("Uno", "Due", "Tre")]
+
+        assert results[-1] == ("TRE", "mymemory")
+        assert [provider for provider, _text in calls] == ["google", "mymemory", "mymemory", "mymemory"]
+
+    def test_half_open_probe_closes_breaker(self, settings):
+        settings.MACHINE_TRANSLATION_BREAKER_SECONDS = 0.05
+        for _ in range(3):
+            provider_health.record_failure("google", "timeout (8s)")
+        assert provider_health.order(["google", "mymemory"], 8) == ["mymemory"]
+
+        time.sleep(0.06)
+        provider_health.acquire("google")  # unica richiesta di prova
+        with pytest.raises(provider_health.ProviderUnavailable):
+            provider_health.acquire("google")
+        provider_health.record_success("google", 0.2)
+
+        assert provider_health.snapshot()["google"]["state"] == provider_health.STATE_CLOSED
+        assert "google" in provider_health.order(["google", "mymemory"], 8)
+
+    def test_failed_probe_doubles_open_time(self, settings):
+        settings.MACHINE_TRANSLATION_BREAKER_SECONDS = 0.05
+        for _ in range(3):
+            provider_health.record_failure("google", "errore")
+        time.sleep(0.06)
+        provider_health.acquire("google")
+        provider_health.record_failure("google", "errore")
+
+        time.sleep(0.06)
+        assert provider_health.order(["google"], 8) == []
+        time.sleep(0.05)
+        assert provider_health.order(["google"], 8) == ["google"]
+
+    def test_all_breakers_open_fails_fast(self, monkeypatch, calls):
+        translator = _translator(monkeypatch, calls)
+        for provider in ("google", "mymemory"):
+            for _ in range(3):
+                provider_health.record_failure(provider, "errore")
+
+        assert translator._translate_many(["Raduno"], "it", "en") == ["Raduno"]
+        assert calls == []
+
+    def test_order_follows_latency_and_failures(self):
+        assert provider_health.order(["google", "mymemory", "deepl"], 8) == ["google", "mymemory", "deepl"]
+
+        for _ in range(5):
+            provider_health.record_success("google", 1.5)
+            provider_health.record_success("mymemory", 0.2)
+            provider_health.record_success("deepl", 0.1)
+        provider_health.record_failure("deepl", "errore")
+
+        # deepl: 0.1 s ma un errore su sei costa ~1.6 s di timeout atteso
+        assert provider_health.order(["google", "mymemory", "deepl"], 8) == ["mymemory", "google", "deepl"]
+
+    @pytest.mark.django_db
+    def test_status_view_exposes_stats(self, admin_client):
+        provider_health.record_success("google", 0.25)
+        for _ in range(3):
+            provider_health.record_failure("mymemory", "timeout (8s)")
+
+        response = admin_client.get("/admin/translator-status/")
+
+        data = response.json()["data"]
+        assert data["providers"]["google"]["latency_ms"] == 250
+        assert data["providers"]["mymemory"]["state"] == provider_health.STATE_OPEN
+        assert data["workers"][str(data["pid"])]["providers"]["mymemory"]["last_error"] == "timeout (8s)"
@@ -0,0 +1,98 @@
+"""
+Test per lo snapshot di navigazione in cache (apps.core.navigation_cache).
+"""
+import uuid
+
+import pytest
+from django.utils import translation
+from wagtail.models import Locale
+
+from apps.core.context_processors import main_pages, navigation
+from apps.core.navigation_cache import get_navigation_snapshot
+from apps.website.models import AboutPage, GalleryPage, Navbar
+
+
+@pytest.fixture
+def it_locale(db):
+    return Locale.objects.get_or_create(language_code="it")[0]
+
+
+@pytest.fixture
+def navbar(it_locale):
+    return Navbar.objects.create(
+        name="Main",
+        locale=it_locale,
+        menu_items=[
+            {"type": "link", "value": {"other_link": "/it/eventi/", "button_title": "Eventi"}},
+            {
+                "type": "dropdown",
+                "value": {
+                    "title": "Club",
+                    "links": [{"other_link": "/it/chi-siamo/", "button_title": "Chi Siamo"}],
+                },
+            },
+        ],
+    )
+
+
+@pytest.mark.django_db
+class TestNavigationSnapshot:
+
+    def test_snapshot_serializes_navbar_links(self, site, navbar):
+        snapshot = get_navigation_snapshot(site, "it")
+
+        items = snapshot["navbar"]["menu_items"]
+        assert items[0]["block_type"] == "link"
+        assert items[0]["value"]["url"] == "/it/eventi/"
+        assert items[0]["value"]["button_title"] == "Eventi"
+        assert items[1]["value"]["title"] == "Club"
+        assert items[1]["value"]["links"][0]["url"] == "/it/chi-siamo/"
+
+    def test_warm_cache_costs_zero_queries(self, site, navbar, it_request, django_assert_num_queries):
+        with translation.override("it"):
+            navigation(it_request)
+            main_pages(it_request)
+            with django_assert_num_queries(0):
+                context = navigation(it_request)
+                pages = main_pages(it_request)
+
+        assert context["navbar"]["name"] == "Main"
+        assert pages["main_pages"]["home"] == site.root_page.url
+
+    def test_navbar_save_invalidates_snapshot(self, site, navbar):
+        assert get_navigation_snapshot(site, "it")["navbar"]["name"] == "Main"
+
+        navbar.name = "Renamed"
+        navbar.save()
+
+        assert get_navigation_snapshot(site, "it")["navbar"]["name"] == "Renamed"
+
+    def test_page_publish_invalidates_snapshot(self, site, it_locale):
+        assert get_navigation_snapshot(site, "it")["main_pages"]["about"] is None
+
+        about = AboutPage(title="Chi Siamo", slug=f"chi-siamo-{uuid.uuid4().hex[:6]}", live=False)
+        site.root_page.add_child(instance=about)
+        # Pagina non pubblicata: lo snapshot resta quello in cache
+        assert get_navigation_snapshot(site, "it")["main_pages"]["about"] is None
+
+        about.save_revision().publish()
+
+        assert get_navigation_snapshot(site, "it")["main_pages"]["about"] == about.url
+
+    def test_page_move_and_delete_invalidate_snapshot(self, site, it_locale):
+        section = GalleryPage(title="Club", slug=f"club-{uuid.uuid4().hex[:6]}")
+        about = AboutPage(title="Chi Siamo", slug=f"chi-siamo-{uuid.uuid4().hex[:6]}")
+        site.root_page.add_child(instance=section)
+        site.root_page.add_child(instance=about)
+        old_url = get_navigation_snapshot(site, "it")["main_pages"]["about"]
+
+        about.move(section, pos="last-child")
+
+        new_url = get_navigation_snapshot(site, "it")["main_pages"]["about"]
+        assert new_url != old_url
+        assert new_url.startswith(section.url)
+
+        about.refresh_from_db()
+        about.delete()
+
+        assert get_navigation_snapshot(site, "it")["main_pages"]["about"] is None
@@ -0,0 +1,67 @@
+"""
+Test per lo snapshot Organization in cache (apps.core.organization_cache).
+"""
+import pytest
+from wagtailseo.models import SeoSettings
+
+from apps.core.seo import get_organization_data
+from apps.website.models import SiteSettings
+
+
+@pytest.fixture
+def seo_site(seo_site):
+    """``seo_site`` di conftest con coordinate e pagina Facebook."""
+    seo = SeoSettings.for_site(seo_site)
+    seo.struct_org_geo_lat = 44.9
+    seo.struct_org_geo_lng = 8.6
+    seo.save()
+    site_settings = SiteSettings.for_site(seo_site)
+    site_settings.facebook_url = "https://facebook.com/mccastellazzo"
+    site_settings.save()
+    return seo_site
+
+
+@pytest.mark.django_db
+class TestOrganizationSnapshot:
+
+    def test_warm_snapshot_costs_no_settings_queries(self, seo_site, django_assert_num_queries):
+        home = seo_site.root_page.specific
+        get_organization_data(home)
+
+        with django_assert_num_queries(0):
+            for _ in range(50):
+                data = get_organization_data(home)
+
+        assert data["name"] == "MC Castellazzo"
+        assert data["sameAs"] == ["https://facebook.com/mccastellazzo"]
+
+    def test_include_flags_filter_snapshot(self, seo_site):
+        home = seo_site.root_page.specific
+
+        data = get_organization_data(home, include_social=False, include_geo=False)
+
+        assert "sameAs" not in data
+        assert "geo" not in data
+        assert get_organization_data(home)["geo"]["latitude"] == 44.9
+
+    def test_callers_cannot_mutate_snapshot(self, seo_site):
+        home = seo_site.root_page.specific
+
+        get_organization_data(home)["description"] = "solo per questa pagina"
+
+        assert "description" not in get_organization_data(home)
+
+    def test_settings_save_invalidates(self, seo_site):
+        home = seo_site.root_page.specific
+        get_organization_data(home)
+
+        seo = SeoSettings.for_site(seo_site)
+        seo.struct_org_name = "Moto Club Castellazzo Bormida"
+        seo.save()
+        site_settings = SiteSettings.for_site(seo_site)
+        site_settings.facebook_url = ""
+        site_settings.save()
+
+        data = get_organization_data(home)
+        assert data["name"] == "Moto Club Castellazzo Bormida"
+        assert "sameAs" not in data
@@ -0,0 +1,117 @@
+"""
+Test per la full-page cache delle GET anonime (apps.core.page_cache).
+"""
+import io
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image as PILImage
+from wagtail.models import Collection, Locale
+from wagtailseo.models import SeoSettings
+
+from apps.website.models import Navbar
+from tests.factories.pages import AboutPageFactory, ContactPageFactory, GalleryPageFactory
+
+CACHE_HEADER = "X-Wagtail-Cache"
+
+
+@pytest.fixture
+def it_locale(db):
+    return Locale.objects.get_or_create(language_code="it")[0]
+
+
+@pytest.fixture
+def home_url(seo_site):
+    return seo_site.root_page.url
+
+
+@pytest.mark.django_db
+class TestPageCache:
+
+    def test_anonymous_get_is_served_from_cache(self, client, home_url, django_assert_num_queries):
+        assert client.get(home_url)[CACHE_HEADER] == "miss"
+
+        with django_assert_num_queries(0):
+            response = client.get(home_url)
+
+        assert response.status_code == 200
+        assert response[CACHE_HEADER] == "hit"
+
+    def test_query_string_is_part_of_the_key(self, client, home_url):
+        client.get(home_url)
+
+        assert client.get(home_url + "?p=2")[CACHE_HEADER] == "miss"
+        # I parametri di tracking sono ignorati
+        assert client.get(home_url + "?utm_source=newsletter")[CACHE_HEADER] == "hit"
+
+    def test_authenticated_user_bypasses_cache(self, client, home_url, admin_user):
+        client.get(home_url)
+        client.force_login(admin_user)
+
+        assert client.get(home_url)[CACHE_HEADER] == "skip"
+
+    def test_response_with_csrf_token_is_not_cached(self, client, seo_site):
+        contact = ContactPageFactory(parent=seo_site.root_page)
+
+        first = client.get(contact.url)
+        second = client.get(contact.url)
+
+        assert first[CACHE_HEADER] == "skip"
+        assert "private" in first["Cache-Control"]
+        assert second[CACHE_HEADER] == "skip"
+
+    def test_post_bypasses_cache(self, client, home_url):
+        client.get(home_url)
+
+        assert client.post(home_url, {})[CACHE_HEADER] == "skip"
+
+
+@pytest.mark.django_db
+class TestPageCachePurge:
+
+    def test_page_publish_purges(self, client, seo_site, home_url):
+        about = AboutPageFactory(parent=seo_site.root_page)
+        client.get(home_url)
+        assert client.get(home_url)[CACHE_HEADER] == "hit"
+
+        about.title = "Chi Siamo (aggiornato)"
+        about.save_revision().publish()
+
+        assert client.get(home_url)[CACHE_HEADER] == "miss"
+
+    def test_snippet_save_purges(self, client, home_url, it_locale):
+        client.get(home_url)
+
+        Navbar.objects.create(name="Main", locale=it_locale)
+
+        assert client.get(home_url)[CACHE_HEADER] == "miss"
+
+    def test_settings_save_purges(self, client, seo_site, home_url):
+        client.get(home_url)
+
+        seo = SeoSettings.for_site(seo_site)
+        seo.struct_org_name = "MC Castellazzo Bormida"
+        seo.save()
+
+        assert client.get(home_url)[CACHE_HEADER] == "miss"
+
+    def test_bulk_upload_into_gallery_collection_purges(self, client, seo_site):
+        from apps.core.admin_views import process_bulk_upload
+
+        collection = Collection.get_first_root_node().add_child(name="Raduno 2026")
+        gallery = GalleryPageFactory(
+            parent=seo_site.root_page,
+            gallery=[{"type": "collection_gallery", "value": {"collection": collection.id}}],
+        )
+        gallery.save_revision().publish()
+        client.get(gallery.url)
+        assert client.get(gallery.url)[CACHE_HEADER] == "hit"
+
+        buffer = io.BytesIO()
+        PILImage.new("RGB", (60, 40), color="blue").save(buffer, format="JPEG")
+        upload = SimpleUploadedFile(name="foto.jpg", content=buffer.getvalue(), content_type="image/jpeg")
+        [image] = process_bulk_upload([upload], "Raduno 2026", [], collection)
+
+        response = client.get(gallery.url)
+        assert response[CACHE_HEADER] == "miss"
+        assert image.title in response.content.decode()
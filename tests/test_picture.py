@@ -0,0 +1,143 @@
+"""
+Test per il global Jinja2 picture() e il report dei byte immagine
+(apps.core.picture).
+"""
+import io
+from io import StringIO
+
+import pytest
+from bs4 import BeautifulSoup
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from PIL import Image as PILImage
+from wagtail.images import get_image_model
+from wagtail.models import Collection
+
+from apps.core import picture as picture_module
+from apps.core.picture import estimate_image_bytes, picture, picture_specs
+from tests.factories.pages import GalleryPageFactory
+
+Image = get_image_model()
+
+
+@pytest.fixture
+def no_avif(monkeypatch):
+    monkeypatch.setattr(picture_module, "avif_supported", lambda: False)
+
+
+@pytest.fixture
+def image(db):
+    buffer = io.BytesIO()
+    PILImage.new("RGB", (1600, 1000), color="navy").save(buffer, format="JPEG")
+    image = Image(
+        title="Raduno",
+        file=SimpleUploadedFile(name="raduno.jpg", content=buffer.getvalue(), content_type="image/jpeg"),
+    )
+    image.save()
+    return image
+
+
+class TestPictureSpecs:
+
+    def test_width_variants_up_to_base(self, no_avif, settings):
+        settings.PICTURE_WIDTHS = (320, 640, 1600)
+
+        specs = picture_specs("width-1280|format-webp")
+
+        assert specs == (
+            "width-1280|format-webp",
+            "width-320|format-webp|webpquality-85",
+            "width-640|format-webp|webpquality-85",
+            "width-1280|format-webp|webpquality-85",
+        )
+
+    def test_fill_keeps_aspect_ratio_and_crop(self, no_avif, settings):
+        settings.PICTURE_WIDTHS = (200,)
+
+        assert "fill-200x150-c50|format-webp|webpquality-85" in picture_specs("fill-400x300-c50")
+
+    def test_avif_sources_when_supported(self, monkeypatch, settings):
+        monkeypatch.setattr(picture_module, "avif_supported", lambda: True)
+        settings.PICTURE_WIDTHS = (320,)
+
+        assert "width-320|format-avif|avifquality-60" in picture_specs("width-640")
+
+        settings.PICTURE_AVIF_ENABLED = False
+        assert not any("avif" in spec for spec in picture_specs("width-640"))
+
+    def test_other_operations_single_width(self, no_avif):
+        assert picture_specs("original") == ("original", "original|format-webp|webpquality-85")
+
+
+@pytest.mark.django_db
+class TestPicture:
+
+    def test_markup(self, image, no_avif, settings):
+        settings.PICTURE_WIDTHS = (320, 640)
+
+        html = str(picture(image, "width-1280|format-webp", sizes="50vw", alt="Hero", **{"class": "w-full"}))
+
+        soup = BeautifulSoup(html, "html.parser")
+        source = soup.picture.source
+        assert source["type"] == "image/webp"
+        assert source["sizes"] == "50vw"
+        assert [item.split()[1] for item in source["srcset"].split(", ")] == ["320w", "640w", "1280w"]
+        img = soup.picture.img
+        assert img["alt"] == "Hero"
+        assert img["class"] == ["w-full"]
+        assert img["loading"] == "lazy"
+        assert img["width"] == "1280"
+
+    def test_small_original_not_duplicated(self, image, no_avif, settings):
+        settings.PICTURE_WIDTHS = (320, 640)
+
+        html = str(picture(image, "width-2400"))
+
+        srcset = BeautifulSoup(html, "html.parser").picture.source["srcset"]
+        assert [item.split()[1] for item in srcset.split(", ")] == ["320w", "640w", "1600w"]
+
+    def test_none_image(self):
+        assert picture(None, "width-1280") == ""
+
+
+@pytest.mark.django_db
+class TestImageWeight:
+
+    def test_mobile_picks_smaller_candidate(self, image, no_avif, settings):
+        settings.PICTURE_WIDTHS = (320, 640)
+        html = str(picture(image, "width-1280|format-webp"))
+
+        mobile = estimate_image_bytes(html, viewport=390, dpr=1)
+        desktop = estimate_image_bytes(html, viewport=1440, dpr=1)
+
+        assert mobile["images"] == 1
+        assert mobile["unknown"] == 0
+        assert mobile["bytes"] < desktop["bytes"]
+        assert mobile["fallback_bytes"] == desktop["fallback_bytes"]
+
+    def test_sizes_media_queries(self):
+        assert picture_module._slot_width("(min-width: 768px) 25vw, 50vw", 1000) == 250
+        assert picture_module._slot_width("(min-width: 768px) 25vw, 50vw", 400) == 200
+        assert picture_module._slot_width("300px", 400) == 300
+
+    def test_report_command(self, seo_site, no_avif):
+        collection = Collection.get_first_root_node().add_child(name="Report")
+        buffer = io.BytesIO()
+        PILImage.new("RGB", (800, 800), color="red").save(buffer, format="PNG")
+        Image.objects.create(
+            title="Foto",
+            collection=collection,
+            file=SimpleUploadedFile(name="foto.png", content=buffer.getvalue(), content_type="image/png"),
+        )
+        gallery = GalleryPageFactory.build()
+        gallery.gallery = [
+            {"type": "collection_gallery", "value": {"title": "Report", "collection": collection.id, "category": None}},
+        ]
+        seo_site.root_page.add_child(instance=gallery)
+        out = StringIO()
+
+        call_command("image_weight_report", page_type="GalleryPage", stdout=out)
+
+        assert "GalleryPage" in out.getvalue()
+        assert "mobile" in out.getvalue()
+        assert "pagine=1" in out.getvalue()
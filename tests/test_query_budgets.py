@@ -0,0 +1,181 @@
+"""
+Query budget per tipo di pagina.
+================================
+Ogni modello pagina dichiara ``query_budget``: il numero massimo di query
+SQL per servire la pagina a cache calde (snapshot di navigazione, indice
+traduzioni, rendition già generate). Il test renderizza ogni pagina delle
+factory in ``tests/factories/pages.py`` con qualche elemento figlio (eventi,
+articoli, immagini) e fallisce se il budget viene superato, così gli N+1 nei
+template emergono in CI invece che in produzione.
+
+Lo stesso budget è usato da ``QueryStatsMiddleware`` per loggare un WARNING
+quando una pagina lo supera in produzione.
+"""
+import io
+from datetime import timedelta
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image as PILImage
+from wagtail.images import get_image_model
+from wagtail.models import Collection
+
+from tests.factories import pages as factories
+
+Image = get_image_model()
+
+# Elementi figli creati per le pagine "lista": il budget deve reggere
+# con questo numero di elementi, altrimenti c'è un N+1.
+ITEMS = 4
+
+
+def _make_image(collection, name, tags=()):
+    buffer = io.BytesIO()
+    PILImage.new("RGB", (120, 80), color="blue").save(buffer, format="PNG")
+    image = Image(
+        title=name,
+        collection=collection,
+        file=SimpleUploadedFile(name=f"{name}.png", content=buffer.getvalue(), content_type="image/png"),
+    )
+    image.save()
+    if tags:
+        image.tags.add(*tags)
+    return image
+
+
+def _home(home):
+    return home
+
+
+def _simple(factory_name):
+    def build(home):
+        return getattr(factories, factory_name)(parent=home)
+    return build
+
+
+def _events(home):
+    events = factories.EventsPageFactory(parent=home)
+    for n in range(ITEMS):
+        factories.EventDetailPageFactory(
+            parent=events,
+            start_date=timezone.now() + timedelta(days=10 + n),
+        )
+    return events
+
+
+def _event_detail(home):
+    events = factories.EventsPageFactory(parent=home)
+    return factories.EventDetailPageFactory(parent=events, start_date=timezone.now() + timedelta(days=5))
+
+
+def _archive(home):
+    archive = factories.EventsArchivePageFactory(parent=home)
+    for n in range(ITEMS):
+        factories.EventDetailPageFactory(
+            parent=archive,
+            start_date=timezone.now() - timedelta(days=400 * (n + 1)),
+        )
+    return archive
+
+
+def _gallery(home):
+    collection = Collection.get_first_root_node().add_child(name="Raduno budget")
+    for n in range(ITEMS):
+        _make_image(collection, f"raduno-{n:03d}", tags=("raduno", f"tag-{n}"))
+    gallery = factories.GalleryPageFactory.build()
+    gallery.gallery = [
+        {"type": "collection_gallery", "value": {"title": "Raduno", "collection": collection.id, "category": None}},
+    ]
+    home.add_child(instance=gallery)
+    return gallery
+
+
+def _news_index(home):
+    index = factories.NewsIndexPageFactory(parent=home)
+    for _n in range(ITEMS):
+        factories.NewsPageFactory(parent=index)
+    return index
+
+
+def _news_page(home):
+    index = factories.NewsIndexPageFactory(parent=home)
+    return factories.NewsPageFactory(parent=index)
+
+
+PAGE_BUILDERS = {
+    "HomePage": _home,
+    "TimelinePage": _simple("TimelinePageFactory"),
+    "AboutPage": _simple("AboutPageFactory"),
+    "BoardPage": _simple("BoardPageFactory"),
+    "TransparencyPage": _simple("TransparencyPageFactory"),
+    "ContactPage": _simple("ContactPageFactory"),
+    "PrivacyPage": _simple("PrivacyPageFactory"),
+    "EventsPage": _events,
+    "EventDetailPage": _event_detail,
+    "EventsArchivePage": _archive,
+    "GalleryPage": _gallery,
+    "NewsIndexPage": _news_index,
+    "NewsPage": _news_page,
+}
+
+
+@pytest.fixture(autouse=True)
+def no_page_cache(settings):
+    """Il budget misura il render: la full-page cache servirebbe il secondo GET."""
+    settings.WAGTAIL_CACHE = False
+
+
+def _measure(client, url):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    return response, len(queries.captured_queries)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("page_type", sorted(PAGE_BUILDERS))
+def test_page_within_query_budget(seo_site, client, page_type):
+    page = PAGE_BUILDERS[page_type](seo_site.root_page.specific)
+    page = page.specific
+    assert type(page).__name__ == page_type
+
+    # Primo render: scalda snapshot/indici in cache e genera le rendition
+    warmup = client.get(page.url)
+    assert warmup.status_code == 200, f"{page_type} non renderizzabile ({warmup.status_code})"
+
+    response, num_queries = _measure(client, page.url)
+
+    assert response.status_code == 200
+    budget = type(page).query_budget
+    assert num_queries <= budget, (
+        f"{page_type}: {num_queries} query, budget {budget}. "
+        "Probabile N+1 in template o helper del modello."
+    )
+
+
+@pytest.mark.django_db
+class TestQueryStatsMiddleware:
+
+    def test_staff_gets_query_headers(self, seo_site, client, admin_user):
+        client.force_login(admin_user)
+
+        response = client.get(seo_site.root_page.url)
+
+        assert response["X-Page-Type"] == "HomePage"
+        assert int(response["X-DB-Queries"]) > 0
+        assert float(response["X-DB-Time-Ms"]) >= 0
+
+    def test_anonymous_gets_no_query_headers(self, seo_site, client):
+        response = client.get(seo_site.root_page.url)
+
+        assert "X-DB-Queries" not in response
+        assert "X-Page-Type" not in response
+
+    def test_log_line_tags_page_type(self, seo_site, client, caplog):
+        with caplog.at_level("INFO", logger="apps.core.query_stats"):
+            client.get(seo_site.root_page.url)
+
+        messages = [record.getMessage() for record in caplog.records]
+        assert any("page=HomePage" in message and "queries=" in message for message in messages)
@@ -0,0 +1,216 @@
+"""
+Test per le rendition (apps.core.renditions): registry delle filter spec,
+pre-generazione in background, coda limitata, vista admin di stato e
+prefetch in blocco per le liste.
+"""
+import io
+from datetime import datetime
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image as PILImage
+from wagtail.images import get_image_model
+
+from apps.core import renditions
+from apps.website.models import GalleryPage
+from tests.factories.pages import EventDetailPageFactory, EventsArchivePageFactory
+
+Image = get_image_model()
+
+
+def _make_image(title="Raduno"):
+    buffer = io.BytesIO()
+    PILImage.new("RGB", (200, 150), color="red").save(buffer, format="PNG")
+    image = Image(
+        title=title,
+        file=SimpleUploadedFile(name=f"{title}.png", content=buffer.getvalue(), content_type="image/png"),
+    )
+    image.save()
+    return image
+
+
+@pytest.fixture
+def image(db):
+    return _make_image()
+
+
+class FakeExecutor:
+    """Raccoglie i job invece di eseguirli in un thread."""
+
+    def __init__(self):
+        self.jobs = []
+
+    def submit(self, fn, *args):
+        self.jobs.append((fn, args))
+
+
+@pytest.fixture
+def executor(monkeypatch, settings):
+    settings.RENDITION_PREGENERATE_ENABLED = True
+    fake = FakeExecutor()
+    monkeypatch.setattr(renditions, "_get_executor", lambda: fake)
+    monkeypatch.setattr(renditions, "_pending", set())
+    return fake
+
+
+class TestRegistry:
+
+    def test_page_specs_registered(self):
+        registry = renditions.get_rendition_registry()
+
+        assert registry["website.GalleryPage"] == GalleryPage.rendition_specs
+        assert "fill-600x400" in registry["website.NewsIndexPage"]
+
+    def test_union_has_no_duplicates(self):
+        specs = renditions.get_registered_filter_specs()
+
+        assert len(specs) == len(set(specs))
+        assert set(GalleryPage.rendition_specs) <= set(specs)
+
+    def test_uploads_get_gallery_specs_only(self):
+        specs = renditions.get_gallery_filter_specs()
+
+        assert specs == tuple(spec for spec in GalleryPage.rendition_specs if spec != "original")
+        assert len(specs) < len(renditions.get_registered_filter_specs())
+
+
+@pytest.mark.django_db
+class TestGeneration:
+
+    def test_generates_only_missing(self, image):
+        image.get_rendition("fill-80x60")
+
+        created = renditions.generate_renditions(image.id, ["fill-80x60", "width-100"])
+
+        assert created == 1
+        assert set(image.renditions.values_list("filter_spec", flat=True)) == {"fill-80x60", "width-100"}
+        assert renditions.generate_renditions(image.id, ["fill-80x60", "width-100"]) == 0
+
+    def test_job_records_status(self, image):
+        renditions._run(image.id, ("width-100",))
+
+        status = renditions.get_statuses([image.id])[image.id]
+        assert status["state"] == renditions.STATUS_DONE
+        assert status["created"] == 1
+
+
+@pytest.mark.django_db
+class TestQueue:
+
+    def test_disabled_by_setting(self, image, settings):
+        settings.RENDITION_PREGENERATE_ENABLED = False
+
+        assert renditions.enqueue_renditions([image.id], ["width-100"]) == 0
+
+    def test_duplicates_skipped(self, image, executor):
+        assert renditions.enqueue_renditions([image.id, image.id], ["width-100"]) == 1
+        assert renditions.enqueue_renditions([image.id], ["width-100"]) == 0
+
+        assert len(executor.jobs) == 1
+        assert renditions.get_statuses([image.id])[image.id]["state"] == renditions.STATUS_QUEUED
+
+    def test_queue_is_bounded(self, executor, settings):
+        settings.RENDITION_QUEUE_MAX = 2
+
+        assert renditions.enqueue_renditions([1, 2, 3], ["width-100"]) == 2
+        assert len(executor.jobs) == 2
+
+    def test_original_never_pregenerated(self, image, executor):
+        assert renditions.enqueue_renditions([image.id], ["original"]) == 0
+        assert renditions.enqueue_renditions([image.id], ["original", "width-100"]) == 1
+
+        assert executor.jobs[0][1] == (image.id, ("width-100",))
+
+    def test_bulk_upload_enqueues_gallery_specs(self, executor, django_capture_on_commit_callbacks):
+        from apps.core.admin_views import process_bulk_upload
+
+        buffer = io.BytesIO()
+        PILImage.new("RGB", (50, 50)).save(buffer, format="PNG")
+        upload = SimpleUploadedFile(name="nuova.png", content=buffer.getvalue(), content_type="image/png")
+
+        with django_capture_on_commit_callbacks(execute=True):
+            [image] = process_bulk_upload([upload], "Raduno", [])
+
+        assert executor.jobs == [(renditions._run, (image.id, renditions.get_gallery_filter_specs()))]
+
+    def test_other_uploads_left_to_render(self, executor, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            _make_image("Singola")
+
+        assert executor.jobs == []
+
+
+@pytest.mark.django_db
+class TestRenditionStatusView:
+
+    def test_requires_login(self, client):
+        response = client.get("/admin/renditions/")
+
+        assert response.status_code in [302, 403]
+
+    def test_lists_recent_images(self, client, admin_user, image):
+        client.force_login(admin_user)
+
+        response = client.get("/admin/renditions/")
+
+        assert response.status_code == 200
+        assert b"Raduno" in response.content
+
+    def test_post_enqueues_missing(self, client, admin_user, image, executor):
+        client.force_login(admin_user)
+
+        response = client.post("/admin/renditions/")
+
+        assert response.status_code == 302
+        assert [args[0] for _fn, args in executor.jobs] == [image.id]
+
+
+def _archive_with_events(site, count):
+    archive = EventsArchivePageFactory(parent=site.root_page)
+    for n in range(count):
+        EventDetailPageFactory(
+            parent=archive,
+            image=_make_image(f"evento-{n}"),
+            start_date=timezone.make_aware(datetime(2020, 1, 1 + n % 28, 10, 0)),
+        )
+    return archive
+
+
+def _render_cards(archive):
+    """Come il template: image(event.image, card_image_filter) per ogni card."""
+    with CaptureQueriesContext(connection) as queries:
+        for _year, events in archive.get_events_by_year():
+            for event in events:
+                assert event.image.get_rendition(archive.card_image_filter).url
+    return len(queries.captured_queries)
+
+
+@pytest.mark.django_db
+class TestListingPrefetch:
+
+    def test_missing_renditions_created_then_reused(self, image):
+        renditions.attach_renditions([image], ["width-100"])
+
+        assert list(image.renditions.values_list("filter_spec", flat=True)) == ["width-100"]
+        with CaptureQueriesContext(connection) as queries:
+            image.get_rendition("width-100")
+        assert len(queries.captured_queries) == 0
+
+    def test_archive_cards_constant_queries(self, site):
+        small = _archive_with_events(site, 2)
+        large = _archive_with_events(site, 48)
+        _render_cards(small)  # genera le rendition
+        _render_cards(large)
+
+        assert _render_cards(large) == _render_cards(small)
+
+    def test_duplicate_images_all_attached(self, image):
+        copy = Image.objects.get(pk=image.pk)
+
+        renditions.attach_renditions([image, copy], ["width-100"])
+
+        assert copy.prefetched_renditions
+        assert image.prefetched_renditions
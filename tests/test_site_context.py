@@ -0,0 +1,77 @@
+"""
+Test per il SiteContext per-richiesta (apps.core.site_context) e per i
+context processor lazy.
+"""
+import pytest
+from django.db import connection
+from django.template import engines
+from django.test.utils import CaptureQueriesContext
+from django.utils import translation
+
+from apps.core.site_context import get_site_context
+
+
+def _render(template_code, request):
+    with translation.override("it"), CaptureQueriesContext(connection) as queries:
+        html = engines["jinja2"].from_string(template_code).render({}, request)
+    return html, len(queries)
+
+
+@pytest.mark.django_db
+class TestSiteContext:
+
+    def test_bundle_is_stored_on_request(self, it_request):
+        assert get_site_context(it_request) is get_site_context(it_request)
+
+    def test_locale_and_site_resolved_once_per_request(self, it_request, django_assert_max_num_queries):
+        site_context = get_site_context(it_request)
+        with translation.override("it"):
+            first_locale = site_context.locale
+            first_site = site_context.site
+            with django_assert_max_num_queries(0):
+                assert site_context.locale is first_locale
+                assert site_context.site is first_site
+        assert first_locale.language_code == "it"
+
+
+@pytest.mark.django_db
+class TestLazyContextProcessors:
+
+    def test_bare_render_costs_zero_queries(self, it_request):
+        """
+        Prima (processor eager): ogni render pagava Locale, Navbar/Footer,
+        pagine principali e route-walking delle traduzioni, anche se il
+        template non li usava. Dopo: un template che non li tocca non
+        esegue alcuna query.
+        """
+        eager_html, eager_queries = _render(
+            "{{ main_pages.home }}|{{ page_translations.en }}|{{ navbar }}", it_request
+        )
+        bare_html, bare_queries = _render("<p>{{ request.path }}</p>", it_request)
+
+        assert eager_queries > 0
+        assert bare_queries == 0
+        assert bare_html == "<p>/it/</p>"
+        assert "|/en/|" in eager_html
+
+    def test_second_render_in_same_request_is_free(self, it_request):
+        _render("{{ main_pages.home }}{{ page_translations.en }}", it_request)
+
+        _html, queries = _render("{{ main_pages.home }}{{ page_translations.en }}", it_request)
+
+        assert queries == 0
+
+    def test_homepage_render_queries_drop_with_warm_caches(self, site, client):
+        from wagtailseo.models import SeoSettings
+
+        seo = SeoSettings.for_site(site)
+        seo.struct_org_name = "MC Castellazzo"
+        seo.save()
+
+        with CaptureQueriesContext(connection) as cold:
+            cold_response = client.get("/it/")
+        with CaptureQueriesContext(connection) as warm:
+            warm_response = client.get("/it/")
+
+        assert cold_response.status_code == warm_response.status_code == 200
+        assert len(warm.captured_queries) < len(cold.captured_queries)
@@ -0,0 +1,79 @@
+"""
+Test per l'indice delle traduzioni del language switcher
+(apps.core.translation_index).
+"""
+import uuid
+
+import pytest
+from django.test import RequestFactory
+from wagtail.models import Locale
+
+from apps.core.context_processors import page_translations
+from apps.core.translation_index import find_translations, get_translation_index
+from apps.website.models import AboutPage
+
+
+@pytest.fixture
+def about_with_translation(site):
+    """AboutPage italiana pubblicata + traduzione inglese pubblicata."""
+    Locale.objects.get_or_create(language_code="it")
+    en_locale = Locale.objects.get_or_create(language_code="en")[0]
+
+    home = site.root_page.specific
+    en_home = home.copy_for_translation(en_locale)
+    en_home.save_revision().publish()
+
+    about = AboutPage(title="Chi Siamo", slug=f"chi-siamo-{uuid.uuid4().hex[:6]}")
+    home.add_child(instance=about)
+    about.save_revision().publish()
+    en_about = about.copy_for_translation(en_locale)
+    en_about.slug = f"about-{uuid.uuid4().hex[:6]}"
+    en_about.save_revision().publish()
+    en_about.refresh_from_db()
+    return about, en_about
+
+
+@pytest.mark.django_db
+class TestTranslationIndex:
+
+    def test_index_maps_path_to_all_translations(self, site, about_with_translation):
+        about, en_about = about_with_translation
+
+        translations = find_translations(site, about.url)
+
+        assert translations == {"it": about.url, "en": en_about.url}
+
+    def test_routable_subpath_resolves_to_parent_page(self, site, about_with_translation):
+        about, en_about = about_with_translation
+
+        translations = find_translations(site, about.url + "2025/")
+
+        assert translations["en"] == en_about.url
+
+    def test_unknown_path_returns_homepage_fallbacks(self, site):
+        request = RequestFactory().get("/it/non-esiste/", HTTP_HOST=site.hostname)
+
+        context = page_translations(request)
+
+        assert context["page_translations"]["de"] == "/de/"
+
+    def test_warm_index_costs_zero_queries(self, site, about_with_translation, django_assert_num_queries):
+        about, en_about = about_with_translation
+        request = RequestFactory().get(about.url, HTTP_HOST=site.hostname)
+        request._wagtail_site = site
+        page_translations(request)
+
+        with django_assert_num_queries(0):
+            context = page_translations(request)
+
+        assert context["page_translations"]["en"] == en_about.url
+        assert context["page_hreflang"] == {"it": about.url, "en": en_about.url}
+
+    def test_unpublish_updates_index(self, site, about_with_translation):
+        about, en_about = about_with_translation
+        assert "en" in find_translations(site, about.url)
+
+        en_about.unpublish()
+
+        assert find_translations(site, about.url) == {"it": about.url}
+        assert str(about.translation_key) in get_translation_index(site)["urls"]
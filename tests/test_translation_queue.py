@@ -0,0 +1,268 @@
+"""
+Test per la coda dei lavori di traduzione (apps.core.translation_queue):
+accodamento idempotente, lease, retry con backoff, limiti di concorrenza,
+comando ``translation_worker`` e traduzione automatica delle pagine in
+background.
+"""
+import io
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils import timezone
+
+from apps.core import provider_health, translation_queue
+from apps.core.models import TranslationJob
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def tasks(monkeypatch):
+    """Tipi di lavoro di prova: ``ok`` registra le chiamate, ``ko`` fallisce."""
+    calls = []
+
+    def ok(**payload):
+        calls.append(payload)
+        return {"done": len(calls)}
+
+    def ko(**payload):
+        raise translation_queue.TranslationJobError("provider non disponibili")
+
+    monkeypatch.setitem(translation_queue._tasks, "ok", ok)
+    monkeypatch.setitem(translation_queue._tasks, "ko", ko)
+    return calls
+
+
+@pytest.fixture(autouse=True)
+def clean_state():
+    cache.clear()
+    provider_health.reset()
+    yield
+    provider_health.reset()
+
+
+class TestEnqueue:
+
+    def test_enqueue_is_idempotent(self):
+        first = translation_queue.enqueue_pending("fr")
+        second = translation_queue.enqueue_pending("fr")
+
+        assert first.pk == second.pk
+        assert TranslationJob.objects.count() == 1
+        assert first.payload == {"locale_code": "fr", "max_strings": 200}
+
+    def test_running_job_does_not_block_new_one(self, tasks):
+        translation_queue.enqueue("ok", "pending:fr")
+        running = translation_queue.claim("w1")
+
+        queued = translation_queue.enqueue("ok", "pending:fr")
+
+        assert queued.pk != running.pk
+        assert queued.status == TranslationJob.STATUS_QUEUED
+
+    def test_page_requests_enqueue_once_per_interval(self, monkeypatch):
+        monkeypatch.setattr(translation_queue, "_pending_strings", lambda code: SimpleNamespace(exists=lambda: True))
+
+        assert translation_queue.request_pending("de") is not None
+        TranslationJob.objects.all().delete()
+        assert translation_queue.request_pending("de") is None
+        assert not TranslationJob.objects.exists()
+
+    def test_nothing_pending_nothing_enqueued(self, monkeypatch):
+        monkeypatch.setattr(translation_queue, "_pending_strings", lambda code: SimpleNamespace(exists=lambda: False))
+
+        assert translation_queue.request_pending("es") is None
+        assert not TranslationJob.objects.exists()
+
+
+class TestLeaseAndRetry:
+
+    def test_job_runs_and_records_result(self, tasks):
+        translation_queue.enqueue("ok", "prova", {"locale_code": "en"})
+
+        job = translation_queue.run_next("w1")
+
+        job.refresh_from_db()
+        assert job.status == TranslationJob.STATUS_DONE
+        assert job.result == {"done": 1}
+        assert tasks == [{"locale_code": "en"}]
+        assert translation_queue.run_next("w1") is None
+
+    def test_failure_retried_with_backoff(self, tasks, settings):
+        settings.TRANSLATION_QUEUE_MAX_ATTEMPTS = 2
+        settings.TRANSLATION_QUEUE_BACKOFF_SECONDS = 60
+        job = translation_queue.enqueue("ko", "prova")
+
+        translation_queue.run_next("w1")
+
+        job.refresh_from_db()
+        assert job.status == TranslationJob.STATUS_QUEUED
+        assert job.attempts == 1
+        assert job.run_after > timezone.now() + timedelta(seconds=40)
+        assert "provider non disponibili" in job.last_error
+        assert translation_queue.run_next("w1") is None  # non ancora
+
+        TranslationJob.objects.update(run_after=timezone.now())
+        translation_queue.run_next("w1")
+
+        job.refresh_from_db()
+        assert job.status == TranslationJob.STATUS_FAILED
+        assert job.attempts == 2
+
+    def test_expired_lease_is_reclaimed(self, tasks):
+        translation_queue.enqueue("ok", "prova")
+        lost = translation_queue.claim("morto")
+        assert translation_queue.claim("w2") is None  # lease valido
+
+        TranslationJob.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+        job = translation_queue.claim("w2")
+
+        assert job.pk == lost.pk
+        assert job.locked_by == "w2"
+        assert job.attempts == 2
+
+    def test_finish_ignored_after_lease_lost(self, tasks):
+        translation_queue.enqueue("ok", "prova")
+        lost = translation_queue.claim("morto")
+        TranslationJob.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+        translation_queue.claim("w2")
+
+        translation_queue.run_job(lost)
+
+        assert TranslationJob.objects.get().status == TranslationJob.STATUS_RUNNING
+
+
+class TestConcurrency:
+
+    def test_global_limit(self, tasks, settings):
+        translation_queue.enqueue("ok", "a")
+        translation_queue.enqueue("ok", "b")
+
+        assert translation_queue.claim("w1").key == "a"
+        assert translation_queue.claim("w2") is None
+
+        settings.TRANSLATION_QUEUE_CONCURRENCY = 2
+        assert translation_queue.claim("w2").key == "b"
+
+    def test_one_running_job_per_key(self, tasks, settings):
+        settings.TRANSLATION_QUEUE_CONCURRENCY = 2
+        translation_queue.enqueue("ok", "pending:fr")
+        translation_queue.claim("w1")
+        translation_queue.enqueue("ok", "pending:fr")
+
+        assert translation_queue.claim("w2") is None
+
+
+class TestPendingTask:
+
+    def test_retry_when_all_providers_down(self, monkeypatch):
+        from apps.core import machine_translator
+
+        monkeypatch.setattr(
+            machine_translator, "translate_pending_segments",
+            lambda **kwargs: {"done": 0, "skipped": 4, "errors": 0},
+        )
+        for provider in ("google", "mymemory"):
+            for _ in range(3):
+                provider_health.record_failure(provider, "timeout (8s)")
+
+        with pytest.raises(translation_queue.TranslationJobError):
+            translation_queue.translate_pending(locale_code="fr")
+
+    def test_nothing_to_do_is_success(self, monkeypatch):
+        from apps.core import machine_translator
+
+        monkeypatch.setattr(
+            machine_translator, "translate_pending_segments",
+            lambda **kwargs: {"done": 0, "skipped": 0, "errors": 0},
+        )
+
+        assert translation_queue.translate_pending(locale_code="fr") == {"done": 0, "skipped": 0, "errors": 0}
+
+
+def test_worker_once_drains_queue(tasks):
+    translation_queue.enqueue("ok", "a")
+    translation_queue.enqueue("ok", "b")
+    out = io.StringIO()
+
+    call_command("translation_worker", "--once", stdout=out)
+
+    assert len(tasks) == 2
+    assert "lavori eseguiti: 2" in out.getvalue()
+    assert set(TranslationJob.objects.values_list("status", flat=True)) == {TranslationJob.STATUS_DONE}
+
+
+@pytest.fixture
+def french_home():
+    """Home italiana con la traduzione francese ancora da tradurre."""
+    from wagtail.models import Locale, Page
+
+    from apps.website.models import HomePage
+
+    italian, _ = Locale.objects.get_or_create(language_code="it")
+    french, _ = Locale.objects.get_or_create(language_code="fr")
+    root = Page.objects.filter(depth=1).first() or Page.add_root(title="Root", slug="root")
+    home = HomePage(
+        title="Home",
+        slug="home-coda",
+        locale=italian,
+        description="<p>Il Moto Club Castellazzo Bormida, fondato nel 1933</p>",
+        hero_title="Moto Club Castellazzo Bormida",
+        hero_subtitle="Dal 1933",
+    )
+    root.add_child(instance=home)
+    home.save_revision().publish()
+    return home.copy_for_translation(french, copy_parents=True, alias=False)
+
+
+class UpperTranslator:
+    def _translate_html(self, html, source_lang, target_lang):
+        return html.upper()
+
+
+class TestPageTranslation:
+
+    def test_view_enqueues_and_redirects(self, admin_client, french_home):
+        revisions = french_home.revisions.count()
+
+        response = admin_client.get(f"/admin/translate-page/{french_home.id}/")
+
+        assert response.status_code == 302
+        assert response.url.endswith(f"/admin/pages/{french_home.id}/edit/")
+        job = TranslationJob.objects.get()
+        assert (job.key, job.status) == (f"page:{french_home.id}", TranslationJob.STATUS_QUEUED)
+        assert french_home.revisions.count() == revisions  # niente tradotto nella richiesta
+
+    def test_job_saves_revision_and_reports_progress(self, admin_client, admin_user, french_home, monkeypatch):
+        from apps.core import views
+
+        monkeypatch.setattr(views, "get_translator", UpperTranslator)
+        translation_queue.enqueue_page(french_home.id, admin_user.pk)
+
+        job = translation_queue.run_next("w1")
+
+        job.refresh_from_db()
+        assert job.status == TranslationJob.STATUS_DONE
+        assert job.progress["done"] == job.progress["total"] > 0
+        assert {field["state"] for field in job.progress["fields"]} == {"done"}
+        french_home.refresh_from_db()
+        draft = french_home.get_latest_revision_as_object()
+        assert draft.hero_title == "MOTO CLUB CASTELLAZZO BORMIDA"
+        assert job.result["revision_id"] == french_home.get_latest_revision().pk
+
+        data = admin_client.get(f"/admin/translate-page/{french_home.id}/status/").json()["data"]
+        assert data["status"] == TranslationJob.STATUS_DONE
+        assert data["progress"] == job.progress
+
+    def test_status_without_job(self, admin_client, french_home):
+        response = admin_client.get(f"/admin/translate-page/{french_home.id}/status/")
+
+        assert response.json() == {"success": True, "data": None}
+
+    def test_editor_action_polls_status(self, admin_client, french_home):
+        response = admin_client.get(f"/admin/pages/{french_home.id}/edit/")
+
+        assert f'data-status-url="/admin/translate-page/{french_home.id}/status/"' in response.content.decode()